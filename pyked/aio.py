@@ -0,0 +1,148 @@
+"""
+Module for asynchronous DOI and ORCID lookups used to validate ChemKED files on an event loop
+"""
+# Standard libraries
+import asyncio
+
+from . import client as lookup_client
+from .client import NotFoundError, TransientLookupError, OfflineClient, lookup_keys, _Retries
+
+
+def _offline_result(function, key):
+    """Get the result of a lookup of an `~pyked.client.OfflineClient`, or its exception.
+    """
+    try:
+        return function(key)
+    except (NotFoundError, TransientLookupError) as error:
+        return error
+
+
+class AsyncLookup(object):
+    """Client for concurrent DOI and ORCID lookups on an event loop.
+
+    The rate limit, retries, and URLs are those of a `~pyked.client.LookupClient`, whose
+    `~pyked.client.TokenBucket` is shared, so that the lookups done on the event loop and in
+    threads together stay within the rate limit. The number of requests in flight is also
+    limited. The result of each lookup is cached, so a DOI or ORCID is only looked up once
+    however many files use it.
+
+    A lookup returns the JSON response, or the exception that the lookup of the
+    `~pyked.client.LookupClient` would raise: `~pyked.client.NotFoundError` if the DOI or ORCID
+    was not found, `~pyked.client.LookupRejectedError` if the request was rejected for another
+    reason, and `~pyked.client.TransientLookupError` if the request still failed after the
+    retries, which is not cached. The aiohttp package is needed.
+
+    Arguments:
+        client (`~pyked.client.LookupClient`, optional): The client with the settings of the
+            lookups. Defaults to ``pyked.client.default_client``. With an
+            `~pyked.client.OfflineClient`, the lookups are answered by it without the network.
+        max_concurrency (`int`, optional): The maximum number of requests in flight. Must be
+            supplied as a keyword-argument.
+
+    Examples:
+        >>> async with AsyncLookup(LookupClient(rate=5.0)) as lookup:
+        ...     reference = await lookup.doi('10.1016/j.combustflame.2009.12.022')
+    """
+    def __init__(self, client=None, *, max_concurrency=10):
+        self.client = lookup_client.default_client if client is None else client
+        self.max_concurrency = max_concurrency
+        self._session = None
+        self._semaphore = None
+        self._results = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def close(self):
+        """Close the HTTP session.
+        """
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _get(self, url, params=None, headers=None):
+        """Get a JSON response, retrying failed requests like `~pyked.client.LookupClient`.
+        """
+        import aiohttp
+
+        client = self.client
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=client.timeout))
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        retries = _Retries(client, url)
+        for delay in retries:
+            if delay > 0.0:
+                await asyncio.sleep(delay)
+            await client.bucket.aacquire()
+            try:
+                async with self._semaphore:
+                    async with self._session.get(url, params=params, headers=headers) as response:
+                        if response.status == 200:
+                            return await response.json(content_type=None)
+                        error = retries.response(response.status, response.reason,
+                                                 response.headers)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+                if retries.connection_failed(error):
+                    break
+                continue
+            if error is not None:
+                return error
+        return retries.error()
+
+    async def _lookup(self, key, url, params=None, headers=None):
+        if key not in self._results:
+            self._results[key] = asyncio.ensure_future(self._get(url, params, headers))
+        future = self._results[key]
+        result = await future
+        if isinstance(result, TransientLookupError) and self._results.get(key) is future:
+            del self._results[key]
+        return result
+
+    async def doi(self, doi):
+        """Look up a DOI with Crossref.
+
+        Arguments:
+            doi (`str`): The DOI
+
+        Returns:
+            `dict` or `Exception`: The JSON response, whose ``message`` is the metadata of the
+                reference, or the exception of a failed lookup
+        """
+        if isinstance(self.client, OfflineClient):
+            return _offline_result(self.client.works, doi)
+        url, params = self.client.works_url(doi)
+        return await self._lookup(('doi', doi), url, params)
+
+    async def orcid(self, orcid):
+        """Look up the personal details of an ORCID.
+
+        Arguments:
+            orcid (`str`): The ORCID
+
+        Returns:
+            `dict` or `Exception`: The JSON response, or the exception of a failed lookup
+        """
+        if isinstance(self.client, OfflineClient):
+            return _offline_result(self.client.person, orcid)
+        return await self._lookup(('orcid', orcid), self.client.person_url(orcid),
+                                  headers={'Accept': 'application/json'})
+
+    async def lookups(self, properties):
+        """Do all of the lookups needed to validate a ChemKED file concurrently.
+
+        Arguments:
+            properties (`dict`): Dictionary created from the parsed YAML file
+
+        Returns:
+            `dict`: The result of each lookup, in the form of the ``lookups`` keyword argument of
+                `~pyked.validation.OurValidator`
+        """
+        keys = lookup_keys(properties)
+        results = await asyncio.gather(*[self.doi(key) if kind == 'doi' else self.orcid(key)
+                                         for kind, key in keys])
+        return dict(zip(keys, results))
@@ -0,0 +1,171 @@
+"""
+Module for bundles of many ChemKED records in one multi-document YAML file
+"""
+# Standard libraries
+import json
+import os
+
+from .chemked import ChemKED, _history_values_lists
+from .validation import yaml, yaml_loader
+
+
+def index_filename(filename):
+    """Get the filename of the index of a bundle.
+
+    Arguments:
+        filename (`str`): The filename of the bundle
+
+    Returns:
+        `str`: The filename of the index, which is the bundle filename with ``.index.json``
+            appended
+    """
+    return filename + '.index.json'
+
+
+def _write_index(filename, offsets):
+    with open(index_filename(filename), 'w') as f:
+        json.dump({'size': os.path.getsize(filename), 'offsets': offsets}, f)
+
+
+def write_bundle(chemkeds, filename, *, mode='w'):
+    """Write ChemKED records to a bundle and its index.
+
+    Each record is a YAML document that starts with a ``---`` line. The byte offset of the
+    start of each document is stored in the index, so that records can be loaded without
+    parsing the documents before them.
+
+    Arguments:
+        chemkeds (`list`): List of `~pyked.chemked.ChemKED` instances, or a single instance
+        filename (`str`): The filename of the bundle
+        mode (`str`, optional): Either ``'w'`` to overwrite the bundle or ``'a'`` to append the
+            records to it. Must be supplied as a keyword-argument.
+
+    Returns:
+        `list`: The byte offsets of all of the records in the bundle
+
+    Examples:
+        >>> write_bundle([ChemKED(f) for f in yaml_files], 'corpus.yaml')
+    """
+    if mode not in ['w', 'a']:
+        raise ValueError('mode must be one of "w" or "a"')
+    if not isinstance(chemkeds, (list, tuple)):
+        chemkeds = [chemkeds]
+
+    offsets = read_index(filename) if mode == 'a' and os.path.exists(filename) else []
+    with open(filename, mode + 'b') as f:
+        for chemked in chemkeds:
+            offsets.append(f.tell())
+            f.write(b'---\n')
+            f.write(yaml.dump(_history_values_lists(chemked._properties)).encode('utf-8'))
+    _write_index(filename, offsets)
+    return offsets
+
+
+def build_index(filename):
+    """Find the byte offsets of the documents of a bundle by scanning it, and write the index.
+
+    Arguments:
+        filename (`str`): The filename of the bundle
+
+    Returns:
+        `list`: The byte offsets of the records
+    """
+    offsets = []
+    position = 0
+    content_before_marker = False
+    with open(filename, 'rb') as f:
+        for line in f:
+            if line.startswith(b'---') and line[3:4] in [b'', b'\n', b'\r', b' ']:
+                offsets.append(position)
+            elif not offsets and line.strip() and not line.startswith(b'#'):
+                content_before_marker = True
+            position += len(line)
+    if content_before_marker:
+        offsets.insert(0, 0)
+    _write_index(filename, offsets)
+    return offsets
+
+
+def read_index(filename):
+    """Read the byte offsets of the documents of a bundle.
+
+    The index is rebuilt with `build_index` if it is missing or if the size of the bundle has
+    changed since it was written.
+
+    Arguments:
+        filename (`str`): The filename of the bundle
+
+    Returns:
+        `list`: The byte offsets of the records
+    """
+    try:
+        with open(index_filename(filename), 'r') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return build_index(filename)
+    if index.get('size') != os.path.getsize(filename):
+        return build_index(filename)
+    return index['offsets']
+
+
+def iter_bundle(filename, **kwargs):
+    """Iterate over the records of a bundle.
+
+    The documents are parsed one at a time as the file is read, so only one record is in memory
+    at once.
+
+    Arguments:
+        filename (`str`): The filename of the bundle
+        kwargs: Keyword arguments of `~pyked.chemked.ChemKED`, such as ``skip_validation``
+
+    Yields:
+        `~pyked.chemked.ChemKED`: Each record in the bundle
+
+    Examples:
+        >>> for chemked in iter_bundle('corpus.yaml', skip_validation=True):
+        ...     process(chemked)
+    """
+    with open(filename, 'r') as f:
+        for properties in yaml.load_all(f, Loader=yaml_loader):
+            if properties is not None:
+                yield ChemKED(dict_input=properties, **kwargs)
+
+
+class Bundle(object):
+    """Random access to the records of a bundle through its index.
+
+    Arguments:
+        filename (`str`): The filename of the bundle
+        kwargs: Keyword arguments of `~pyked.chemked.ChemKED`, such as ``skip_validation``,
+            used to load the records
+
+    Attributes:
+        offsets (`list`): The byte offsets of the records
+
+    Examples:
+        >>> bundle = Bundle('corpus.yaml')
+        >>> len(bundle)
+        >>> chemked = bundle[1234]
+    """
+    def __init__(self, filename, **kwargs):
+        self.filename = filename
+        self.offsets = read_index(filename)
+        self._kwargs = kwargs
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __iter__(self):
+        return iter_bundle(self.filename, **self._kwargs)
+
+    def __getitem__(self, number):
+        """Load one record, reading only its document from the file.
+        """
+        number = range(len(self.offsets))[number]
+        start = self.offsets[number]
+        end = self.offsets[number + 1] if number + 1 < len(self.offsets) else None
+        with open(self.filename, 'rb') as f:
+            f.seek(start)
+            document = f.read() if end is None else f.read(end - start)
+        properties = yaml.load(document.decode('utf-8'), Loader=yaml_loader)
+        return ChemKED(dict_input=properties, **self._kwargs)
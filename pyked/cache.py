@@ -0,0 +1,233 @@
+"""
+Module for caching simulation results by the content of the simulated conditions
+"""
+# Standard libraries
+import hashlib
+import json
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+key_exclude = ['key', 'dataset', 'index']
+"""`list`: Fields of `~pyked.simulation.SimulationTask` that do not affect the result"""
+
+
+def canonical(value):
+    """Convert a value to a form with a unique JSON representation, to compute keys from.
+
+    Floats are represented exactly, and arrays by the hash of their values.
+
+    Arguments:
+        value: A value made of lists, tuples, dictionaries, numbers, arrays, and strings
+
+    Returns:
+        The value, with the floats and arrays converted
+    """
+    if isinstance(value, (tuple, list)):
+        return [canonical(v) for v in value]
+    elif isinstance(value, np.ndarray):
+        array = np.ascontiguousarray(value, dtype=float)
+        return {'shape': list(array.shape),
+                'sha256': hashlib.sha256(array.tobytes()).hexdigest()}
+    elif isinstance(value, dict):
+        return {str(k): canonical(v) for k, v in value.items()}
+    elif isinstance(value, (float, np.floating)):
+        return repr(float(value))
+    elif isinstance(value, np.integer):
+        return int(value)
+    return value
+
+
+def task_key(task, settings=None):
+    """Compute the content-addressed key of a simulation task.
+
+    The key depends only on the conditions of the task, not on its position in a dataset, so
+    the same datapoint in different files or runs has the same key. Floats are represented
+    exactly and arrays such as volume histories by the hash of their values.
+
+    Arguments:
+        task (`~pyked.simulation.SimulationTask`): The task
+        settings (`dict`, optional): Settings of the solver that affect the result, such as
+            from `~pyked.simulation.Solver.cache_settings`
+
+    Returns:
+        `str`: The hexadecimal SHA-256 digest of the conditions and settings
+    """
+    conditions = {k: v for k, v in task._asdict().items() if k not in key_exclude}
+    contents = json.dumps({'task': canonical(conditions), 'settings': canonical(settings)},
+                          sort_keys=True)
+    return hashlib.sha256(contents.encode('utf-8')).hexdigest()
+
+
+class LRUCache(object):
+    """Base class of caches that evict the least recently used entries.
+
+    Values must be serializable to JSON; their size is the length of their JSON encoding.
+    Subclasses implement how the serialized values are stored.
+
+    Arguments:
+        max_entries (`int`, optional): The maximum number of entries, or `None` for no limit
+        max_bytes (`int`, optional): The maximum total size of the entries in bytes, or `None`
+            for no limit
+    """
+    def __init__(self, max_entries=None, max_bytes=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    @property
+    def size(self):
+        """`int`: The total size of the entries in bytes"""
+        return self._size
+
+    def get(self, key, default=None):
+        """Get a value from the cache, marking it as recently used.
+
+        Arguments:
+            key (`str`): The key of the value
+            default (optional): The value to return if the key is not in the cache
+
+        Returns:
+            The cached value, or ``default``
+        """
+        if key not in self._entries:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return json.loads(self._load(key))
+
+    def set(self, key, value):
+        """Add a value to the cache, evicting the least recently used values if it is full.
+
+        Arguments:
+            key (`str`): The key of the value
+            value: The JSON-serializable value
+        """
+        data = json.dumps(value)
+        self._store(key, data)
+        self._size += len(data) - self._entries.get(key, 0)
+        self._entries[key] = len(data)
+        self._entries.move_to_end(key)
+        self._evict()
+
+    def clear(self):
+        """Remove all of the entries.
+        """
+        for key in list(self._entries):
+            self._delete(key)
+        self._entries.clear()
+        self._size = 0
+
+    def _evict(self):
+        while self._entries and ((self.max_entries is not None and
+                                  len(self._entries) > self.max_entries) or
+                                 (self.max_bytes is not None and self._size > self.max_bytes)):
+            key, size = self._entries.popitem(last=False)
+            self._delete(key)
+            self._size -= size
+
+    def _load(self, key):
+        raise NotImplementedError
+
+    def _store(self, key, data):
+        raise NotImplementedError
+
+    def _delete(self, key):
+        raise NotImplementedError
+
+
+class MemoryCache(LRUCache):
+    """Cache of values in memory.
+
+    Arguments:
+        max_entries (`int`, optional): The maximum number of entries, or `None` for no limit
+        max_bytes (`int`, optional): The maximum total size of the entries in bytes, or `None`
+            for no limit
+    """
+    def __init__(self, max_entries=None, max_bytes=None):
+        super(MemoryCache, self).__init__(max_entries, max_bytes)
+        self._data = {}
+
+    def _load(self, key):
+        return self._data[key]
+
+    def _store(self, key, data):
+        self._data[key] = data
+
+    def _delete(self, key):
+        del self._data[key]
+
+
+class DiskCache(LRUCache):
+    """Cache of values in JSON files in a local directory.
+
+    Each value is stored in its own file, named by its key, and the modification time of the
+    file records when it was last used, so the order of use persists between sessions. Files
+    are written atomically, so an interrupted run does not leave corrupt entries.
+
+    Arguments:
+        directory (`str`): The directory of the cache, which is created if needed
+        max_entries (`int`, optional): The maximum number of entries, or `None` for no limit
+        max_bytes (`int`, optional): The maximum total size of the entries in bytes, or `None`
+            for no limit
+
+    Examples:
+        >>> cache = DiskCache('~/.cache/pyked', max_bytes=100*1024**2)
+        >>> results = run_tasks(tasks, solver, cache=cache)
+    """
+    def __init__(self, directory, max_entries=None, max_bytes=None):
+        super(DiskCache, self).__init__(max_entries, max_bytes)
+        self.directory = os.path.abspath(os.path.expanduser(directory))
+        os.makedirs(self.directory, exist_ok=True)
+
+        entries = []
+        for subdir in os.listdir(self.directory):
+            path = os.path.join(self.directory, subdir)
+            if not os.path.isdir(path):
+                continue
+            for name in os.listdir(path):
+                if name.endswith('.json'):
+                    stat = os.stat(os.path.join(path, name))
+                    entries.append((stat.st_mtime, name[:-len('.json')], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._entries[key] = size
+            self._size += size
+        self._evict()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + '.json')
+
+    def get(self, key, default=None):
+        value = super(DiskCache, self).get(key, default)
+        if key in self._entries:
+            os.utime(self._path(key))
+        return value
+
+    def _load(self, key):
+        with open(self._path(key), 'r') as f:
+            return f.read()
+
+    def _store(self, key, data):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = '{}.{}.tmp'.format(path, os.getpid())
+        with open(temp_path, 'w') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+    def _delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
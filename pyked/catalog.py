@@ -0,0 +1,427 @@
+"""
+Module for cataloging collections of ChemKED files in an SQLite database
+"""
+# Standard libraries
+import os
+import sqlite3
+import hashlib
+from fnmatch import fnmatch
+from collections import namedtuple
+from warnings import warn
+
+# Local imports
+from .validation import Q_
+from .chemked import ChemKED
+from .composition import normalize_composition
+
+PointHandle = namedtuple('PointHandle', ['filename', 'index'])
+PointHandle.__doc__ = 'Reference to a single datapoint of a ChemKED file in a catalog'
+PointHandle.filename.__doc__ = '(`str`) The absolute path to the ChemKED file'
+PointHandle.index.__doc__ = '(`int`) The index of the datapoint in the ``datapoints`` of the file'
+
+catalog_properties = {
+    'temperature': 'kelvin',
+    'pressure': 'pascal',
+    'ignition_delay': 'second',
+    'first_stage_ignition_delay': 'second',
+    'pressure_rise': '1.0 / second',
+    'compressed_temperature': 'kelvin',
+    'compressed_pressure': 'pascal',
+}
+"""`dict`: The numeric properties stored in the catalog, with their SI units"""
+
+_schema = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    hash TEXT NOT NULL,
+    experiment_type TEXT,
+    apparatus_kind TEXT,
+    apparatus_institution TEXT,
+    apparatus_facility TEXT,
+    doi TEXT,
+    year INTEGER
+);
+CREATE TABLE IF NOT EXISTS datapoints (
+    id INTEGER PRIMARY KEY,
+    file_id INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    point_index INTEGER NOT NULL,
+    temperature REAL,
+    pressure REAL,
+    ignition_delay REAL,
+    first_stage_ignition_delay REAL,
+    pressure_rise REAL,
+    compressed_temperature REAL,
+    compressed_pressure REAL,
+    equivalence_ratio REAL,
+    composition_kind TEXT,
+    ignition_target TEXT,
+    ignition_type TEXT
+);
+CREATE TABLE IF NOT EXISTS species (
+    datapoint_id INTEGER NOT NULL REFERENCES datapoints(id) ON DELETE CASCADE,
+    species_name TEXT NOT NULL,
+    species_key TEXT NOT NULL,
+    InChI TEXT,
+    amount REAL,
+    mole_fraction REAL
+);
+CREATE INDEX IF NOT EXISTS datapoints_file ON datapoints(file_id);
+CREATE INDEX IF NOT EXISTS datapoints_temperature ON datapoints(temperature);
+CREATE INDEX IF NOT EXISTS datapoints_pressure ON datapoints(pressure);
+CREATE INDEX IF NOT EXISTS datapoints_ignition_delay ON datapoints(ignition_delay);
+CREATE INDEX IF NOT EXISTS datapoints_equivalence_ratio ON datapoints(equivalence_ratio);
+CREATE INDEX IF NOT EXISTS species_name ON species(species_name, species_key);
+CREATE INDEX IF NOT EXISTS species_key ON species(species_key, mole_fraction, datapoint_id);
+CREATE INDEX IF NOT EXISTS species_datapoint ON species(datapoint_id);
+CREATE INDEX IF NOT EXISTS files_apparatus ON files(apparatus_kind);
+"""
+
+
+def file_hash(filename):
+    """Compute the SHA-256 hash of the contents of a file.
+
+    Arguments:
+        filename (`str`): The file to hash
+
+    Returns:
+        `str`: The hexadecimal digest of the file contents
+    """
+    sha = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def species_identity(species):
+    """Get the normalized identity of a species.
+
+    The identity is the standard InChI of the species, with the ``InChI=`` prefix, if the InChI
+    is given, so that the same species with different names in different files has the same
+    identity. Otherwise, the lowercase species name is used.
+
+    Arguments:
+        species (`~pyked.chemked.Composition` or `str`): The species, or a species name or InChI
+
+    Returns:
+        `str`: The identity of the species
+    """
+    if isinstance(species, str):
+        InChI = species if species.startswith(('InChI=', '1S/', '1/')) else None
+        name = species
+    else:
+        InChI = species.InChI
+        name = species.species_name
+
+    if InChI:
+        InChI = InChI.strip()
+        return InChI if InChI.startswith('InChI=') else 'InChI=' + InChI
+    return name.strip().lower()
+
+
+def _si_magnitude(quantity, units):
+    """Get the nominal magnitude of a quantity, possibly with uncertainty, in the given units.
+    """
+    if quantity is None:
+        return None
+    magnitude = quantity.to(units).magnitude
+    return float(getattr(magnitude, 'nominal_value', magnitude))
+
+
+def _si_bound(value, units):
+    """Convert a query bound given as a number in SI units, a string, or a Quantity to SI units.
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = Q_(value)
+    if hasattr(value, 'to'):
+        return value.to(units).magnitude
+    return float(value)
+
+
+class Catalog(object):
+    """Catalog of the datapoints in a collection of ChemKED files.
+
+    The catalog stores the SI values of the datapoint properties, the species in each
+    composition, and the metadata of each file in an SQLite database, with indexes on the numeric
+    fields. The species table is also an inverted index from the identity of each species to the
+    datapoints containing it and its mole fraction in each. Once a directory has been scanned,
+    queries are answered from the database without parsing any YAML. Files are tracked by the
+    hash of their contents, so that rescanning a directory only re-reads the files that were
+    added or changed.
+
+    Arguments:
+        filename (`str`, optional): The filename of the SQLite database. By default, the catalog
+            is kept in memory.
+
+    Examples:
+        >>> catalog = Catalog('chemked.sqlite')
+        >>> catalog.update('ChemKED-database')
+        >>> catalog.query(temperature=(900, 1200), pressure=('10 atm', '30 atm'),
+                          species=['H2', 'O2'], apparatus='shock tube')
+        [PointHandle(filename='/.../file.yaml', index=0), ...]
+    """
+    def __init__(self, filename=':memory:'):
+        self.filename = filename
+        self.connection = sqlite3.connect(filename)
+        self.connection.execute('PRAGMA foreign_keys = ON')
+        self.connection.executescript(_schema)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """Close the connection to the database.
+        """
+        self.connection.close()
+
+    def __len__(self):
+        return self.connection.execute('SELECT COUNT(*) FROM datapoints').fetchone()[0]
+
+    @property
+    def files(self):
+        """`dict`: Mapping of the absolute path of each cataloged file to the hash of its contents
+        """
+        return dict(self.connection.execute('SELECT path, hash FROM files'))
+
+    def update(self, directory, pattern='*.yaml', *, validate=False):
+        """Scan a directory tree and bring the catalog up to date with its ChemKED files.
+
+        New files and files whose contents have changed are (re-)read, and files that have been
+        removed from the directory are removed from the catalog. Files that cannot be read or
+        validated are skipped with a warning, and removed from the catalog if they were in it,
+        so they are read again by the next update.
+
+        Arguments:
+            directory (`str`): The root of the directory tree to scan
+            pattern (`str`, optional): Shell-style pattern of the filenames to include
+            validate (`bool`, optional): Whether to validate the files as they are read. Must be
+                supplied as a keyword-argument.
+
+        Returns:
+            `dict`: The lists of paths that were ``'added'``, ``'updated'``, ``'removed'``, and
+                that ``'failed'`` to be read
+        """
+        directory = os.path.abspath(directory)
+        known = {path: h for path, h in self.files.items()
+                 if path.startswith(os.path.join(directory, ''))}
+        changes = {'added': [], 'updated': [], 'removed': [], 'failed': []}
+
+        for root, _, filenames in os.walk(directory):
+            for name in sorted(filenames):
+                if not fnmatch(name, pattern):
+                    continue
+                path = os.path.join(root, name)
+                contents_hash = file_hash(path)
+                old_hash = known.pop(path, None)
+                if old_hash == contents_hash:
+                    continue
+                try:
+                    self.add_file(path, contents_hash=contents_hash, validate=validate)
+                except Exception as error:
+                    warn('{} skipped: {}'.format(path, error))
+                    if old_hash is not None:
+                        self.remove_file(path)
+                    changes['failed'].append(path)
+                    continue
+                changes['added' if old_hash is None else 'updated'].append(path)
+
+        for path in known:
+            self.remove_file(path)
+            changes['removed'].append(path)
+
+        return changes
+
+    def add_file(self, filename, *, contents_hash=None, validate=False):
+        """Add a ChemKED file to the catalog, replacing it if it is already present.
+
+        Arguments:
+            filename (`str`): The ChemKED YAML file to add
+            contents_hash (`str`, optional): The hash of the file contents, computed if not given.
+                Must be supplied as a keyword-argument.
+            validate (`bool`, optional): Whether to validate the file. Must be supplied as a
+                keyword-argument.
+        """
+        path = os.path.abspath(filename)
+        if contents_hash is None:
+            contents_hash = file_hash(path)
+        chemked = ChemKED(path, skip_validation=not validate)
+
+        with self.connection:
+            self.connection.execute('DELETE FROM files WHERE path = ?', (path,))
+            cursor = self.connection.execute(
+                'INSERT INTO files (path, hash, experiment_type, apparatus_kind, '
+                'apparatus_institution, apparatus_facility, doi, year) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (path, contents_hash, chemked.experiment_type, chemked.apparatus.kind,
+                 chemked.apparatus.institution, chemked.apparatus.facility,
+                 chemked.reference.doi, chemked.reference.year)
+            )
+            file_id = cursor.lastrowid
+
+            columns = list(catalog_properties.keys())
+            insert_point = ('INSERT INTO datapoints (file_id, point_index, {}, equivalence_ratio, '
+                            'composition_kind, ignition_target, ignition_type) '
+                            'VALUES ({})').format(', '.join(columns),
+                                                  ', '.join(['?']*(len(columns) + 6)))
+            for index, dp in enumerate(chemked.datapoints):
+                values = []
+                for prop, units in catalog_properties.items():
+                    if prop.startswith('compressed'):
+                        quantity = getattr(dp.rcm_data, prop, None)
+                    else:
+                        quantity = getattr(dp, prop)
+                    values.append(_si_magnitude(quantity, units))
+                ignition_type = dp.ignition_type or {}
+                cursor = self.connection.execute(
+                    insert_point,
+                    [file_id, index] + values + [dp.equivalence_ratio, dp.composition_type,
+                                                 ignition_type.get('target'),
+                                                 ignition_type.get('type')]
+                )
+                try:
+                    mole_fractions = normalize_composition([dp])[1][0]
+                except ValueError:
+                    mole_fractions = [None]*len(dp.composition)
+                self.connection.executemany(
+                    'INSERT INTO species (datapoint_id, species_name, species_key, InChI, amount, '
+                    'mole_fraction) VALUES (?, ?, ?, ?, ?, ?)',
+                    [(cursor.lastrowid, s.species_name, species_identity(s), s.InChI,
+                      _si_magnitude(s.amount, 'dimensionless'), x)
+                     for s, x in zip(dp.composition.values(), mole_fractions)]
+                )
+
+    def remove_file(self, filename):
+        """Remove a ChemKED file and its datapoints from the catalog.
+
+        Arguments:
+            filename (`str`): The ChemKED YAML file to remove
+        """
+        with self.connection:
+            self.connection.execute('DELETE FROM files WHERE path = ?',
+                                    (os.path.abspath(filename),))
+
+    def query(self, *, species=None, apparatus=None, experiment_type=None, ignition_target=None,
+              ignition_type=None, doi=None, equivalence_ratio=None, **ranges):
+        """Find the datapoints matching the given conditions.
+
+        Ranges are given as ``(low, high)`` tuples, where either limit may be `None` to leave
+        that side open. The limits may be numbers in the SI units of `catalog_properties`,
+        strings with units such as ``'10 atm'``, or `~pint.Quantity` instances. All of the
+        arguments must be supplied as keyword-arguments.
+
+        Species are matched by their identity (see `species_identity`), so that querying for a
+        species by name also finds datapoints where the same species, with the same InChI, has a
+        different name.
+
+        Arguments:
+            species (`list` or `dict`, optional): Names or InChIs of species that must all be in
+                the composition. If a `dict` is given, the values are `None` or ranges of the
+                mole fraction of each species.
+            apparatus (`str`, optional): The kind of apparatus
+            experiment_type (`str`, optional): The type of experiment
+            ignition_target (`str`, optional): The target of the ignition delay definition
+            ignition_type (`str`, optional): The type of the ignition delay definition
+            doi (`str`, optional): The DOI of the reference
+            equivalence_ratio (`tuple`, optional): Range of the equivalence ratio
+            ranges: Ranges of any of the properties in `catalog_properties`
+
+        Returns:
+            `list`: List of `PointHandle` for the matching datapoints, ordered by file and index
+
+        Raises:
+            `ValueError`: If a range is given for an unknown property
+        """
+        conditions = []
+        parameters = []
+        unknown = [r for r in ranges if r not in catalog_properties]
+        if unknown:
+            raise ValueError('Unknown properties to query: {}'.format(', '.join(unknown)))
+
+        bounds = [(prop, units, ranges[prop]) for prop, units in catalog_properties.items()
+                  if ranges.get(prop) is not None]
+        if equivalence_ratio is not None:
+            bounds.append(('equivalence_ratio', 'dimensionless', equivalence_ratio))
+        for prop, units, (low, high) in bounds:
+            low, high = _si_bound(low, units), _si_bound(high, units)
+            if low is not None:
+                conditions.append('d.{} >= ?'.format(prop))
+                parameters.append(low)
+            if high is not None:
+                conditions.append('d.{} <= ?'.format(prop))
+                parameters.append(high)
+
+        for column, value in [('f.apparatus_kind', apparatus), ('f.experiment_type',
+                              experiment_type), ('d.ignition_target', ignition_target),
+                              ('d.ignition_type', ignition_type), ('f.doi', doi)]:
+            if value is not None:
+                conditions.append('{} = ?'.format(column))
+                parameters.append(value)
+
+        if species is not None and not isinstance(species, dict):
+            species = dict.fromkeys(species)
+        for identifier, amount_range in (species or {}).items():
+            condition = ('d.id IN (SELECT s.datapoint_id FROM species s WHERE (s.species_key = ? '
+                         'OR s.species_key IN (SELECT species_key FROM species '
+                         'WHERE species_name = ?))')
+            parameters.extend([species_identity(identifier), identifier])
+            low, high = amount_range or (None, None)
+            if low is not None:
+                condition += ' AND s.mole_fraction >= ?'
+                parameters.append(_si_bound(low, 'dimensionless'))
+            if high is not None:
+                condition += ' AND s.mole_fraction <= ?'
+                parameters.append(_si_bound(high, 'dimensionless'))
+            conditions.append(condition + ')')
+
+        sql = ('SELECT f.path, d.point_index FROM datapoints d JOIN files f ON d.file_id = f.id'
+               '{} ORDER BY f.path, d.point_index').format(
+                   ' WHERE ' + ' AND '.join(conditions) if conditions else '')
+        return [PointHandle(*row) for row in self.connection.execute(sql, parameters)]
+
+    def species(self):
+        """Summarize the species in the catalog.
+
+        Returns:
+            `dict`: Mapping of the identity of each species to a `dict` with the ``names`` used
+                for the species, the number of ``datapoints`` containing it, and the range of its
+                ``mole_fraction``
+        """
+        summary = {}
+        rows = self.connection.execute(
+            'SELECT species_key, COUNT(DISTINCT datapoint_id), MIN(mole_fraction), '
+            'MAX(mole_fraction) FROM species GROUP BY species_key'
+        )
+        for key, count, low, high in rows:
+            summary[key] = {'names': [], 'datapoints': count, 'mole_fraction': (low, high)}
+        rows = self.connection.execute('SELECT DISTINCT species_key, species_name FROM species '
+                                       'ORDER BY species_name')
+        for key, name in rows:
+            summary[key]['names'].append(name)
+        return summary
+
+    def load(self, handles, *, validate=False):
+        """Load the `~pyked.chemked.DataPoint` instances referred to by some handles.
+
+        Each file is only read once, no matter how many of its datapoints are requested.
+
+        Arguments:
+            handles (`list`): List of `PointHandle`
+            validate (`bool`, optional): Whether to validate the files. Must be supplied as a
+                keyword-argument.
+
+        Returns:
+            `list`: The `~pyked.chemked.DataPoint` instances, in the order of ``handles``
+        """
+        datasets = {}
+        datapoints = []
+        for handle in handles:
+            if handle.filename not in datasets:
+                datasets[handle.filename] = ChemKED(handle.filename, skip_validation=not validate)
+            datapoints.append(datasets[handle.filename].datapoints[handle.index])
+        return datapoints
@@ -2,7 +2,8 @@
 Main ChemKED module
 """
 # Standard libraries
-from os.path import exists
+import asyncio
+from os.path import exists, isabs, join, dirname, abspath, basename, splitext
 from collections import namedtuple
 from warnings import warn
 from copy import deepcopy
@@ -13,8 +14,10 @@ from itertools import chain
 import numpy as np
 
 # Local imports
-from .validation import schema, OurValidator, yaml, Q_
+from .validation import (schema, OurValidator, validate_cached, yaml, yaml_loader, units, Q_,
+                         property_units)
 from .converters import datagroup_properties, ReSpecTh_to_ChemKED
+from .uncertainty import convert_units, convert_std
 
 VolumeHistory = namedtuple('VolumeHistory', ['time', 'volume'])
 VolumeHistory.__doc__ = 'Time history of the volume in an RCM experiment. Deprecated, to be removed after PyKED 0.4'  # noqa: E501
@@ -69,13 +72,17 @@ Apparatus.kind.__doc__ = '(`str`) The kind of experimental apparatus'
 Apparatus.institution.__doc__ = '(`str`) The institution where the experiment is located'
 Apparatus.facility.__doc__ = '(`str`) The particular experimental facility at the location'
 
-Composition = namedtuple('Composition', 'species_name InChI SMILES atomic_composition amount')
+Composition = namedtuple('Composition',
+                         'species_name InChI SMILES atomic_composition amount thermo')
+Composition.__new__.__defaults__ = (None,)
 Composition.__doc__ = 'Detail of the initial composition of the mixture for the experiment'
 Composition.species_name.__doc__ = '(`str`) The name of the species'
 Composition.InChI.__doc__ = '(`str`) The InChI identifier for the species'
 Composition.SMILES.__doc__ = '(`str`) The SMILES identifier for the species'
 Composition.atomic_composition.__doc__ = '(`dict`) The atomic composition of the species'
 Composition.amount.__doc__ = '(`~pint.Quantity`) The amount of this species'
+Composition.thermo.__doc__ = """\
+(`dict`) The NASA 7-coefficient polynomial thermodynamic data for this species, if given"""
 
 
 class ChemKED(object):
@@ -91,6 +98,19 @@ class ChemKED(object):
             format.
         skip_validation (`bool`, optional): Whether validation of the ChemKED should be done. Must
             be supplied as a keyword-argument.
+        compact (`bool`, optional): Whether to store the datapoints as `CompactDataPoint`
+            instances, which use less memory for large datasets. Must be supplied as a
+            keyword-argument.
+        si_units (`bool`, optional): Whether to convert all of the quantities and time histories
+            of the datapoints to the SI units in `~pyked.validation.property_units` when loading,
+            so that later conversions to those units are free. Must be supplied as a
+            keyword-argument.
+        validation_cache (optional): Cache of the sections of files that were valid, such as a
+            `~pyked.cache.DiskCache`, so that only the sections that changed since a previous
+            validation are validated, as in `~pyked.validation.validate_cached`. Must be
+            supplied as a keyword-argument.
+        validation_profile (`~pyked.validation.ValidationProfile`, optional): Profile in which
+            the time spent by the validation is recorded. Must be supplied as a keyword-argument.
 
     Attributes:
         datapoints (`list`): List of `DataPoint` objects storing each datapoint in the database.
@@ -104,24 +124,34 @@ class ChemKED(object):
         experiment_type (`str`): Type of exeperimental data contained in this database.
         file_author (`dict`): Information about the author of the ChemKED database file.
         file_version (`str`): Version of the ChemKED database file.
+        original_units (`list`): For each datapoint, a dictionary of the attribute names of the
+            converted quantities, such as ``pressure`` or ``rcm_data.compression_time``, to their
+            units in the file, with a tuple of the time and quantity units for histories. `None`
+            unless ``si_units`` is `True`. The file written by `write_file` keeps the original
+            units.
         _properties (`dict`): Original dictionary read from ChemKED database file, meant for
             internal use.
     """
-    def __init__(self, yaml_file=None, dict_input=None, *, skip_validation=False):
-        if yaml_file is not None:
-            with open(yaml_file, 'r') as f:
-                self._properties = yaml.safe_load(f)
-        elif dict_input is not None:
-            self._properties = dict_input
-        else:
-            raise NameError("ChemKED needs either a YAML filename or dictionary as input.")
-
+    def __init__(self, yaml_file=None, dict_input=None, *, skip_validation=False, compact=False,
+                 si_units=False, validation_cache=None, validation_profile=None):
+        self._properties = _load_properties(yaml_file, dict_input)
         if not skip_validation:
-            self.validate_yaml(self._properties)
+            self.validate_yaml(self._properties, cache=validation_cache,
+                               profile=validation_profile)
+        self._build(yaml_file, compact=compact, si_units=si_units)
 
+    def _build(self, yaml_file, *, compact=False, si_units=False):
+        """Set the datapoints and attributes from the properties.
+        """
+        point_class = CompactDataPoint if compact else DataPoint
+        directory = None if yaml_file is None else dirname(abspath(yaml_file))
         self.datapoints = []
         for point in self._properties['datapoints']:
-            self.datapoints.append(DataPoint(point))
+            self.datapoints.append(point_class(_resolve_history_files(point, directory)))
+
+        self.original_units = None
+        if si_units:
+            self._convert_to_si()
 
         self.reference = Reference(
             volume=self._properties['reference'].get('volume'),
@@ -142,6 +172,64 @@ class ChemKED(object):
         for prop in ['chemked-version', 'experiment-type', 'file-authors', 'file-version']:
             setattr(self, prop.replace('-', '_'), self._properties[prop])
 
+    def __reduce__(self):
+        attributes = {k: v for k, v in self.__dict__.items()
+                      if k not in ['_properties', 'datapoints']}
+        return (_unpickle_chemked, ({
+            'attributes': attributes,
+            'properties': _history_values_state(self._properties),
+            'datapoints': _datapoints_state(self.datapoints),
+        },))
+
+    def _convert_to_si(self):
+        """Convert the quantities and histories of the datapoints to SI units.
+
+        Each field is converted for all of the datapoints at once, with one pint conversion per
+        distinct units of the field.
+        """
+        self.original_units = [{} for dp in self.datapoints]
+
+        for prop in DataPoint.value_unit_props:
+            attribute = prop.replace('-', '_')
+            quantities = [getattr(dp, attribute) for dp in self.datapoints]
+            converted = _quantities_to_units(quantities, property_units[prop])
+            for dp, original, quantity, quantity_si in zip(self.datapoints, self.original_units,
+                                                           quantities, converted):
+                if quantity is not None:
+                    original[attribute] = str(quantity.units)
+                    setattr(dp, attribute, quantity_si)
+
+        rcm_points = [(dp, original) for dp, original in zip(self.datapoints, self.original_units)
+                      if dp.rcm_data is not None]
+        rcm_data = [dp.rcm_data._asdict() for dp, original in rcm_points]
+        for prop in DataPoint.rcm_data_props:
+            attribute = prop.replace('-', '_')
+            quantities = [data[attribute] for data in rcm_data]
+            converted = _quantities_to_units(quantities, property_units[prop])
+            for (dp, original), data, quantity, quantity_si in zip(rcm_points, rcm_data,
+                                                                   quantities, converted):
+                if quantity is not None:
+                    original['rcm_data.' + attribute] = str(quantity.units)
+                    data[attribute] = quantity_si
+        for (dp, original), data in zip(rcm_points, rcm_data):
+            dp.rcm_data = RCMData(**data)
+
+        for h in DataPoint.history_types:
+            name = '{}_history'.format(h)
+            points = [(dp, original, getattr(dp, name))
+                      for dp, original in zip(self.datapoints, self.original_units)]
+            points = [(dp, original, history) for dp, original, history in points
+                      if history is not None]
+            if not points:
+                continue
+            times = _quantities_to_units([p[2][0] for p in points], property_units['time'])
+            values = _quantities_to_units([p[2][1] for p in points],
+                                          property_units[history_units[h]])
+            for (dp, original, history), time, value in zip(points, times, values):
+                original[name] = (str(history[0].units), str(history[1].units))
+                setattr(dp, name, history._replace(**{history._fields[0]: time,
+                                                      history._fields[1]: value}))
+
     @classmethod
     def from_respecth(cls, filename_xml, file_author='', file_author_orcid=''):
         """Construct a ChemKED instance directly from a ReSpecTh file.
@@ -166,24 +254,123 @@ class ChemKED(object):
                                          validate=False)
         return cls(dict_input=properties)
 
-    def validate_yaml(self, properties):
+    def validate_yaml(self, properties, *, lookups=None, cache=None, profile=None):
         """Validate the parsed YAML file for adherance to the ChemKED format.
 
         Arguments:
             properties (`dict`): Dictionary created from the parsed YAML file
+            lookups (`dict`, optional): Results of DOI and ORCID lookups that were already done,
+                such as by `~pyked.aio.AsyncLookup.lookups`, which are used instead of looking
+                them up again. Must be supplied as a keyword-argument.
+            cache (optional): Cache of the sections of files that were valid, which are not
+                validated again, as in `~pyked.validation.validate_cached`. Must be supplied as
+                a keyword-argument.
+            profile (`~pyked.validation.ValidationProfile`, optional): Profile in which the
+                time spent by each rule and on each top-level field is recorded. Must be supplied
+                as a keyword-argument.
 
         Raises:
             `ValueError`: If the YAML file cannot be validated, a `ValueError` is raised whose
                 string contains the errors that are present.
         """
-        validator = OurValidator(schema)
-        if not validator.validate(properties):
-            for key, value in validator.errors.items():
+        if cache is not None:
+            errors = validate_cached(properties, cache, lookups=lookups, profile=profile)
+        else:
+            validator = OurValidator(schema, lookups=lookups, profile=profile)
+            errors = {} if validator.validate(properties) else validator.errors
+        if errors:
+            for key, value in errors.items():
                 if any(['unallowed value' in v for v in value]):
                     print(('{key} has an illegal value. Allowed values are {values} and are case '
                            'sensitive.').format(key=key, values=schema[key]['allowed']))
 
-            raise ValueError(validator.errors)
+            raise ValueError(errors)
+
+    @classmethod
+    async def avalidate(cls, yaml_file=None, dict_input=None, *, lookup=None,
+                        validation_cache=None, validation_profile=None, **kwargs):
+        """Validate a ChemKED file on an event loop and construct a `ChemKED` from it.
+
+        The DOI and ORCID lookups of the file are done concurrently without blocking the event
+        loop, and then the file is validated without any other network access.
+
+        Arguments:
+            yaml_file (`str`, optional): The filename of the YAML database in ChemKED format.
+            dict_input (`dict`, optional): A dictionary with the parsed ouput of YAML file in
+                ChemKED format.
+            lookup (`~pyked.aio.AsyncLookup`, optional): The lookup client to use, which limits
+                the rate of the requests and caches their results. Defaults to a new client that
+                is closed afterwards. Must be supplied as a keyword-argument.
+            validation_cache (optional): Cache of the sections of files that were valid, as in
+                `ChemKED`. The lookups are still done before the validation. Must be supplied as
+                a keyword-argument.
+            validation_profile (`~pyked.validation.ValidationProfile`, optional): Profile in
+                which the time spent by the validation is recorded, as in `ChemKED`. Must be
+                supplied as a keyword-argument.
+            kwargs: Other keyword arguments of `ChemKED`, such as ``compact``
+
+        Returns:
+            `ChemKED`: The validated instance
+
+        Raises:
+            `ValueError`: If the file cannot be validated
+
+        Examples:
+            >>> chemked = await ChemKED.avalidate('testfile_st.yaml')
+        """
+        from .aio import AsyncLookup
+
+        if lookup is None:
+            async with AsyncLookup() as lookup:
+                return await cls.avalidate(yaml_file, dict_input, lookup=lookup,
+                                           validation_cache=validation_cache,
+                                           validation_profile=validation_profile, **kwargs)
+
+        chemked = cls.__new__(cls)
+        chemked._properties = _load_properties(yaml_file, dict_input)
+        lookups = await lookup.lookups(chemked._properties)
+        chemked.validate_yaml(chemked._properties, lookups=lookups, cache=validation_cache,
+                              profile=validation_profile)
+        chemked._build(yaml_file, **kwargs)
+        return chemked
+
+    @classmethod
+    async def avalidate_many(cls, inputs, *, lookup=None, return_exceptions=False, **kwargs):
+        """Validate many ChemKED files concurrently with `avalidate`.
+
+        All of the files share one lookup client, so the rate limit applies to all of their
+        requests together, and a DOI or ORCID used by several files is only looked up once.
+
+        Arguments:
+            inputs (`list`): Filenames of YAML files, or dictionaries with the parsed YAML files
+            lookup (`~pyked.aio.AsyncLookup`, optional): The lookup client to use. Must be
+                supplied as a keyword-argument.
+            return_exceptions (`bool`, optional): Whether to return the exceptions of the files
+                that could not be validated in place of their instances, rather than raising
+                the first one. Must be supplied as a keyword-argument.
+            kwargs: Other keyword arguments of `avalidate`, such as ``compact`` or
+                ``validation_cache``
+
+        Returns:
+            `list`: The `ChemKED` instance, or the exception, for each input
+
+        Examples:
+            >>> results = await ChemKED.avalidate_many(yaml_files, return_exceptions=True)
+        """
+        from .aio import AsyncLookup
+
+        if lookup is None:
+            async with AsyncLookup() as lookup:
+                return await cls.avalidate_many(inputs, lookup=lookup,
+                                                return_exceptions=return_exceptions, **kwargs)
+
+        def validate(value):
+            if isinstance(value, dict):
+                return cls.avalidate(dict_input=value, lookup=lookup, **kwargs)
+            return cls.avalidate(value, lookup=lookup, **kwargs)
+
+        return await asyncio.gather(*[validate(value) for value in inputs],
+                                    return_exceptions=return_exceptions)
 
     def get_dataframe(self, output_columns=None):
         """Get a Pandas DataFrame of the datapoints in this instance.
@@ -243,6 +430,7 @@ class ChemKED(object):
                         if not (a.startswith('__') or a.startswith('_'))
                         ]
         valid_labels.remove('datapoints')
+        valid_labels.remove('original units')
         valid_labels.extend(
             ['composition', 'ignition delay', 'temperature', 'pressure', 'equivalence ratio']
         )
@@ -303,13 +491,31 @@ class ChemKED(object):
         columns = pd.Index(col_labels)
         return pd.DataFrame(data=data, columns=columns)
 
-    def write_file(self, filename, *, overwrite=False):
+    def write_file(self, filename, *, overwrite=False, compact=False, float_format=None,
+                   sidecar_threshold=None, sidecar_format='csv'):
         """Write new ChemKED YAML file based on object.
 
+        By default, each row of the values of a time history is written as a block-style list.
+        With ``compact``, the values are written in flow style, with one row per line, and
+        histories with more rows than ``sidecar_threshold`` are written to separate files next
+        to the YAML file, which are referred to by the ``filename`` form of ``values``.
+
         Arguments:
             filename (`str`): Filename for target YAML file
             overwrite (`bool`, optional): Whether to overwrite file with given name if present.
                 Must be supplied as a keyword-argument.
+            compact (`bool`, optional): Whether to write the values of time histories in flow
+                style. Must be supplied as a keyword-argument.
+            float_format (`str`, optional): Format specification of the values of time
+                histories written in flow style or to CSV files, such as ``'.6e'``. Defaults to
+                the shortest representation that reads back to the same value. Must be
+                supplied as a keyword-argument.
+            sidecar_threshold (`int`, optional): The number of rows above which the values of
+                a time history are written to a separate file. Defaults to writing all of the
+                values in the YAML file. Must be supplied as a keyword-argument.
+            sidecar_format (`str`, optional): The format of the separate files, either ``'csv'``
+                or ``'npy'``, which keeps the exact values. Must be supplied as a
+                keyword-argument.
 
         Raises:
             `NameError`: If ``filename`` is already present, and ``overwrite`` is not ``True``.
@@ -317,6 +523,7 @@ class ChemKED(object):
         Example:
             >>> dataset = ChemKED(yaml_file)
             >>> dataset.write_file(new_yaml_file)
+            >>> dataset.write_file(new_yaml_file, compact=True, sidecar_threshold=1000)
         """
         # Ensure file isn't already present
         if exists(filename) and not overwrite:
@@ -324,8 +531,49 @@ class ChemKED(object):
                           'to overwrite, or rename.'
                           )
 
+        if not compact and sidecar_threshold is None:
+            with open(filename, 'w') as yaml_file:
+                yaml.dump(_history_values_lists(self._properties), yaml_file)
+            return
+
+        if sidecar_format not in ['csv', 'npy']:
+            raise ValueError('sidecar_format must be one of "csv" or "npy"')
+        properties = _history_values_lists(self._properties)
+        datapoints = properties['datapoints']
+        properties['datapoints'] = []
+        stem = splitext(basename(filename))[0]
+        for index, point in enumerate(datapoints):
+            point = dict(point)
+            if 'time-histories' in point:
+                histories = []
+                for hist in point['time-histories']:
+                    hist = dict(hist)
+                    values = hist['values']
+                    if isinstance(values, dict):
+                        pass
+                    elif sidecar_threshold is not None and len(values) > sidecar_threshold:
+                        name = '{}.{}.{}.{}'.format(stem, index, hist['type'].replace(' ', '_'),
+                                                    sidecar_format)
+                        path = join(dirname(abspath(filename)), name)
+                        if sidecar_format == 'npy':
+                            np.save(path, np.asarray(values, dtype=float))
+                        else:
+                            fmt = '%.17g' if float_format is None else '%' + float_format
+                            np.savetxt(path, np.asarray(values, dtype=float), fmt=fmt,
+                                       delimiter=',')
+                        hist['values'] = {'filename': name}
+                    elif compact:
+                        hist['values'] = _flow_values(values, float_format)
+                    histories.append(hist)
+                point['time-histories'] = histories
+            if compact and 'volume-history' in point:
+                point['volume-history'] = dict(point['volume-history'])
+                point['volume-history']['values'] = _flow_values(
+                    point['volume-history']['values'], float_format)
+            properties['datapoints'].append(point)
+
         with open(filename, 'w') as yaml_file:
-            yaml.dump(self._properties, yaml_file)
+            yaml.dump(properties, yaml_file, Dumper=_CompactDumper)
 
     def convert_to_ReSpecTh(self, filename):
         """Convert ChemKED record to ReSpecTh XML file.
@@ -631,6 +879,9 @@ class DataPoint(object):
         'compression-ratio'
     ]
 
+    history_types = ['volume', 'temperature', 'pressure', 'piston_position', 'light_emission',
+                     'OH_emission', 'absorption']
+
     def __init__(self, properties):
         for prop in self.value_unit_props:
             if prop in properties:
@@ -660,41 +911,71 @@ class DataPoint(object):
             InChI = species.get('InChI')
             SMILES = species.get('SMILES')
             atomic_composition = species.get('atomic-composition')
+            thermo = species.get('thermo')
             composition[species_name] = Composition(
                 species_name=species_name, InChI=InChI, SMILES=SMILES,
-                atomic_composition=atomic_composition, amount=amount)
+                atomic_composition=atomic_composition, amount=amount, thermo=thermo)
 
         setattr(self, 'composition', composition)
 
         self.equivalence_ratio = properties.get('equivalence-ratio')
         self.ignition_type = deepcopy(properties.get('ignition-type'))
 
+        for name, history in self._parse_histories(properties).items():
+            setattr(self, name, history)
+
+        for h in self.history_types:
+            if not hasattr(self, '{}_history'.format(h)):
+                setattr(self, '{}_history'.format(h), None)
+
+    def __reduce__(self):
+        return (_unpickle_datapoint, (_datapoints_state([self]),))
+
+    @staticmethod
+    def _parse_histories(properties):
+        """Parse the time histories of a datapoint.
+
+        Returns:
+            `dict`: Mapping of attribute names like ``pressure_history`` to the histories that
+                are present in ``properties``
+        """
         if 'time-histories' in properties and 'volume-history' in properties:
             raise TypeError('time-histories and volume-history are mutually exclusive')
 
+        histories = {}
         if 'time-histories' in properties:
             for hist in properties['time-histories']:
-                if hasattr(self, '{}_history'.format(hist['type'].replace(' ', '_'))):
+                name = '{}_history'.format(hist['type'].replace(' ', '_'))
+                if name in histories:
                     raise ValueError('Each history type may only be specified once. {} was '
                                      'specified multiple times'.format(hist['type']))
                 time_col = hist['time']['column']
                 time_units = hist['time']['units']
                 quant_col = hist['quantity']['column']
                 quant_units = hist['quantity']['units']
-                if isinstance(hist['values'], list):
-                    values = np.array(hist['values'])
+                if isinstance(hist['values'], (list, np.ndarray)):
+                    values = np.asarray(hist['values'])
+                elif hist['values']['filename'].endswith('.npy'):
+                    values = np.load(hist['values']['filename'])
                 else:
                     # Load the values from a file
                     values = np.genfromtxt(hist['values']['filename'], delimiter=',')
-
-                time_history = TimeHistory(
+                if isinstance(hist['values'], dict):
+                    # The validator only checks the columns of values given in the YAML file
+                    n_cols = np.atleast_2d(values).shape[1]
+                    max_cols = max(time_col, quant_col,
+                                   hist.get('uncertainty', {}).get('column', 0)) + 1
+                    if n_cols != max_cols:
+                        raise ValueError('{} has {} columns, but {} are expected for the {} '
+                                         'history'.format(hist['values']['filename'], n_cols,
+                                                          max_cols, hist['type']))
+
+                histories[name] = TimeHistory(
                     time=Q_(values[:, time_col], time_units),
                     quantity=Q_(values[:, quant_col], quant_units),
                     type=hist['type'],
                 )
 
-                setattr(self, '{}_history'.format(hist['type'].replace(' ', '_')), time_history)
-
         if 'volume-history' in properties:
             warn('The volume-history field should be replaced by time-histories. '
                  'volume-history will be removed after PyKED 0.4',
@@ -704,16 +985,12 @@ class DataPoint(object):
             volume_col = properties['volume-history']['volume']['column']
             volume_units = properties['volume-history']['volume']['units']
             values = np.array(properties['volume-history']['values'])
-            self.volume_history = VolumeHistory(
+            histories['volume_history'] = VolumeHistory(
                 time=Q_(values[:, time_col], time_units),
                 volume=Q_(values[:, volume_col], volume_units),
             )
 
-        history_types = ['volume', 'temperature', 'pressure', 'piston_position', 'light_emission',
-                         'OH_emission', 'absorption']
-        for h in history_types:
-            if not hasattr(self, '{}_history'.format(h)):
-                setattr(self, '{}_history'.format(h), None)
+        return histories
 
     def process_quantity(self, properties):
         """Process the uncertainty information from a given quantity and return it
@@ -883,3 +1160,472 @@ class DataPoint(object):
                              )
         else:
             return self.get_cantera_composition_string(species_conversion)
+
+
+class _FlowList(list):
+    """List that is written to YAML in flow style.
+    """
+
+
+class _FormattedFloat(str):
+    """Float that is written to YAML as the given text.
+    """
+
+
+class _CompactDumper(getattr(yaml, 'CSafeDumper', yaml.SafeDumper)):
+    """YAML dumper that writes `_FlowList` instances in flow style.
+    """
+
+
+_CompactDumper.add_representer(
+    _FlowList, lambda dumper, data: dumper.represent_sequence('tag:yaml.org,2002:seq', data,
+                                                              flow_style=True))
+_CompactDumper.add_representer(
+    _FormattedFloat, lambda dumper, data: dumper.represent_scalar('tag:yaml.org,2002:float',
+                                                                  str(data)))
+
+
+def _format_float(value, float_format):
+    """Format a float so that YAML reads it back as a float.
+
+    YAML 1.1 only resolves numbers with a decimal point as floats, so one is added if the
+    format leaves it out, as in ``1e-05``.
+    """
+    if np.isnan(value):
+        return _FormattedFloat('.nan')
+    elif np.isinf(value):
+        return _FormattedFloat('.inf' if value > 0 else '-.inf')
+    text = format(value, float_format)
+    if '.' not in text:
+        mantissa, e, exponent = text.partition('e')
+        text = '{}.0{}{}'.format(mantissa, e, exponent)
+    return _FormattedFloat(text)
+
+
+def _flow_values(values, float_format=None):
+    """Convert the values of a history to rows that are written in flow style, one per line.
+    """
+    if float_format is None:
+        return [_FlowList(row) for row in values]
+    return [_FlowList(_format_float(v, float_format) for v in row) for row in values]
+
+
+def _load_properties(yaml_file=None, dict_input=None):
+    """Get the properties of a ChemKED file from either its filename or the parsed dictionary.
+    """
+    if yaml_file is not None:
+        with open(yaml_file, 'r') as f:
+            return yaml.load(f, Loader=yaml_loader)
+    elif dict_input is not None:
+        return dict_input
+    else:
+        raise NameError("ChemKED needs either a YAML filename or dictionary as input.")
+
+
+def _resolve_history_files(properties, directory):
+    """Resolve the files of the time history values of a datapoint relative to a directory.
+
+    Relative filenames are taken to be relative to the directory of the YAML file if the file
+    is there, and to the working directory otherwise. The properties are returned unchanged if
+    no filename needs to be resolved, and otherwise are copied.
+    """
+    if directory is None or 'time-histories' not in properties:
+        return properties
+
+    histories = []
+    for hist in properties['time-histories']:
+        values = hist['values']
+        if isinstance(values, dict) and not isabs(values['filename']):
+            path = join(directory, values['filename'])
+            if exists(path):
+                hist = dict(hist, values=dict(values, filename=path))
+        histories.append(hist)
+    return dict(properties, **{'time-histories': histories})
+
+
+history_units = {
+    'volume': 'volume',
+    'temperature': 'temperature',
+    'pressure': 'pressure',
+    'piston_position': 'piston position',
+    'light_emission': 'emission',
+    'OH_emission': 'emission',
+    'absorption': 'absorption',
+}
+"""`dict`: Key in `~pyked.validation.property_units` of the quantity of each history type"""
+
+
+def _quantities_to_units(quantities, to_units):
+    """Convert a list of quantities, which may be arrays or have uncertainties, to the same units.
+
+    The quantities are grouped by their units and each group is converted at once. Quantities
+    that are `None` stay `None`.
+    """
+    groups = {}
+    for position, quantity in enumerate(quantities):
+        if quantity is not None:
+            groups.setdefault(str(quantity.units), []).append(position)
+
+    converted = [None]*len(quantities)
+    for from_units, positions in groups.items():
+        magnitudes = [quantities[i].magnitude for i in positions]
+        if isinstance(magnitudes[0], np.ndarray):
+            lengths = np.cumsum([len(m) for m in magnitudes])[:-1]
+            values = np.split(convert_units(np.concatenate(magnitudes), from_units, to_units),
+                              lengths)
+            for i, value in zip(positions, values):
+                converted[i] = Q_(value, to_units)
+            continue
+
+        nominal = np.array([getattr(m, 'nominal_value', m) for m in magnitudes], dtype=float)
+        std = np.array([getattr(m, 'std_dev', 0.0) for m in magnitudes], dtype=float)
+        values = convert_units(nominal, from_units, to_units)
+        stds = convert_std(nominal, std, from_units, to_units)
+        for i, magnitude, value, std_dev in zip(positions, magnitudes, values, stds):
+            quantity = Q_(float(value), to_units)
+            if hasattr(magnitude, 'std_dev'):
+                quantity = quantity.plus_minus(float(std_dev))
+            converted[i] = quantity
+    return converted
+
+
+_shared_units = {}
+
+
+def _compact_quantity(quantity):
+    """Split a quantity into its magnitude, standard deviation, and units shared between values.
+
+    The standard deviation is `None` if the quantity does not have an uncertainty.
+    """
+    if quantity is None:
+        return None
+    magnitude = quantity.magnitude
+    units = _shared_units.setdefault(str(quantity.units), quantity.units)
+    std_dev = getattr(magnitude, 'std_dev', None)
+    return (getattr(magnitude, 'nominal_value', magnitude), std_dev, units)
+
+
+def _expand_quantity(compact):
+    """Rebuild the quantity from the output of `_compact_quantity`.
+    """
+    if compact is None:
+        return None
+    magnitude, std_dev, units = compact
+    quantity = Q_(magnitude, units)
+    if std_dev is not None:
+        quantity = quantity.plus_minus(std_dev)
+    return quantity
+
+
+class CompactDataPoint(object):
+    """Memory-efficient variant of `DataPoint`.
+
+    The attributes are the same as those of `DataPoint`, but each value is stored as a float
+    magnitude and standard deviation with units that are shared between datapoints, and the
+    `~pint.Quantity`, `Composition`, and `RCMData` instances are built when they are accessed.
+    Only the histories that are present are stored. The class uses ``__slots__``, so instances
+    do not have a ``__dict__``.
+
+    Arguments:
+        properties (`dict`): Dictionary adhering to the ChemKED format for ``datapoints``
+    """
+    value_unit_props = DataPoint.value_unit_props
+    rcm_data_props = DataPoint.rcm_data_props
+    history_types = DataPoint.history_types
+
+    __slots__ = ['_values', '_rcm_data', '_species', '_histories', 'composition_type',
+                 'equivalence_ratio', 'ignition_type']
+
+    process_quantity = DataPoint.process_quantity
+    get_cantera_composition_string = DataPoint.get_cantera_composition_string
+    get_cantera_mole_fraction = DataPoint.get_cantera_mole_fraction
+    get_cantera_mass_fraction = DataPoint.get_cantera_mass_fraction
+
+    def __init__(self, properties):
+        self._values = [_compact_quantity(self.process_quantity(properties[prop]))
+                        if prop in properties else None for prop in self.value_unit_props]
+
+        if 'rcm-data' in properties:
+            orig_rcm_data = properties['rcm-data']
+            self._rcm_data = tuple(_compact_quantity(self.process_quantity(orig_rcm_data[prop]))
+                                   if prop in orig_rcm_data else None
+                                   for prop in self.rcm_data_props)
+        else:
+            self._rcm_data = None
+
+        self.composition_type = properties['composition']['kind']
+        self._species = tuple(
+            (species['species-name'], species.get('InChI'), species.get('SMILES'),
+             species.get('atomic-composition'), species.get('thermo'),
+             _compact_quantity(self.process_quantity(species['amount'])))
+            for species in properties['composition']['species']
+        )
+
+        self.equivalence_ratio = properties.get('equivalence-ratio')
+        self.ignition_type = deepcopy(properties.get('ignition-type'))
+        self._histories = DataPoint._parse_histories(properties) or None
+
+    __reduce__ = DataPoint.__reduce__
+
+    @property
+    def composition(self):
+        """`dict`: Mapping of species names to `Composition` instances"""
+        return {name: Composition(species_name=name, InChI=InChI, SMILES=SMILES,
+                                  atomic_composition=atomic_composition,
+                                  amount=_expand_quantity(amount), thermo=thermo)
+                for name, InChI, SMILES, atomic_composition, thermo, amount in self._species}
+
+    @composition.setter
+    def composition(self, composition):
+        self._species = tuple((c.species_name, c.InChI, c.SMILES, c.atomic_composition,
+                               c.thermo, _compact_quantity(c.amount))
+                              for c in composition.values())
+
+    @property
+    def rcm_data(self):
+        """`RCMData`: The data fields specific to RCM experiments, or `None`"""
+        if self._rcm_data is None:
+            return None
+        return RCMData(*[_expand_quantity(v) for v in self._rcm_data])
+
+    @rcm_data.setter
+    def rcm_data(self, rcm_data):
+        if rcm_data is None:
+            self._rcm_data = None
+        else:
+            self._rcm_data = tuple(_compact_quantity(v) for v in rcm_data)
+
+
+def _value_property(index, prop):
+    def getter(self):
+        return _expand_quantity(self._values[index])
+
+    def setter(self, quantity):
+        self._values[index] = _compact_quantity(quantity)
+
+    return property(getter, setter, doc='(`~pint.Quantity`) The {}'.format(prop.replace('-', ' ')))
+
+
+def _history_property(name):
+    def getter(self):
+        return None if self._histories is None else self._histories.get(name)
+
+    def setter(self, history):
+        histories = self._histories or {}
+        if history is None:
+            histories.pop(name, None)
+        else:
+            histories[name] = history
+        self._histories = histories or None
+
+    return property(getter, setter, doc='(`~collections.namedtuple`) The {}'.format(
+        name.replace('_', ' ')))
+
+
+for index, prop in enumerate(CompactDataPoint.value_unit_props):
+    setattr(CompactDataPoint, prop.replace('-', '_'), _value_property(index, prop))
+for h in CompactDataPoint.history_types:
+    setattr(CompactDataPoint, '{}_history'.format(h), _history_property('{}_history'.format(h)))
+del index, prop, h
+
+
+def _quantity_columns(quantities):
+    """Split quantities into arrays of their nominal values, standard deviations, and units.
+
+    Returns:
+        `tuple`: Arrays of the nominal values and standard deviations, which are ``nan`` for
+            values without an uncertainty, of whether each nominal value is an `int`, and of the
+            index of the units of each value in the list of unit names, which is -1 for missing
+            values, and the list of unit names
+    """
+    nominal = np.full(len(quantities), np.nan)
+    std = np.full(len(quantities), np.nan)
+    integer = np.zeros(len(quantities), dtype=bool)
+    codes = np.full(len(quantities), -1, dtype=np.int32)
+    names = {}
+    for position, quantity in enumerate(quantities):
+        if quantity is None:
+            continue
+        magnitude = quantity.magnitude
+        value = getattr(magnitude, 'nominal_value', magnitude)
+        nominal[position] = value
+        integer[position] = isinstance(value, int)
+        std[position] = getattr(magnitude, 'std_dev', np.nan)
+        codes[position] = names.setdefault(str(quantity.units), len(names))
+    return nominal, std, integer, codes, list(names)
+
+
+def _columns_quantities(columns):
+    """Build the quantities from the output of `_quantity_columns`.
+    """
+    nominal, std, integer, codes, names = columns
+    unit_list = [_shared_units.get(name) or units.Unit(name) for name in names]
+    quantities = []
+    for value, std_dev, is_int, code in zip(nominal.tolist(), std.tolist(), integer.tolist(),
+                                            codes.tolist()):
+        if code < 0:
+            quantities.append(None)
+            continue
+        quantity = Q_(int(value) if is_int else value, unit_list[code])
+        if std_dev == std_dev:
+            quantity = quantity.plus_minus(std_dev)
+        quantities.append(quantity)
+    return quantities
+
+
+def _datapoints_state(datapoints):
+    """Convert datapoints to a state made of arrays and plain Python objects, for pickling.
+
+    The quantities of each field are stored as columns of all of the datapoints, and the time
+    histories as arrays, so they are pickled as compact buffers instead of one `~pint.Quantity`
+    at a time. Pint quantities cannot be pickled with the PyKED unit registry in any case.
+    """
+    attributes = [p.replace('-', '_') for p in DataPoint.value_unit_props]
+    rcm_attributes = [p.replace('-', '_') for p in DataPoint.rcm_data_props]
+    rcm_data = [dp.rcm_data for dp in datapoints]
+    compositions = [list(dp.composition.values()) for dp in datapoints]
+
+    histories = []
+    for index, dp in enumerate(datapoints):
+        for h in DataPoint.history_types:
+            name = '{}_history'.format(h)
+            history = getattr(dp, name)
+            if history is not None:
+                histories.append((index, name, getattr(history, 'type', None),
+                                  history[0].magnitude, str(history[0].units),
+                                  history[1].magnitude, str(history[1].units)))
+
+    return {
+        'compact': [isinstance(dp, CompactDataPoint) for dp in datapoints],
+        'fields': {a: _quantity_columns([getattr(dp, a) for dp in datapoints])
+                   for a in attributes},
+        'rcm_data': np.array([r is not None for r in rcm_data], dtype=bool),
+        'rcm_fields': {a: _quantity_columns([getattr(r, a) for r in rcm_data if r is not None])
+                       for a in rcm_attributes},
+        'species': [[c[:4] + (c.thermo,) for c in composition] for composition in compositions],
+        'amounts': _quantity_columns([c.amount for composition in compositions
+                                      for c in composition]),
+        'composition_type': [dp.composition_type for dp in datapoints],
+        'equivalence_ratio': [dp.equivalence_ratio for dp in datapoints],
+        'ignition_type': [dp.ignition_type for dp in datapoints],
+        'histories': histories,
+    }
+
+
+def _datapoints_from_state(state):
+    """Build the datapoints from the output of `_datapoints_state`.
+    """
+    datapoints = []
+    for compact in state['compact']:
+        if compact:
+            dp = CompactDataPoint.__new__(CompactDataPoint)
+            dp._values = [None]*len(CompactDataPoint.value_unit_props)
+            dp._rcm_data = None
+            dp._histories = None
+        else:
+            dp = DataPoint.__new__(DataPoint)
+        datapoints.append(dp)
+
+    for attribute, columns in state['fields'].items():
+        for dp, quantity in zip(datapoints, _columns_quantities(columns)):
+            setattr(dp, attribute, quantity)
+
+    rcm_values = {a: iter(_columns_quantities(columns))
+                  for a, columns in state['rcm_fields'].items()}
+    amounts = iter(_columns_quantities(state['amounts']))
+    for index, dp in enumerate(datapoints):
+        if state['rcm_data'][index]:
+            dp.rcm_data = RCMData(**{a: next(values) for a, values in rcm_values.items()})
+        else:
+            dp.rcm_data = None
+        dp.composition_type = state['composition_type'][index]
+        dp.composition = {
+            species[0]: Composition(species_name=species[0], InChI=species[1],
+                                    SMILES=species[2], atomic_composition=species[3],
+                                    amount=next(amounts), thermo=species[4])
+            for species in state['species'][index]
+        }
+        dp.equivalence_ratio = state['equivalence_ratio'][index]
+        dp.ignition_type = state['ignition_type'][index]
+        if not isinstance(dp, CompactDataPoint):
+            for h in DataPoint.history_types:
+                setattr(dp, '{}_history'.format(h), None)
+
+    for index, name, history_type, time, time_units, quantity, quantity_units in (
+            state['histories']):
+        if history_type is None:
+            history = VolumeHistory(time=Q_(time, time_units), volume=Q_(quantity, quantity_units))
+        else:
+            history = TimeHistory(time=Q_(time, time_units), quantity=Q_(quantity, quantity_units),
+                                  type=history_type)
+        setattr(datapoints[index], name, history)
+
+    return datapoints
+
+
+def _unpickle_datapoint(state):
+    return _datapoints_from_state(state)[0]
+
+
+def _history_values_state(properties):
+    """Replace the lists of time history values in ChemKED properties by arrays.
+
+    Returns:
+        `dict`: Shallow copy of the properties, with copies of the datapoints and histories that
+            have values
+    """
+    properties = dict(properties)
+    datapoints = []
+    for point in properties['datapoints']:
+        if 'time-histories' in point:
+            histories = [dict(h, values=np.array(h['values'], dtype=float))
+                         if isinstance(h['values'], list) else h
+                         for h in point['time-histories']]
+            point = dict(point, **{'time-histories': histories})
+        if 'volume-history' in point:
+            history = point['volume-history']
+            point = dict(point, **{'volume-history': dict(
+                history, values=np.array(history['values'], dtype=float))})
+        datapoints.append(point)
+    properties['datapoints'] = datapoints
+    return properties
+
+
+def _history_values_lists(properties):
+    """Replace the arrays of time history values in ChemKED properties by lists.
+
+    This reverses `_history_values_state`. The properties of records attached from shared
+    memory keep the arrays, which are views of the shared memory, until they are written.
+
+    Returns:
+        `dict`: Shallow copy of the properties, with copies of the datapoints and histories that
+            have arrays of values
+    """
+    def to_list(history):
+        if isinstance(history['values'], np.ndarray):
+            return dict(history, values=history['values'].tolist())
+        return history
+
+    properties = dict(properties)
+    datapoints = []
+    for point in properties['datapoints']:
+        if 'time-histories' in point:
+            point = dict(point, **{'time-histories': [to_list(h)
+                                                      for h in point['time-histories']]})
+        if 'volume-history' in point:
+            point = dict(point, **{'volume-history': to_list(point['volume-history'])})
+        datapoints.append(point)
+    properties['datapoints'] = datapoints
+    return properties
+
+
+def _unpickle_chemked(state, *, history_lists=True):
+    chemked = ChemKED.__new__(ChemKED)
+    for key, value in state['attributes'].items():
+        setattr(chemked, key, value)
+    if history_lists:
+        chemked._properties = _history_values_lists(state['properties'])
+    else:
+        chemked._properties = state['properties']
+    chemked.datapoints = _datapoints_from_state(state['datapoints'])
+    return chemked
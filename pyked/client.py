@@ -0,0 +1,404 @@
+"""
+Module for the client of the Crossref and ORCID APIs, used for all DOI and ORCID lookups
+"""
+# Standard libraries
+import asyncio
+import json
+import os
+import threading
+import time
+from urllib.parse import quote
+from warnings import warn
+
+import requests
+from requests.exceptions import HTTPError, ConnectionError
+
+crossref_url = 'https://api.crossref.org/works/'
+"""`str`: The URL of the Crossref works API, to which the DOI is appended"""
+
+orcid_url = 'https://pub.orcid.org/v2.1/'
+"""`str`: The URL of the ORCID public API, to which the ORCID and ``/person`` are appended"""
+
+retry_statuses = [429, 500, 502, 503, 504]
+"""`list`: HTTP status codes of responses that are retried"""
+
+not_found_statuses = [404, 410]
+"""`list`: HTTP status codes of responses meaning that the DOI or ORCID does not exist"""
+
+
+class NotFoundError(HTTPError):
+    """Raised when a DOI or ORCID does not exist or is not valid."""
+    pass
+
+
+class LookupRejectedError(HTTPError):
+    """Raised when a lookup was rejected for a reason other than the DOI or ORCID not existing,
+    such as a bad request or missing authorization, which retrying does not fix."""
+    pass
+
+
+class TransientLookupError(ConnectionError):
+    """Raised when a lookup failed because of the network or the service, such as when the
+    requests were throttled, even after retrying."""
+    pass
+
+
+def _retry_delay(headers, delay):
+    """Get the delay before retrying a request, which is at least the ``Retry-After`` header.
+    """
+    try:
+        return max(delay, float(headers.get('Retry-After')))
+    except (TypeError, ValueError):
+        return delay
+
+
+class _Retries(object):
+    """The retries of a request, shared by `LookupClient` and `~pyked.aio.AsyncLookup`.
+
+    Iterating gives the delay before each attempt, which doubles after each retry and is at
+    least the ``Retry-After`` header of a throttled response. The outcome of each attempt is
+    given to `response` or `connection_failed`, and `error` is the exception of a request that
+    failed after all of the attempts.
+    """
+    def __init__(self, client, url):
+        self.client = client
+        self.url = url
+        self.delay = client.backoff
+        self.attempts = 0
+        self.failed_connections = 0
+        self.failure = None
+
+    def __iter__(self):
+        for attempt in range(self.client.retries + 1):
+            self.attempts = attempt + 1
+            if attempt == 0:
+                yield 0.0
+            else:
+                delay = self.delay
+                self.delay *= 2
+                yield delay
+
+    def response(self, status, reason, headers, response=None):
+        """Get the exception of a response that is not retried, or `None` if it is retried.
+        """
+        self.failure = '{} {}'.format(status, reason)
+        if status in not_found_statuses:
+            return NotFoundError('{} for url: {}'.format(self.failure, self.url),
+                                 response=response)
+        elif status not in retry_statuses:
+            return LookupRejectedError('{} for url: {}'.format(self.failure, self.url),
+                                       response=response)
+        self.delay = _retry_delay(headers, self.delay)
+        return None
+
+    def connection_failed(self, error):
+        """Record a request that failed to connect, and get whether to stop retrying.
+        """
+        self.failure = str(error) or type(error).__name__
+        self.failed_connections += 1
+        return self.failed_connections > self.client.connection_retries
+
+    def error(self):
+        """Get the exception of a request that failed after all of the attempts.
+        """
+        return TransientLookupError('{} failed after {} attempts: {}'.format(
+            self.url, self.attempts, self.failure))
+
+
+def lookup_keys(properties):
+    """Find the DOI and ORCIDs to look up to validate the properties of a ChemKED file.
+
+    Arguments:
+        properties (`dict`): Dictionary created from the parsed YAML file
+
+    Returns:
+        `list`: Tuples of ``'doi'`` or ``'orcid'`` and the DOI or ORCID
+    """
+    keys = []
+    reference = properties.get('reference')
+    if not isinstance(reference, dict):
+        reference = {}
+    if isinstance(reference.get('doi'), str):
+        keys.append(('doi', reference['doi']))
+    authors = [a for group in [properties.get('file-authors'), reference.get('authors')]
+               if isinstance(group, list) for a in group]
+    for author in authors:
+        if isinstance(author, dict) and isinstance(author.get('ORCID'), str):
+            if ('orcid', author['ORCID']) not in keys:
+                keys.append(('orcid', author['ORCID']))
+    return keys
+
+
+class TokenBucket(object):
+    """Token-bucket rate limiter, for threads and coroutines.
+
+    Tokens are added at a steady rate up to the capacity of the bucket, and each request takes
+    one, so bursts of up to the capacity are allowed while the average rate is limited.
+
+    Arguments:
+        rate (`float`): The number of tokens added per second
+        capacity (`float`, optional): The maximum number of tokens. Defaults to ``rate``, or one
+            if ``rate`` is less than one.
+    """
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = max(rate, 1.0) if capacity is None else capacity
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _take(self):
+        """Take a token if one is available, and otherwise get the time until one is.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated)*self.rate)
+            self._updated = now
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return 0.0
+            return (1.0 - self._tokens)/self.rate
+
+    def acquire(self):
+        """Wait until a token is available and take it.
+        """
+        wait = self._take()
+        while wait > 0.0:
+            time.sleep(wait)
+            wait = self._take()
+
+    async def aacquire(self):
+        """Wait on the event loop until a token is available and take it.
+        """
+        wait = self._take()
+        while wait > 0.0:
+            await asyncio.sleep(wait)
+            wait = self._take()
+
+
+class LookupClient(object):
+    """Client for DOI lookups with Crossref and ORCID lookups, with rate limiting and retries.
+
+    Requests are limited by a `TokenBucket`. Responses with a status in `retry_statuses` are
+    retried with exponential backoff, honoring the ``Retry-After`` header, and requests that
+    failed to connect are retried ``connection_retries`` times. Lookups raise `NotFoundError`
+    if the DOI or ORCID does not exist, `LookupRejectedError` if the request was rejected for
+    another reason, and `TransientLookupError` if the request still failed after the retries,
+    so that throttling is not mistaken for bad data.
+
+    The validation and the converters use ``default_client``, which is a `LookupClient` with the
+    default settings, or an `OfflineClient` if the ``PYKED_OFFLINE`` or ``PYKED_SNAPSHOT``
+    environment variable is set when PyKED is imported.
+
+    Arguments:
+        rate (`float`, optional): The maximum average number of requests per second
+        burst (`float`, optional): The maximum number of requests in a burst. Defaults to
+            ``rate``.
+        retries (`int`, optional): The number of times a throttled or failed request is retried
+        connection_retries (`int`, optional): The number of times a request that failed to
+            connect is retried, which is none by default since the network is often not
+            available, so that lookups fail quickly offline
+        backoff (`float`, optional): The delay in seconds before the first retry, which doubles
+            for each retry after it
+        timeout (`float`, optional): The timeout of each request in seconds
+        crossref_url (`str`, optional): The URL of the Crossref works API
+        orcid_url (`str`, optional): The URL of the ORCID public API
+        mailto (`str`, optional): The email address sent to Crossref to use its polite pool
+
+    Examples:
+        >>> client = LookupClient(rate=5.0)
+        >>> reference = client.works('10.1016/j.combustflame.2009.12.022')['message']
+    """
+    def __init__(self, *, rate=10.0, burst=None, retries=4, connection_retries=0, backoff=0.5,
+                 timeout=30.0, crossref_url=crossref_url, orcid_url=orcid_url,
+                 mailto='prometheus@pr.omethe.us'):
+        self.bucket = TokenBucket(rate, burst)
+        self.retries = retries
+        self.connection_retries = connection_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.crossref_url = crossref_url
+        self.orcid_url = orcid_url
+        self.mailto = mailto
+        self._session = requests.Session()
+
+    def works_url(self, doi):
+        """Get the URL and query parameters of the Crossref lookup of a DOI.
+        """
+        params = {'mailto': self.mailto} if self.mailto else None
+        return self.crossref_url + quote(doi, safe='/'), params
+
+    def person_url(self, orcid):
+        """Get the URL of the ORCID lookup of the personal details of an ORCID.
+        """
+        return '{}{}/person'.format(self.orcid_url, quote(orcid))
+
+    def _get(self, url, params=None, headers=None):
+        """Get a JSON response, retrying failed requests.
+        """
+        retries = _Retries(self, url)
+        for delay in retries:
+            if delay > 0.0:
+                time.sleep(delay)
+            self.bucket.acquire()
+            try:
+                response = self._session.get(url, params=params, headers=headers,
+                                             timeout=self.timeout)
+            except (ConnectionError, requests.Timeout) as error:
+                if retries.connection_failed(error):
+                    break
+                continue
+            if response.status_code == 200:
+                return response.json()
+            error = retries.response(response.status_code, response.reason, response.headers,
+                                     response)
+            if error is not None:
+                raise error
+        raise retries.error()
+
+    def works(self, doi):
+        """Look up a DOI with Crossref.
+
+        Arguments:
+            doi (`str`): The DOI
+
+        Returns:
+            `dict`: The JSON response, whose ``message`` is the metadata of the reference
+
+        Raises:
+            `NotFoundError`: If the DOI was not found
+            `LookupRejectedError`: If the request was rejected for another reason
+            `TransientLookupError`: If the lookup failed after the retries
+        """
+        url, params = self.works_url(doi)
+        return self._get(url, params)
+
+    def person(self, orcid):
+        """Look up the personal details of an ORCID.
+
+        Arguments:
+            orcid (`str`): The ORCID
+
+        Returns:
+            `dict`: The JSON response
+
+        Raises:
+            `NotFoundError`: If the ORCID was not found
+            `LookupRejectedError`: If the request was rejected for another reason
+            `TransientLookupError`: If the lookup failed after the retries
+        """
+        return self._get(self.person_url(orcid), headers={'Accept': 'application/json'})
+
+
+class OfflineClient(object):
+    """Client that never uses the network, and answers lookups from a snapshot, if given.
+
+    The snapshot is written by `write_snapshot` from an online run. Lookups of DOIs and ORCIDs
+    that are not in the snapshot raise `TransientLookupError` at once, so validation warns
+    that they were not validated, and those that were recorded as not found raise
+    `NotFoundError`.
+
+    Arguments:
+        snapshot (`str` or `dict`, optional): The filename of the snapshot, or its contents
+
+    Examples:
+        >>> validator = OurValidator(schema, client=OfflineClient('snapshot.json'))
+    """
+    def __init__(self, snapshot=None):
+        if isinstance(snapshot, str):
+            with open(snapshot, 'r') as f:
+                snapshot = json.load(f)
+        snapshot = snapshot or {}
+        self.records = {kind: {key.lower(): value for key, value in snapshot.get(kind, {}).items()}
+                        for kind in ['doi', 'orcid']}
+
+    def _get(self, kind, key):
+        """Get a record of the snapshot.
+        """
+        try:
+            record = self.records[kind][key.lower()]
+        except KeyError:
+            raise TransientLookupError(
+                '{} is not in the snapshot of the offline client'.format(key))
+        if record is None:
+            raise NotFoundError('{} was not found when the snapshot was written'.format(key))
+        return record
+
+    def works(self, doi):
+        """Look up a DOI in the snapshot, like `LookupClient.works`.
+        """
+        return self._get('doi', doi)
+
+    def person(self, orcid):
+        """Look up an ORCID in the snapshot, like `LookupClient.person`.
+        """
+        return self._get('orcid', orcid)
+
+
+def write_snapshot(inputs, filename, *, client=None):
+    """Look up the DOIs and ORCIDs of ChemKED files and write them to a snapshot file.
+
+    DOIs and ORCIDs that were not found are recorded as such. Those whose lookup failed for
+    other reasons are left out, with a warning.
+
+    Arguments:
+        inputs (`list`): Filenames of YAML files, or dictionaries with the parsed YAML files
+        filename (`str`): The filename of the snapshot, which is a JSON file
+        client (`LookupClient`, optional): The client used for the lookups. Defaults to
+            ``default_client``. Must be supplied as a keyword-argument.
+
+    Returns:
+        `dict`: The contents of the snapshot
+
+    Examples:
+        >>> write_snapshot(glob('corpus/**/*.yaml', recursive=True), 'snapshot.json')
+    """
+    from .validation import yaml, yaml_loader
+
+    if client is None:
+        client = default_client
+    snapshot = {'doi': {}, 'orcid': {}}
+    for value in inputs:
+        if not isinstance(value, dict):
+            with open(value, 'r') as f:
+                value = yaml.load(f, Loader=yaml_loader)
+        for kind, key in lookup_keys(value):
+            if key.lower() in snapshot[kind]:
+                continue
+            try:
+                record = client.works(key) if kind == 'doi' else client.person(key)
+            except NotFoundError:
+                record = None
+            except (TransientLookupError, LookupRejectedError) as error:
+                warn('{} left out of the snapshot: {}'.format(key, error))
+                continue
+            snapshot[kind][key.lower()] = record
+
+    with open(filename, 'w') as f:
+        json.dump(snapshot, f, sort_keys=True)
+    return snapshot
+
+
+def set_offline(snapshot=None):
+    """Use an `OfflineClient` as the ``default_client``, so that no lookup uses the network.
+
+    The offline mode can also be set before PyKED is imported with the ``PYKED_OFFLINE``
+    environment variable, or with ``PYKED_SNAPSHOT`` set to the filename of a snapshot.
+
+    Arguments:
+        snapshot (`str` or `dict`, optional): The filename of a snapshot, or its contents
+
+    Returns:
+        `OfflineClient`: The new default client
+    """
+    global default_client
+    default_client = OfflineClient(snapshot)
+    return default_client
+
+
+# The client used for lookups unless another one is given, which is offline if requested by
+# the environment, and can be replaced with set_offline
+if os.environ.get('PYKED_OFFLINE') or os.environ.get('PYKED_SNAPSHOT'):
+    default_client = OfflineClient(os.environ.get('PYKED_SNAPSHOT'))
+else:
+    default_client = LookupClient()
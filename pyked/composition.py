@@ -0,0 +1,247 @@
+"""
+Module for molecular weights and conversions between composition kinds
+"""
+# Standard libraries
+import re
+from functools import lru_cache
+
+import numpy as np
+
+element_weights = {
+    'H': 1.008, 'He': 4.002602, 'Li': 6.94, 'Be': 9.0121831, 'B': 10.81, 'C': 12.011,
+    'N': 14.007, 'O': 15.999, 'F': 18.998403163, 'Ne': 20.1797, 'Na': 22.98976928,
+    'Mg': 24.305, 'Al': 26.9815385, 'Si': 28.085, 'P': 30.973761998, 'S': 32.06, 'Cl': 35.45,
+    'Ar': 39.948, 'K': 39.0983, 'Ca': 40.078, 'Sc': 44.955908, 'Ti': 47.867, 'V': 50.9415,
+    'Cr': 51.9961, 'Mn': 54.938044, 'Fe': 55.845, 'Co': 58.933194, 'Ni': 58.6934,
+    'Cu': 63.546, 'Zn': 65.38, 'Ga': 69.723, 'Ge': 72.630, 'As': 74.921595, 'Se': 78.971,
+    'Br': 79.904, 'Kr': 83.798, 'Rb': 85.4678, 'Sr': 87.62, 'Ag': 107.8682, 'Sn': 118.710,
+    'I': 126.90447, 'Xe': 131.293, 'Hg': 200.592, 'Pb': 207.2, 'D': 2.014101778,
+}
+"""`dict`: Standard atomic weights of the elements in g/mol, from the IUPAC 2013 table"""
+
+composition_kinds = ['mole fraction', 'mole percent', 'mass fraction']
+"""`list`: Composition kinds that can be converted between"""
+
+formula_regex = re.compile(r'([A-Z][a-z]?)(\d*)')
+
+
+def get_element_weight(element):
+    """Look up the atomic weight of an element.
+
+    Arguments:
+        element (`str`): Symbol of the element, e.g., ``'C'`` or ``'Ar'``
+
+    Returns:
+        `float`: The atomic weight of the element in g/mol
+
+    Raises:
+        `ValueError`: If the element is not in the `element_weights` table
+    """
+    try:
+        return element_weights[element]
+    except KeyError:
+        raise ValueError('Unknown element: {}'.format(element))
+
+
+@lru_cache(maxsize=None)
+def parse_inchi_formula(InChI):
+    """Get the number of atoms of each element from the formula layer of an InChI.
+
+    Disconnected components in the formula layer (separated by ``.``) are summed, including
+    their leading multipliers, if any.
+
+    Arguments:
+        InChI (`str`): InChI identifier, with or without the leading ``InChI=``
+
+    Returns:
+        `dict`: Mapping of element symbol to the number of atoms of that element
+
+    Examples:
+        >>> parse_inchi_formula('1S/C7H16/c1-3-5-7-6-4-2/h3-7H2,1-2H3')
+        {'C': 7, 'H': 16}
+        >>> parse_inchi_formula('1S/2H2O/h2*1H2')
+        {'H': 4, 'O': 2}
+    """
+    if InChI.startswith('InChI='):
+        InChI = InChI[len('InChI='):]
+    layers = InChI.split('/')
+    if len(layers) < 2 or not layers[1]:
+        raise ValueError('InChI {} has no formula layer'.format(InChI))
+
+    atoms = {}
+    for component in layers[1].split('.'):
+        multiplier = re.match(r'\d*', component).group()
+        component = component[len(multiplier):]
+        multiplier = int(multiplier) if multiplier else 1
+        if formula_regex.sub('', component):
+            raise ValueError('Could not parse the formula {} in InChI {}'.format(component, InChI))
+        for element, count in formula_regex.findall(component):
+            count = int(count) if count else 1
+            atoms[element] = atoms.get(element, 0) + multiplier*count
+
+    return atoms
+
+
+@lru_cache(maxsize=None)
+def _atoms_weight(atoms):
+    """Sum the atomic weights of a hashable sequence of ``(element, amount)`` pairs.
+    """
+    return sum(get_element_weight(element)*amount for element, amount in atoms)
+
+
+def get_molecular_weight(species):
+    """Compute the molecular weight of a species.
+
+    The ``atomic_composition`` of the species is used if it is present, otherwise the formula
+    layer of the ``InChI`` is used. Results are cached per species identity, so repeated calls
+    for the same species across datapoints are cheap.
+
+    Arguments:
+        species (`~pyked.chemked.Composition`): The species whose weight should be computed
+
+    Returns:
+        `float`: The molecular weight in g/mol
+
+    Raises:
+        `ValueError`: If the species has neither an atomic composition nor an InChI, or if they
+            contain elements that are not known
+    """
+    if species.atomic_composition is not None:
+        atoms = tuple((a['element'], float(a['amount'])) for a in species.atomic_composition)
+    elif species.InChI is not None:
+        atoms = tuple(sorted(parse_inchi_formula(species.InChI).items()))
+    else:
+        raise ValueError('Cannot compute the molecular weight of {}; an atomic-composition or '
+                         'InChI is required'.format(species.species_name))
+
+    return _atoms_weight(atoms)
+
+
+def get_composition_array(datapoints, species_names=None):
+    """Collect the compositions of several datapoints into a single array.
+
+    Arguments:
+        datapoints (`list`): List of `~pyked.chemked.DataPoint` instances
+        species_names (`list`, optional): The species to include, and their order in the columns
+            of the output. By default, all the species in any of the ``datapoints`` are included
+            in the order they are first encountered.
+
+    Returns:
+        `tuple`: Tuple of the list of species names, the `~numpy.ndarray` of amounts with one row
+            per datapoint and one column per species, and the `~numpy.ndarray` with the
+            composition kind of each datapoint. Species missing from a datapoint have an amount
+            of zero.
+    """
+    if species_names is None:
+        species_names = []
+        for dp in datapoints:
+            species_names.extend(s for s in dp.composition if s not in species_names)
+    columns = {s: i for i, s in enumerate(species_names)}
+
+    amounts = np.zeros((len(datapoints), len(species_names)))
+    for row, dp in enumerate(datapoints):
+        for species_name, species in dp.composition.items():
+            if species_name in columns:
+                amounts[row, columns[species_name]] = species.amount.magnitude
+    kinds = np.array([dp.composition_type for dp in datapoints], dtype=object)
+
+    return species_names, amounts, kinds
+
+
+def get_molecular_weights(datapoints, species_names):
+    """Compute the molecular weights of a list of species found in some datapoints.
+
+    Arguments:
+        datapoints (`list`): List of `~pyked.chemked.DataPoint` instances
+        species_names (`list`): List of species names present in the ``datapoints``
+
+    Returns:
+        `~numpy.ndarray`: The molecular weight of each species in g/mol
+
+    Raises:
+        `ValueError`: If a species is not found in any datapoint or its weight cannot be computed
+    """
+    species = {}
+    for dp in datapoints:
+        for species_name, spec in dp.composition.items():
+            species.setdefault(species_name, spec)
+
+    weights = np.empty(len(species_names))
+    for i, species_name in enumerate(species_names):
+        if species_name not in species:
+            raise ValueError('Species {} is not present in the datapoints'.format(species_name))
+        weights[i] = get_molecular_weight(species[species_name])
+
+    return weights
+
+
+def convert_composition(amounts, from_kind, to_kind, molecular_weights=None):
+    """Convert an array of compositions between mole fraction, mole percent, and mass fraction.
+
+    All of the rows are converted together with array operations, and the rows may be specified
+    with different composition kinds.
+
+    Arguments:
+        amounts (`~numpy.ndarray`): Array of amounts with one row per mixture and one column per
+            species
+        from_kind (`str` or `~numpy.ndarray`): The composition kind of the ``amounts``, either a
+            single kind for all the rows or one per row
+        to_kind (`str`): The composition kind of the output
+        molecular_weights (`~numpy.ndarray`, optional): The molecular weight of each species.
+            Required when converting to or from mass fraction.
+
+    Returns:
+        `~numpy.ndarray`: Array of the same shape as ``amounts`` in the ``to_kind`` basis
+
+    Raises:
+        `ValueError`: If one of the kinds is unknown, or molecular weights are required but
+            not given
+    """
+    amounts = np.atleast_2d(np.asarray(amounts, dtype=float))
+    from_kind = np.broadcast_to(np.asarray(from_kind, dtype=object), amounts.shape[:1])
+    for kind in set(from_kind) | {to_kind}:
+        if kind not in composition_kinds:
+            raise ValueError('Unknown composition type: {}'.format(kind))
+
+    is_mass = from_kind == 'mass fraction'
+    if (is_mass.any() or to_kind == 'mass fraction') and molecular_weights is None:
+        raise ValueError('Molecular weights are required to convert to or from mass fraction')
+
+    mole_fractions = amounts.copy()
+    mole_fractions[from_kind == 'mole percent'] /= 100.0
+    if is_mass.any():
+        moles = amounts[is_mass]/molecular_weights
+        mole_fractions[is_mass] = moles/moles.sum(axis=1, keepdims=True)
+
+    if to_kind == 'mole fraction':
+        return mole_fractions
+    elif to_kind == 'mole percent':
+        return mole_fractions*100.0
+    else:
+        masses = mole_fractions*molecular_weights
+        return masses/masses.sum(axis=1, keepdims=True)
+
+
+def normalize_composition(datapoints, kind='mole fraction', species_names=None):
+    """Get the compositions of several datapoints converted to a single composition kind.
+
+    Arguments:
+        datapoints (`list`): List of `~pyked.chemked.DataPoint` instances, possibly from several
+            `~pyked.chemked.ChemKED` instances
+        kind (`str`, optional): The output composition kind. Defaults to ``'mole fraction'``.
+        species_names (`list`, optional): The species to include, see `get_composition_array`
+
+    Returns:
+        `tuple`: Tuple of the list of species names and the `~numpy.ndarray` of amounts in the
+            ``kind`` basis, with one row per datapoint and one column per species
+
+    Examples:
+        >>> datapoints = ChemKED(yaml_file).datapoints + ChemKED(other_yaml_file).datapoints
+        >>> species, mole_fractions = normalize_composition(datapoints)
+    """
+    species_names, amounts, kinds = get_composition_array(datapoints, species_names)
+    molecular_weights = None
+    if kind == 'mass fraction' or 'mass fraction' in kinds:
+        molecular_weights = get_molecular_weights(datapoints, species_names)
+
+    return species_names, convert_composition(amounts, kinds, kind, molecular_weights)
@@ -7,13 +7,13 @@ from argparse import ArgumentParser
 from warnings import warn
 import xml.etree.ElementTree as etree
 
-from requests.exceptions import HTTPError, ConnectionError
-import habanero
 import pint
 
 # Local imports
-from .validation import yaml, property_units, crossref_api
+from .validation import yaml, property_units
 from .validation import units as unit_registry
+from .client import NotFoundError, LookupRejectedError, TransientLookupError
+from . import client
 from ._version import __version__
 from . import chemked
 
@@ -103,8 +103,8 @@ def get_reference(root):
 
     if ref_doi is not None:
         try:
-            ref = crossref_api.works(ids=ref_doi)['message']
-        except (HTTPError, habanero.RequestError, ConnectionError):
+            ref = client.default_client.works(ref_doi)['message']
+        except NotFoundError:
             if ref_key is None:
                 raise KeywordError('DOI not found and preferredKey attribute not set')
             else:
@@ -114,6 +114,15 @@ def get_reference(root):
                 reference['detail'] = ref_key
                 if reference['detail'][-1] != '.':
                     reference['detail'] += '.'
+        except (TransientLookupError, LookupRejectedError) as error:
+            # The DOI may well exist, so only fall back on preferredKey if it is given
+            if ref_key is None:
+                raise
+            warn('DOI could not be looked up ({}). Setting "detail" key as a fallback; please '
+                 'update to the appropriate fields.'.format(error))
+            reference['detail'] = ref_key
+            if reference['detail'][-1] != '.':
+                reference['detail'] += '.'
         else:
             if ref_key is not None:
                 warn('Using DOI to obtain reference information, rather than preferredKey.')
@@ -0,0 +1,264 @@
+"""
+Module for fitting Arrhenius-type correlations to ignition delay data
+"""
+# Standard libraries
+from collections import namedtuple
+
+import numpy as np
+
+from .thermo import gas_constant
+from .validation import Q_
+
+fit_terms = ['temperature', 'pressure', 'equivalence_ratio']
+"""`list`: The conditions that can be included in a correlation, in the order of its coefficients"""
+
+ArrheniusFit = namedtuple('ArrheniusFit',
+                          ['groups', 'terms', 'coefficients', 'covariance', 'n_points',
+                           'chi_squared'])
+ArrheniusFit.__doc__ = ('Correlations of the form ``tau = A*exp(Ea/(R*T))*P**n*phi**m`` fit to '
+                        'each group of datapoints')
+ArrheniusFit.groups.__doc__ = '(`list`) The key of each group'
+ArrheniusFit.terms.__doc__ = '(`list`) The conditions included in the correlations'
+ArrheniusFit.coefficients.__doc__ = ('(`~numpy.ndarray`) The coefficients of each group, with one '
+                                     'row per group. The first column is ``ln(A)`` with ``A`` in '
+                                     'seconds and SI units of the conditions, followed by ``Ea/R`` '
+                                     'in kelvin and the exponents of the pressure in pascal and '
+                                     'the equivalence ratio, for those in ``terms``. Coefficients '
+                                     'that cannot be determined from a group are ``nan``.')
+ArrheniusFit.covariance.__doc__ = '(`~numpy.ndarray`) The covariance matrix of each group'
+ArrheniusFit.n_points.__doc__ = '(`~numpy.ndarray`) The number of datapoints in each group'
+ArrheniusFit.chi_squared.__doc__ = ('(`~numpy.ndarray`) The weighted sum of squared residuals of '
+                                    '``ln(tau)`` in each group')
+
+
+def _nominal_and_std(quantity, units):
+    """Get the nominal value and standard deviation of a quantity in the given units.
+    """
+    magnitude = quantity.to(units).magnitude
+    return (float(getattr(magnitude, 'nominal_value', magnitude)),
+            float(getattr(magnitude, 'std_dev', 0.0)))
+
+
+def _design_matrix(conditions, terms):
+    """Build the columns ``1``, ``1/T``, ``ln(P)``, and ``ln(phi)`` from conditions in SI units.
+    """
+    design = np.ones((len(conditions), len(terms) + 1))
+    for column, term in enumerate(terms, start=1):
+        if term == 'temperature':
+            design[:, column] = 1.0/conditions[:, column - 1]
+        else:
+            design[:, column] = np.log(conditions[:, column - 1])
+    return design
+
+
+def group_key(chemked, datapoint, by):
+    """Get the key of the group that a datapoint belongs to.
+
+    Arguments:
+        chemked (`~pyked.chemked.ChemKED`): The dataset that contains the datapoint
+        datapoint (`~pyked.chemked.DataPoint`): The datapoint
+        by (`str` or `callable`): One of ``'file'``, ``'composition'``, or ``'apparatus'``, or a
+            function of the ``chemked`` and ``datapoint`` that returns a hashable key. If `None`,
+            all datapoints are in one group.
+
+    Returns:
+        The hashable group key. Grouping by ``'file'`` uses the ``chemked`` instance itself,
+        grouping by ``'composition'`` uses the composition kind and the sorted species names and
+        amounts, and grouping by ``'apparatus'`` uses the `~pyked.chemked.Apparatus`.
+    """
+    if by is None:
+        return None
+    elif callable(by):
+        return by(chemked, datapoint)
+    elif by == 'file':
+        return chemked
+    elif by == 'composition':
+        amounts = []
+        for species in sorted(datapoint.composition.values(), key=lambda s: s.species_name):
+            amount = species.amount.magnitude
+            amounts.append((species.species_name,
+                            float(getattr(amount, 'nominal_value', amount))))
+        return (datapoint.composition_type,) + tuple(amounts)
+    elif by == 'apparatus':
+        return chemked.apparatus
+    else:
+        raise ValueError('Unknown grouping: {}'.format(by))
+
+
+def get_fit_arrays(datapoints, terms=fit_terms):
+    """Get the arrays needed to fit a correlation to ignition delays.
+
+    Arguments:
+        datapoints (`list`): List of `~pyked.chemked.DataPoint` instances
+        terms (`list`, optional): The conditions to get, from those in `fit_terms`
+
+    Returns:
+        `tuple`: Arrays of the natural log of the ignition delay in seconds, the standard
+            deviation of the log of the ignition delay, and the conditions in SI units with one
+            column per term. Values that are missing are ``nan``, and the standard deviation is
+            ``nan`` for ignition delays without an uncertainty.
+    """
+    ln_tau = np.full(len(datapoints), np.nan)
+    sigma = np.full(len(datapoints), np.nan)
+    conditions = np.full((len(datapoints), len(terms)), np.nan)
+    units = {'temperature': 'kelvin', 'pressure': 'pascal'}
+    for row, dp in enumerate(datapoints):
+        if dp.ignition_delay is not None:
+            tau, std = _nominal_and_std(dp.ignition_delay, 'second')
+            ln_tau[row] = np.log(tau)
+            if std > 0.0:
+                sigma[row] = std/tau
+        for column, term in enumerate(terms):
+            value = getattr(dp, term)
+            if value is None:
+                continue
+            if term in units:
+                value = _nominal_and_std(value, units[term])[0]
+            conditions[row, column] = value
+    return ln_tau, sigma, conditions
+
+
+def fit_ignition_delay(chemkeds, *, by='file', terms=fit_terms, weighted=True):
+    """Fit correlations of the ignition delay to groups of datapoints.
+
+    The correlation ``tau = A*exp(Ea/(R*T))*P**n*phi**m`` is linear in ``ln(tau)``, so each group
+    is fit by linear least squares, and all of the groups are solved together with batched
+    normal equations. If ``weighted`` is `True` and every ignition delay in a group has an
+    uncertainty, the points are weighted by the inverse variance of ``ln(tau)``; otherwise the
+    group is fit unweighted and the covariance is scaled by the residual variance. Terms that do
+    not vary within a group, such as the equivalence ratio of a single mixture, are left out of
+    its fit. Datapoints missing the ignition delay or one of the ``terms`` are skipped.
+
+    Arguments:
+        chemkeds (`list`): List of `~pyked.chemked.ChemKED` instances, or a single instance
+        by (`str` or `callable`, optional): How to group the datapoints; see `group_key`
+        terms (`list`, optional): The conditions to include, from those in `fit_terms`.
+            Must be supplied as a keyword-argument.
+        weighted (`bool`, optional): Whether to weight the points by their uncertainties.
+            Must be supplied as a keyword-argument.
+
+    Returns:
+        `ArrheniusFit`: The fitted correlations, ordered by the first appearance of each group
+
+    Examples:
+        >>> fit = fit_ignition_delay([ChemKED(f) for f in yaml_files], by='apparatus')
+        >>> fit.coefficients[:, 1]  # Ea/R of each apparatus, in kelvin
+    """
+    if not isinstance(chemkeds, (list, tuple)):
+        chemkeds = [chemkeds]
+    terms = list(terms)
+    unknown = [t for t in terms if t not in fit_terms]
+    if unknown:
+        raise ValueError('Unknown terms: {}'.format(', '.join(unknown)))
+
+    datapoints = []
+    keys = []
+    for chemked in chemkeds:
+        for dp in chemked.datapoints:
+            datapoints.append(dp)
+            keys.append(group_key(chemked, dp, by))
+
+    ln_tau, sigma, conditions = get_fit_arrays(datapoints, terms)
+    keep = np.isfinite(ln_tau) & np.all(np.isfinite(conditions), axis=1)
+
+    groups = []
+    group_ids = {}
+    group_index = np.empty(len(datapoints), dtype=int)
+    for row, key in enumerate(keys):
+        if key not in group_ids:
+            group_ids[key] = len(groups)
+            groups.append(key)
+        group_index[row] = group_ids[key]
+    n_groups = len(groups)
+
+    group_index = group_index[keep]
+    ln_tau = ln_tau[keep]
+    sigma = sigma[keep]
+    design = _design_matrix(conditions[keep], terms)
+
+    n_points = np.bincount(group_index, minlength=n_groups)
+    # A term only varies within a group if its maximum and minimum differ
+    low = np.full((n_groups, design.shape[1]), np.inf)
+    high = np.full((n_groups, design.shape[1]), -np.inf)
+    np.minimum.at(low, group_index, design)
+    np.maximum.at(high, group_index, design)
+    varies = (high - low) > 1.0e-12*np.maximum(np.abs(high), 1.0)
+    varies[:, 0] = True
+    design = np.where(varies[group_index], design, 0.0)
+
+    has_sigma = np.isfinite(sigma)
+    if weighted:
+        all_sigma = np.bincount(group_index, ~has_sigma, minlength=n_groups) == 0
+    else:
+        all_sigma = np.zeros(n_groups, dtype=bool)
+    weights = np.where(all_sigma[group_index] & has_sigma, 1.0/np.where(has_sigma, sigma, 1.0)**2,
+                       1.0)
+
+    normal = np.zeros((n_groups, design.shape[1], design.shape[1]))
+    np.add.at(normal, group_index,
+              weights[:, np.newaxis, np.newaxis]*design[:, :, np.newaxis]*design[:, np.newaxis, :])
+    rhs = np.zeros((n_groups, design.shape[1]))
+    np.add.at(rhs, group_index, (weights*ln_tau)[:, np.newaxis]*design)
+
+    covariance = np.linalg.pinv(normal)
+    coefficients = np.einsum('gij,gj->gi', covariance, rhs)
+
+    residuals = ln_tau - np.einsum('ij,ij->i', design, coefficients[group_index])
+    chi_squared = np.bincount(group_index, weights*residuals**2, minlength=n_groups)
+
+    n_free = varies.sum(axis=1)
+    dof = n_points - n_free
+    scale = np.where(all_sigma, 1.0, chi_squared/np.where(dof > 0, dof, np.nan))
+    covariance *= scale[:, np.newaxis, np.newaxis]
+
+    undetermined = ~varies | (n_points < n_free)[:, np.newaxis]
+    coefficients[undetermined] = np.nan
+    covariance[undetermined[:, :, np.newaxis] | undetermined[:, np.newaxis, :]] = np.nan
+
+    return ArrheniusFit(groups=groups, terms=terms, coefficients=coefficients,
+                        covariance=covariance, n_points=n_points, chi_squared=chi_squared)
+
+
+def get_activation_energy(fit):
+    """Get the activation energies of fitted correlations.
+
+    Arguments:
+        fit (`ArrheniusFit`): The fitted correlations, including the ``'temperature'`` term
+
+    Returns:
+        `~pint.Quantity`: The activation energy of each group in kJ/mol
+    """
+    column = fit.terms.index('temperature') + 1
+    return Q_(fit.coefficients[:, column]*gas_constant, 'J/mol').to('kJ/mol')
+
+
+def evaluate_fit(fit, conditions, groups=None):
+    """Evaluate the ignition delays predicted by fitted correlations.
+
+    Terms that were left out of the fit of a group because they do not vary in it do not
+    contribute to its prediction. Groups with too few points to determine their correlation
+    predict ``nan``.
+
+    Arguments:
+        fit (`ArrheniusFit`): The fitted correlations
+        conditions (`~numpy.ndarray`): The conditions in SI units, with one column per term in
+            ``fit.terms``
+        groups (`~numpy.ndarray`, optional): The index in ``fit.groups`` of the correlation to use
+            for each row of ``conditions``. By default, every correlation is evaluated at every
+            row.
+
+    Returns:
+        `~pint.Quantity`: The ignition delays, with shape ``(n_conditions,)`` if ``groups`` is
+            given or ``(n_groups, n_conditions)`` if not
+    """
+    design = _design_matrix(np.array(conditions, dtype=float, ndmin=2), fit.terms)
+
+    coefficients = np.array(fit.coefficients, dtype=float)
+    # All of the coefficients of an undetermined group are nan, including ln(A), while the terms
+    # left out of a determined group are nan but its ln(A) is not
+    coefficients[np.isnan(coefficients) & np.isfinite(coefficients[:, :1])] = 0.0
+    if groups is None:
+        ln_tau = coefficients.dot(design.T)
+    else:
+        ln_tau = np.einsum('ij,ij->i', design, coefficients[np.asarray(groups)])
+    return Q_(np.exp(ln_tau), 'second')
@@ -0,0 +1,246 @@
+"""
+Module for storing many ChemKED records in one HDF5 file
+"""
+import numpy as np
+
+from .chemked import ChemKED, history_units
+from .parquet import dataset_columns, dataset_properties
+from .validation import property_units
+
+string_columns = ['composition_kind', 'ignition_target', 'ignition_type', 'species_name',
+                  'InChI', 'SMILES', 'atomic_composition', 'thermo']
+"""`list`: Columns of the compound datasets that hold strings, where `None` is stored as ``''``"""
+
+
+def _compound_array(columns, names):
+    """Build a structured array from some of the columns of a table.
+    """
+    import h5py
+
+    n_rows = len(columns[names[0]])
+    dtype = [(name, h5py.string_dtype() if name in string_columns else
+              np.asarray(columns[name]).dtype) for name in names]
+    array = np.empty(n_rows, dtype=dtype)
+    for name in names:
+        if name in string_columns:
+            array[name] = ['' if value is None else value for value in columns[name]]
+        else:
+            array[name] = columns[name]
+    return array
+
+
+def _table_columns(array):
+    """Get the columns of a structured array read from a compound dataset.
+    """
+    columns = {}
+    for name in array.dtype.names:
+        if name in string_columns:
+            values = [v.decode('utf-8') if isinstance(v, bytes) else v for v in array[name]]
+            columns[name] = [v if v else None for v in values]
+        else:
+            columns[name] = array[name]
+    return columns
+
+
+def _group_name(name):
+    """Escape the name of a record as the name of its group, which cannot contain ``/``.
+    """
+    return name.replace('%', '%25').replace('/', '%2F')
+
+
+def _record_name(group_name):
+    """Get the name of a record from the name of its group.
+    """
+    return group_name.replace('%2F', '/').replace('%25', '%')
+
+
+def write_hdf5(chemkeds, filename, *, names=None, compression='gzip', mode='a'):
+    """Write ChemKED records to an HDF5 container.
+
+    Each record is a group ``records/<name>``, with ``/`` in the name escaped as ``%2F`` so
+    that names can be filenames. The top-level fields of the record, such as the ``reference``
+    and ``apparatus``, are JSON-encoded attributes of the group. The datapoints are rows of the
+    compound dataset ``datapoints``, with the columns of the ``datapoints`` table of
+    `~pyked.parquet.to_tables` in SI units, and the species of the datapoints are rows of the
+    compound dataset ``species``. Each time history is a chunked and compressed dataset
+    ``histories/<datapoint index>/<history type>`` with columns of the time and the quantity
+    in SI units.
+
+    Arguments:
+        chemkeds (`list`): List of `~pyked.chemked.ChemKED` instances, or a single instance
+        filename (`str`): The filename of the container
+        names (`list`, optional): The name of each record, such as its filename. Defaults to the
+            number of the record in the container. Must be supplied as a keyword-argument.
+        compression (`str`, optional): The compression filter of the histories. Must be supplied
+            as a keyword-argument.
+        mode (`str`, optional): The mode to open the file in, either ``'a'`` to add records to
+            an existing container or ``'w'`` to overwrite it. Must be supplied as a
+            keyword-argument.
+
+    Examples:
+        >>> write_hdf5([ChemKED(f) for f in yaml_files], 'corpus.h5', names=yaml_files)
+    """
+    import h5py
+
+    if not isinstance(chemkeds, (list, tuple)):
+        chemkeds = [chemkeds]
+
+    with h5py.File(filename, mode) as f:
+        if 'records' in f:
+            records = f['records']
+        else:
+            records = f.create_group('records', track_order=True)
+        if names is None:
+            names = [str(len(records) + number) for number in range(len(chemkeds))]
+        if len(names) != len(chemkeds):
+            raise ValueError('The number of names must match the number of records')
+        for name in names:
+            if _group_name(name) in records:
+                raise ValueError('The container already has a record named {}'.format(name))
+
+        for name, chemked in zip(names, chemkeds):
+            columns = dataset_columns([chemked])
+            group = records.create_group(_group_name(name))
+            for key, value in zip(columns['metadata']['key'], columns['metadata']['value']):
+                group.attrs[key] = value
+
+            datapoints = columns['datapoints']
+            group.create_dataset('datapoints', data=_compound_array(
+                datapoints, [n for n in datapoints if n not in ['dataset', 'index']]))
+            species = columns['species']
+            group.create_dataset('species', data=_compound_array(
+                species, [n for n in species if n != 'dataset']))
+
+            histories = columns['histories']
+            for index, history_type, time, quantity in zip(
+                    histories['index'], histories['type'], histories['time'],
+                    histories['quantity']):
+                dataset = group.create_dataset(
+                    'histories/{}/{}'.format(index, history_type),
+                    data=np.column_stack([time, quantity]), chunks=True,
+                    compression=compression, shuffle=True)
+                dataset.attrs['time-units'] = property_units['time']
+                units = property_units[history_units[history_type.replace(' ', '_')]]
+                dataset.attrs['quantity-units'] = units
+
+
+class HDF5Container(object):
+    """Lazy reader of the ChemKED records in an HDF5 container written by `write_hdf5`.
+
+    The file is kept open and records are only read when they are loaded, so only the requested
+    records and histories are read from the file. Loaded records are not validated again, since
+    they were validated when they were written.
+
+    Arguments:
+        filename (`str`): The filename of the container
+
+    Examples:
+        >>> with HDF5Container('corpus.h5') as container:
+        ...     chemked = container.load('testfile_rcm.yaml', histories=['volume'])
+        ...     datapoints = container.read_datapoints('testfile_st.yaml')
+    """
+    def __init__(self, filename):
+        import h5py
+
+        self.filename = filename
+        self._file = h5py.File(filename, 'r')
+        self._records = self._file['records']
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """Close the file.
+        """
+        self._file.close()
+
+    @property
+    def names(self):
+        """`list`: The names of the records"""
+        return [_record_name(name) for name in self._records]
+
+    def __len__(self):
+        return len(self._records)
+
+    def __contains__(self, name):
+        return _group_name(name) in self._records
+
+    def __iter__(self):
+        for name in self.names:
+            yield self.load(name)
+
+    def __getitem__(self, name):
+        return self.load(name)
+
+    def read_datapoints(self, name):
+        """Read the datapoints of a record as a structured array, without building a `ChemKED`.
+
+        Arguments:
+            name (`str`): The name of the record
+
+        Returns:
+            `~numpy.ndarray`: Structured array with one row per datapoint and the columns of the
+                ``datapoints`` table of `~pyked.parquet.to_tables`
+        """
+        return self._records[_group_name(name)]['datapoints'][()]
+
+    def load(self, name, *, histories=True):
+        """Load a record.
+
+        Arguments:
+            name (`str`): The name of the record
+            histories (`bool` or `list`, optional): Whether to load the time histories, or a list
+                of the history types to load, such as ``['volume']``. Must be supplied as a
+                keyword-argument.
+
+        Returns:
+            `~pyked.chemked.ChemKED`: The record
+        """
+        group = self._records[_group_name(name)]
+        n_points = group['datapoints'].shape[0]
+        datapoints = _table_columns(group['datapoints'][()])
+        datapoints['dataset'] = np.zeros(n_points, dtype=int)
+        datapoints['index'] = np.arange(n_points)
+        species = _table_columns(group['species'][()])
+        species['dataset'] = np.zeros(len(species['index']), dtype=int)
+        metadata = {'dataset': [0]*len(group.attrs), 'key': list(group.attrs),
+                    'value': list(group.attrs.values())}
+        empty = {'dataset': [], 'index': [], 'type': [], 'time': [], 'quantity': []}
+        properties = dataset_properties({'datapoints': datapoints, 'species': species,
+                                         'metadata': metadata, 'histories': empty})[0]
+
+        if histories and 'histories' in group:
+            for index, point_histories in group['histories'].items():
+                for history_type, dataset in point_histories.items():
+                    if histories is not True and history_type not in histories:
+                        continue
+                    properties['datapoints'][int(index)].setdefault('time-histories', []).append({
+                        'type': history_type,
+                        'time': {'units': dataset.attrs['time-units'], 'column': 0},
+                        'quantity': {'units': dataset.attrs['quantity-units'], 'column': 1},
+                        'values': dataset[()].tolist(),
+                    })
+
+        return ChemKED(dict_input=properties, skip_validation=True)
+
+
+def read_hdf5(filename, names=None, *, histories=True):
+    """Read records from an HDF5 container written by `write_hdf5`.
+
+    Arguments:
+        filename (`str`): The filename of the container
+        names (`list`, optional): The names of the records to read. Defaults to all of the
+            records.
+        histories (`bool` or `list`, optional): Whether to load the time histories, or a list of
+            the history types to load. Must be supplied as a keyword-argument.
+
+    Returns:
+        `list`: The `~pyked.chemked.ChemKED` instances
+    """
+    with HDF5Container(filename) as container:
+        if names is None:
+            names = container.names
+        return [container.load(name, histories=histories) for name in names]
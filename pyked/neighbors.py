@@ -0,0 +1,163 @@
+"""
+Module for finding the datapoints nearest to given experimental conditions
+"""
+import numpy as np
+
+condition_units = {
+    'temperature': 'kelvin',
+    'pressure': 'pascal',
+    'equivalence_ratio': 'dimensionless',
+}
+"""`dict`: The conditions that can be searched, with the SI units they are given in"""
+
+
+def transform_conditions(conditions, fields):
+    """Transform conditions to the coordinates of the search space.
+
+    The temperature is transformed to ``1000/T`` and the pressure to ``ln(P)``, while the
+    equivalence ratio is used as is.
+
+    Arguments:
+        conditions (`dict` or `~numpy.ndarray`): Either a mapping of each field to an array of
+            values, or an array with one column per field. Values are in the SI units of
+            `condition_units`, or are `~pint.Quantity` arrays.
+        fields (`list`): The names of the conditions, in the order of the coordinates
+
+    Returns:
+        `~numpy.ndarray`: Array of coordinates with one row per condition and one column per
+            field
+    """
+    if isinstance(conditions, dict):
+        columns = []
+        for field in fields:
+            values = conditions[field]
+            if hasattr(values, 'to'):
+                values = values.to(condition_units[field]).magnitude
+            columns.append(np.asarray(values, dtype=float))
+        coordinates = np.stack(np.broadcast_arrays(*columns), axis=-1)
+    else:
+        coordinates = np.array(conditions, dtype=float, ndmin=2)
+
+    coordinates = coordinates.reshape(-1, len(fields))
+    for column, field in enumerate(fields):
+        if field == 'temperature':
+            coordinates[:, column] = 1000.0/coordinates[:, column]
+        elif field == 'pressure':
+            coordinates[:, column] = np.log(coordinates[:, column])
+
+    return coordinates
+
+
+def datapoint_conditions(datapoints, fields):
+    """Get the conditions of some datapoints in SI units.
+
+    Arguments:
+        datapoints (`list`): List of `~pyked.chemked.DataPoint` instances
+        fields (`list`): The names of the conditions to get
+
+    Returns:
+        `~numpy.ndarray`: Array with one row per datapoint and one column per field. Conditions
+            that are not given in a datapoint are ``nan``.
+    """
+    conditions = np.full((len(datapoints), len(fields)), np.nan)
+    for row, dp in enumerate(datapoints):
+        for column, field in enumerate(fields):
+            value = getattr(dp, field)
+            if value is None:
+                continue
+            if hasattr(value, 'to'):
+                value = value.to(condition_units[field]).magnitude
+            conditions[row, column] = getattr(value, 'nominal_value', value)
+    return conditions
+
+
+class ConditionIndex(object):
+    """KD-tree of the conditions of a set of datapoints for nearest-neighbor searches.
+
+    The search space has the coordinates ``1000/T``, ``ln(P)``, and equivalence ratio, each
+    divided by a scale so that the coordinates are comparable. Datapoints that are missing one of
+    the conditions are left out of the index. The KD-tree is built with `scipy.spatial.cKDTree`,
+    so SciPy must be installed to use this class.
+
+    Arguments:
+        datapoints (`list`): List of `~pyked.chemked.DataPoint` instances, possibly from several
+            `~pyked.chemked.ChemKED` instances
+        fields (`list`, optional): The conditions to search on, from ``'temperature'``,
+            ``'pressure'``, and ``'equivalence_ratio'``. Defaults to all three.
+        scale (`~numpy.ndarray`, optional): The scale of each coordinate. By default, the
+            standard deviation of each coordinate over the datapoints is used.
+
+    Attributes:
+        datapoints (`list`): The datapoints in the index. Indices returned from queries refer
+            to this list.
+        indices (`~numpy.ndarray`): The index of each of the ``datapoints`` in the input list
+        fields (`list`): The conditions in the search space
+        scale (`~numpy.ndarray`): The scale of each coordinate of the search space
+
+    Examples:
+        >>> index = ConditionIndex(ChemKED(yaml_file).datapoints + ChemKED(other_file).datapoints)
+        >>> distances, indices = index.query({'temperature': [1000.0, 1100.0],
+                                              'pressure': [1.0e6, 2.0e6],
+                                              'equivalence_ratio': [1.0, 1.0]}, k=3)
+    """
+    def __init__(self, datapoints, fields=('temperature', 'pressure', 'equivalence_ratio'),
+                 scale=None):
+        from scipy.spatial import cKDTree
+
+        self.fields = list(fields)
+        unknown = [f for f in self.fields if f not in condition_units]
+        if unknown:
+            raise ValueError('Unknown conditions: {}'.format(', '.join(unknown)))
+
+        coordinates = transform_conditions(datapoint_conditions(datapoints, self.fields),
+                                           self.fields)
+        keep = np.all(np.isfinite(coordinates), axis=1)
+        self.indices = np.flatnonzero(keep)
+        self.datapoints = [datapoints[i] for i in self.indices]
+        coordinates = coordinates[keep]
+        if not len(self.datapoints):
+            raise ValueError('None of the datapoints have all of the conditions')
+
+        if scale is None:
+            scale = coordinates.std(axis=0)
+            scale[scale == 0.0] = 1.0
+        self.scale = np.asarray(scale, dtype=float)
+        self.tree = cKDTree(coordinates/self.scale)
+
+    def __len__(self):
+        return len(self.datapoints)
+
+    def query(self, conditions, k=1, distance_upper_bound=np.inf):
+        """Find the nearest datapoints to each of a batch of conditions.
+
+        Arguments:
+            conditions (`dict` or `~numpy.ndarray`): The conditions to search for, in the format
+                of `transform_conditions`
+            k (`int`, optional): The number of neighbors to find for each condition
+            distance_upper_bound (`float`, optional): Neighbors further than this scaled
+                distance are not returned
+
+        Returns:
+            `tuple`: Arrays of shape ``(n_conditions, k)`` with the scaled distances and the
+                indices in ``datapoints`` of the neighbors. Missing neighbors have an infinite
+                distance and an index equal to the number of datapoints.
+        """
+        points = transform_conditions(conditions, self.fields)/self.scale
+        distances, indices = self.tree.query(points, k=k,
+                                             distance_upper_bound=distance_upper_bound)
+        return distances.reshape(len(points), k), indices.reshape(len(points), k)
+
+    def query_radius(self, conditions, radius):
+        """Find all of the datapoints within a distance of each of a batch of conditions.
+
+        Arguments:
+            conditions (`dict` or `~numpy.ndarray`): The conditions to search for, in the format
+                of `transform_conditions`
+            radius (`float`): The scaled distance to search within
+
+        Returns:
+            `list`: For each condition, a sorted `~numpy.ndarray` of the indices in
+                ``datapoints`` of the datapoints within ``radius``
+        """
+        points = transform_conditions(conditions, self.fields)/self.scale
+        return [np.array(sorted(i), dtype=int) for i in self.tree.query_ball_point(points, radius)]
@@ -0,0 +1,167 @@
+"""
+Module for scoring simulated ignition delays against ChemKED datasets
+"""
+import numpy as np
+
+from .fitting import group_key
+from .uncertainty import UncertainArray
+
+
+class ObjectiveFunction(object):
+    """Objective function comparing simulated ignition delays to a corpus of datasets.
+
+    The log of the experimental ignition delays, their uncertainties, and the groups of the
+    datapoints are computed once, so that each evaluation is only a few vectorized NumPy
+    operations. The objective is
+
+    .. math:: E = \\frac{1}{N_g} \\sum_g \\frac{1}{N_i} \\sum_j
+        \\left(\\frac{\\ln\\tau_{sim,j} - \\ln\\tau_{exp,j}}{\\sigma_j}\\right)^2
+
+    where :math:`N_g` is the number of groups, :math:`N_i` the number of datapoints in a group,
+    and :math:`\\sigma_j` the upper or lower uncertainty of :math:`\\ln\\tau_{exp,j}`, depending
+    on the sign of the residual.
+
+    Arguments:
+        chemkeds (`list`): List of `~pyked.chemked.ChemKED` instances, or a single instance
+        by (`str` or `callable`, optional): How to group the datapoints, as in
+            `~pyked.fitting.group_key`. Must be supplied as a keyword-argument.
+        default_uncertainty (`float`, optional): The relative uncertainty of ignition delays
+            that do not have one. Must be supplied as a keyword-argument.
+
+    Attributes:
+        datapoints (`list`): The datapoints with an ignition delay, in the order that simulated
+            values must be given in
+        groups (`list`): The key of each group
+        group_index (`~numpy.ndarray`): The index in ``groups`` of each datapoint
+        n_points (`~numpy.ndarray`): The number of datapoints in each group
+        target (`~numpy.ndarray`): The natural log of the experimental ignition delays in
+            seconds
+        lower (`~numpy.ndarray`): The lower uncertainties of ``target``. Where the lower bound
+            of the ignition delay is not positive, the lower uncertainty is ``inf``, and
+            simulated ignition delays below the experimental one add nothing to the objective.
+        upper (`~numpy.ndarray`): The upper uncertainties of ``target``
+
+    Examples:
+        >>> objective = ObjectiveFunction([ChemKED(f) for f in yaml_files])
+        >>> objective(simulated_ignition_delays)
+        >>> total, per_group = objective.evaluate(simulated_ignition_delays)
+    """
+    def __init__(self, chemkeds, *, by='file', default_uncertainty=0.1):
+        if not isinstance(chemkeds, (list, tuple)):
+            chemkeds = [chemkeds]
+
+        keys = []
+        datapoints = []
+        for chemked in chemkeds:
+            for dp in chemked.datapoints:
+                datapoints.append(dp)
+                keys.append(group_key(chemked, dp, by))
+
+        tau = UncertainArray.from_chemked(chemkeds, 'ignition_delay', 'second')
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ln_tau = np.log(tau.nominal)
+            # A lower bound at or below zero gives an infinite lower uncertainty
+            ln_lower = np.log(np.maximum(tau.lower_bound, 0.0))
+            ln_upper = np.log(tau.upper_bound)
+        keep = np.isfinite(ln_tau)
+        if not np.any(keep):
+            raise ValueError('None of the datapoints have an ignition delay')
+        self.datapoints = [dp for dp, k in zip(datapoints, keep) if k]
+
+        self.groups = []
+        group_ids = {}
+        group_index = []
+        for key, k in zip(keys, keep):
+            if not k:
+                continue
+            if key not in group_ids:
+                group_ids[key] = len(self.groups)
+                self.groups.append(key)
+            group_index.append(group_ids[key])
+        self.group_index = np.array(group_index, dtype=int)
+        self.n_points = np.bincount(self.group_index, minlength=len(self.groups))
+
+        self.target = ln_tau[keep]
+        lower = self.target - ln_lower[keep]
+        upper = ln_upper[keep] - self.target
+        missing = ~(lower > 0.0)
+        lower[missing] = -np.log1p(-default_uncertainty)
+        missing = ~(upper > 0.0)
+        upper[missing] = np.log1p(default_uncertainty)
+        self.lower = lower
+        self.upper = upper
+
+        self._inverse_lower2 = 1.0/lower**2
+        self._inverse_upper2 = 1.0/upper**2
+        self._point_weights = 1.0/(len(self.groups)*self.n_points[self.group_index])
+        self._order = np.argsort(self.group_index, kind='stable')
+        self._group_starts = np.concatenate([[0], np.cumsum(self.n_points)[:-1]])
+
+    def __len__(self):
+        return len(self.datapoints)
+
+    def _squared_residuals(self, simulated):
+        """Compute the squared normalized residuals of simulated ignition delays in seconds.
+        """
+        if hasattr(simulated, 'to'):
+            simulated = simulated.to('second').magnitude
+        residuals = np.log(simulated) - self.target
+        return residuals*residuals*np.where(residuals >= 0.0, self._inverse_upper2,
+                                            self._inverse_lower2)
+
+    def __call__(self, simulated):
+        """Compute the objective for simulated ignition delays.
+
+        Arguments:
+            simulated (`~numpy.ndarray` or `~pint.Quantity`): The simulated ignition delays, in
+                seconds if not a `~pint.Quantity`, in the order of ``datapoints``. A 2-D array
+                holds one set of simulated ignition delays per row.
+
+        Returns:
+            `float` or `~numpy.ndarray`: The objective, or one objective per row of
+                ``simulated``. Failed simulations given as ``nan`` make the objective ``nan``.
+        """
+        return self._squared_residuals(simulated).dot(self._point_weights)
+
+    def group_objectives(self, simulated):
+        """Compute the contribution of each group to the objective.
+
+        Arguments:
+            simulated (`~numpy.ndarray` or `~pint.Quantity`): The simulated ignition delays, as
+                in `__call__`
+
+        Returns:
+            `~numpy.ndarray`: The mean squared normalized residual of each group, with shape
+                ``simulated.shape[:-1] + (n_groups,)``
+        """
+        squared = self._squared_residuals(simulated)[..., self._order]
+        return np.add.reduceat(squared, self._group_starts, axis=-1)/self.n_points
+
+    def evaluate(self, simulated):
+        """Compute the objective and its breakdown by group together.
+
+        Arguments:
+            simulated (`~numpy.ndarray` or `~pint.Quantity`): The simulated ignition delays, as
+                in `__call__`
+
+        Returns:
+            `tuple`: The objective and the array of `group_objectives`
+        """
+        per_group = self.group_objectives(simulated)
+        return per_group.mean(axis=-1), per_group
+
+    def residuals(self, simulated):
+        """Compute the residuals of simulated ignition delays normalized by the uncertainties.
+
+        Arguments:
+            simulated (`~numpy.ndarray` or `~pint.Quantity`): The simulated ignition delays, as
+                in `__call__`
+
+        Returns:
+            `~numpy.ndarray`: The normalized residuals of the log ignition delays, which are
+                positive where the simulated ignition delay is too long
+        """
+        if hasattr(simulated, 'to'):
+            simulated = simulated.to('second').magnitude
+        residuals = np.log(simulated) - self.target
+        return residuals/np.where(residuals >= 0.0, self.upper, self.lower)
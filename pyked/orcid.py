@@ -1,8 +1,7 @@
 """
 Module for ORCID interaction
 """
-import requests
-headers = {'Accept': 'application/json'}
+from . import client
 
 
 def search_orcid(orcid):
@@ -19,11 +18,11 @@ def search_orcid(orcid):
         `dict`: Dictionary with the JSON response from the API
 
     Raises:
-        `~requests.HTTPError`: If the given ORCID cannot be found, an `~requests.HTTPError`
-            is raised with status code 404
+        `~pyked.client.NotFoundError`: If the given ORCID cannot be found, a
+            `~pyked.client.NotFoundError`, which is a `~requests.HTTPError`, is raised
+        `~pyked.client.LookupRejectedError`: If the request was rejected for another reason,
+            such as missing authorization
+        `~pyked.client.TransientLookupError`: If the lookup failed for any other reason, such as
+            when the network is not available
     """
-    url = 'https://pub.orcid.org/v2.1/{orcid}/person'.format(orcid=orcid)
-    r = requests.get(url, headers=headers)
-    if r.status_code != 200:
-        r.raise_for_status()
-    return r.json()
+    return client.default_client.person(orcid)
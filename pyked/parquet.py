@@ -0,0 +1,343 @@
+"""
+Module for storing ChemKED datasets in Apache Arrow tables and Parquet files
+"""
+# Standard libraries
+import json
+import os
+
+import numpy as np
+
+from .chemked import ChemKED, DataPoint, history_units
+from .validation import property_units
+from .uncertainty import parse_quantities, rcm_fields
+
+table_names = ['datapoints', 'species', 'metadata', 'histories']
+"""`list`: The tables of a dataset, each stored in a Parquet file named ``<table>.parquet``"""
+
+value_fields = DataPoint.value_unit_props + DataPoint.rcm_data_props
+"""`list`: The ChemKED fields stored as float columns of the ``datapoints`` table"""
+
+
+def _column_name(field):
+    return field.replace('-', '_')
+
+
+def dataset_columns(chemkeds):
+    """Get the columns of the tables of some datasets, as described in `to_tables`.
+
+    Arguments:
+        chemkeds (`list`): List of `~pyked.chemked.ChemKED` instances
+
+    Returns:
+        `dict`: Mapping of each of `table_names` to a dictionary of the column names to lists or
+            arrays of the values
+    """
+    dataset = []
+    index = []
+    for number, chemked in enumerate(chemkeds):
+        n_points = len(chemked._properties['datapoints'])
+        dataset.extend([number]*n_points)
+        index.extend(range(n_points))
+    datapoints = {'dataset': np.array(dataset, dtype=np.int32),
+                  'index': np.array(index, dtype=np.int32)}
+
+    all_properties = [p for chemked in chemkeds for p in chemked._properties['datapoints']]
+    for field in value_fields:
+        values = [p.get('rcm-data', {}).get(field) if field in rcm_fields else p.get(field)
+                  for p in all_properties]
+        nominal, _, lower, upper = parse_quantities(values, property_units[field])
+        name = _column_name(field)
+        datapoints[name] = nominal
+        datapoints[name + '_lower'] = lower
+        datapoints[name + '_upper'] = upper
+    datapoints['composition_kind'] = [p['composition']['kind'] for p in all_properties]
+    datapoints['equivalence_ratio'] = np.array(
+        [p.get('equivalence-ratio', np.nan) for p in all_properties], dtype=float)
+    datapoints['ignition_target'] = [p['ignition-type']['target'] for p in all_properties]
+    datapoints['ignition_type'] = [p['ignition-type']['type'] for p in all_properties]
+
+    species = {'dataset': [], 'index': [], 'species_name': [], 'InChI': [], 'SMILES': [],
+               'atomic_composition': [], 'thermo': []}
+    amounts = []
+    for number, position, properties in zip(dataset, index, all_properties):
+        for s in properties['composition']['species']:
+            species['dataset'].append(number)
+            species['index'].append(position)
+            species['species_name'].append(s['species-name'])
+            species['InChI'].append(s.get('InChI'))
+            species['SMILES'].append(s.get('SMILES'))
+            for key in ['atomic-composition', 'thermo']:
+                value = s.get(key)
+                species[_column_name(key)].append(None if value is None else json.dumps(value))
+            amounts.append(s['amount'])
+    species['dataset'] = np.array(species['dataset'], dtype=np.int32)
+    species['index'] = np.array(species['index'], dtype=np.int32)
+    species['amount'], _, species['amount_lower'], species['amount_upper'] = parse_quantities(
+        amounts, 'dimensionless')
+
+    metadata = {'dataset': [], 'key': [], 'value': []}
+    for number, chemked in enumerate(chemkeds):
+        for key, value in chemked._properties.items():
+            if key == 'datapoints':
+                continue
+            metadata['dataset'].append(number)
+            metadata['key'].append(key)
+            metadata['value'].append(json.dumps(value))
+    metadata['dataset'] = np.array(metadata['dataset'], dtype=np.int32)
+
+    histories = {'dataset': [], 'index': [], 'type': [], 'time': [], 'quantity': []}
+    for number, chemked in enumerate(chemkeds):
+        for position, dp in enumerate(chemked.datapoints):
+            for h in DataPoint.history_types:
+                history = getattr(dp, '{}_history'.format(h))
+                if history is None:
+                    continue
+                history_type = h.replace('_', ' ')
+                histories['dataset'].append(number)
+                histories['index'].append(position)
+                histories['type'].append(history_type)
+                histories['time'].append(
+                    np.asarray(history[0].to(property_units['time']).magnitude, dtype=float))
+                histories['quantity'].append(np.asarray(
+                    history[1].to(property_units[history_units[h]]).magnitude,
+                    dtype=float))
+    histories['dataset'] = np.array(histories['dataset'], dtype=np.int32)
+    histories['index'] = np.array(histories['index'], dtype=np.int32)
+
+    return {'datapoints': datapoints, 'species': species, 'metadata': metadata,
+            'histories': histories}
+
+
+def _quantity(value, lower, upper, units):
+    """Build a ChemKED quantity from a value and its deviations, or `None` if it is ``nan``.
+
+    Dimensionless values are given as floats and other values as strings with units.
+    """
+    if np.isnan(value):
+        return None
+
+    def format_value(value):
+        if units == 'dimensionless':
+            return float(value)
+        return '{!r} {}'.format(float(value), units)
+
+    quantity = [format_value(value)]
+    if lower > 0.0 or upper > 0.0:
+        if np.isclose(lower, upper, rtol=1.0e-9, atol=0.0):
+            quantity.append({'uncertainty-type': 'absolute', 'uncertainty': format_value(upper)})
+        else:
+            quantity.append({'uncertainty-type': 'absolute',
+                             'lower-uncertainty': format_value(lower),
+                             'upper-uncertainty': format_value(upper)})
+    return quantity
+
+
+def dataset_properties(columns):
+    """Build the ChemKED dictionaries of datasets from the columns of their tables.
+
+    This is the inverse of `dataset_columns`.
+
+    Arguments:
+        columns (`dict`): Mapping of each of `table_names` to a dictionary of the column names to
+            sequences of the values
+
+    Returns:
+        `list`: The dictionaries in ChemKED format, in the order of the ``dataset`` numbers
+    """
+    datasets = {}
+    metadata = columns['metadata']
+    for number, key, value in zip(metadata['dataset'], metadata['key'], metadata['value']):
+        datasets.setdefault(int(number), {'datapoints': []})[key] = json.loads(value)
+
+    datapoints = columns['datapoints']
+    points = {}
+    for row, (number, position) in enumerate(zip(datapoints['dataset'], datapoints['index'])):
+        properties = {}
+        rcm_data = {}
+        for field in value_fields:
+            name = _column_name(field)
+            quantity = _quantity(datapoints[name][row], datapoints[name + '_lower'][row],
+                                 datapoints[name + '_upper'][row], property_units[field])
+            if quantity is not None:
+                if field in rcm_fields:
+                    rcm_data[field] = quantity
+                else:
+                    properties[field] = quantity
+        if rcm_data:
+            properties['rcm-data'] = rcm_data
+        properties['composition'] = {'kind': datapoints['composition_kind'][row], 'species': []}
+        if not np.isnan(datapoints['equivalence_ratio'][row]):
+            properties['equivalence-ratio'] = float(datapoints['equivalence_ratio'][row])
+        properties['ignition-type'] = {'target': datapoints['ignition_target'][row],
+                                       'type': datapoints['ignition_type'][row]}
+        datasets[int(number)]['datapoints'].append(properties)
+        points[int(number), int(position)] = properties
+
+    species = columns['species']
+    for row, (number, position) in enumerate(zip(species['dataset'], species['index'])):
+        s = {'species-name': species['species_name'][row]}
+        for key in ['InChI', 'SMILES']:
+            if species[key][row] is not None:
+                s[key] = species[key][row]
+        for key in ['atomic-composition', 'thermo']:
+            value = species[_column_name(key)][row]
+            if value is not None:
+                s[key] = json.loads(value)
+        s['amount'] = _quantity(species['amount'][row], species['amount_lower'][row],
+                                species['amount_upper'][row], 'dimensionless')
+        points[int(number), int(position)]['composition']['species'].append(s)
+
+    histories = columns['histories']
+    for row, (number, position) in enumerate(zip(histories['dataset'], histories['index'])):
+        history_type = histories['type'][row]
+        values = np.column_stack([histories['time'][row], histories['quantity'][row]])
+        points[int(number), int(position)].setdefault('time-histories', []).append({
+            'type': history_type,
+            'time': {'units': property_units['time'], 'column': 0},
+            'quantity': {'units': property_units[history_units[history_type.replace(' ', '_')]],
+                         'column': 1},
+            'values': values.tolist(),
+        })
+
+    return [datasets[number] for number in sorted(datasets)]
+
+
+def to_tables(chemkeds):
+    """Convert datasets to Apache Arrow tables.
+
+    The ``datapoints`` table has one row per datapoint, with the ``dataset`` number and
+    ``index`` of the datapoint in its dataset, and one float column per field in the SI units of
+    `~pyked.validation.property_units`, such as ``temperature`` in kelvin. The lower and upper
+    deviations of each field are in the columns like ``temperature_lower`` and
+    ``temperature_upper``, and are zero when there is no uncertainty. Missing values are
+    ``nan`` rather than null, so the columns can be converted to NumPy arrays without copies.
+    The ``species`` table has one row per species of each datapoint, the ``metadata`` table one
+    row per key of each dataset with the value encoded as JSON, and the ``histories`` table one
+    row per time history with list columns of the ``time`` and ``quantity`` in SI units.
+
+    Uncertainties are stored as absolute deviations in SI units, so relative uncertainties and
+    the original units of the values are not kept. The uncertainties of time histories are not
+    stored.
+
+    Arguments:
+        chemkeds (`list`): List of `~pyked.chemked.ChemKED` instances, or a single instance
+
+    Returns:
+        `dict`: Mapping of each of `table_names` to a `pyarrow.Table`
+    """
+    import pyarrow as pa
+
+    if not isinstance(chemkeds, (list, tuple)):
+        chemkeds = [chemkeds]
+    columns = dataset_columns(chemkeds)
+
+    histories = columns['histories']
+    for name in ['time', 'quantity']:
+        histories[name] = pa.array(histories[name], type=pa.list_(pa.float64()))
+
+    units = {_column_name(f): property_units[f] for f in value_fields}
+    tables = {}
+    for name in table_names:
+        table = pa.table(columns[name])
+        if name == 'datapoints':
+            table = table.replace_schema_metadata({'pyked.units': json.dumps(units)})
+        tables[name] = table
+    return tables
+
+
+def from_tables(tables, *, skip_validation=False):
+    """Build datasets from Apache Arrow tables in the format of `to_tables`.
+
+    Arguments:
+        tables (`dict`): Mapping of each of `table_names` to a `pyarrow.Table`
+        skip_validation (`bool`, optional): Whether to skip the validation of the datasets. Must
+            be supplied as a keyword-argument.
+
+    Returns:
+        `list`: The `~pyked.chemked.ChemKED` instances, in the order of their ``dataset`` numbers
+    """
+    import pyarrow as pa
+
+    columns = {}
+    for name in table_names:
+        table = tables[name]
+        columns[name] = {}
+        for column_name in table.column_names:
+            column = table.column(column_name).combine_chunks()
+            if column_name in ['time', 'quantity']:
+                values = column.flatten().to_numpy(zero_copy_only=False)
+                offsets = column.offsets.to_numpy()
+                columns[name][column_name] = [values[start:end] for start, end
+                                              in zip(offsets[:-1], offsets[1:])]
+            elif pa.types.is_floating(column.type) or pa.types.is_integer(column.type):
+                columns[name][column_name] = column.to_numpy()
+            else:
+                columns[name][column_name] = column.to_pylist()
+
+    return [ChemKED(dict_input=properties, skip_validation=skip_validation)
+            for properties in dataset_properties(columns)]
+
+
+def write_parquet(chemkeds, directory, *, compression='zstd'):
+    """Write datasets to Parquet files.
+
+    Each of the tables of `to_tables` is written to a file like ``datapoints.parquet`` in the
+    directory, which is created if needed.
+
+    Arguments:
+        chemkeds (`list`): List of `~pyked.chemked.ChemKED` instances, or a single instance
+        directory (`str`): The directory of the files
+        compression (`str`, optional): The compression codec of the files. Must be supplied as
+            a keyword-argument.
+
+    Examples:
+        >>> write_parquet([ChemKED(f) for f in yaml_files], 'corpus')
+    """
+    import pyarrow.parquet as pq
+
+    os.makedirs(directory, exist_ok=True)
+    for name, table in to_tables(chemkeds).items():
+        pq.write_table(table, os.path.join(directory, name + '.parquet'),
+                       compression=compression)
+
+
+def read_table(directory, name='datapoints', *, columns=None):
+    """Read one of the tables written by `write_parquet`.
+
+    Only the requested columns are read from the file, and float columns can be converted to
+    NumPy arrays or a `~pandas.DataFrame` without copies.
+
+    Arguments:
+        directory (`str`): The directory of the files
+        name (`str`, optional): The name of the table, one of `table_names`
+        columns (`list`, optional): The names of the columns to read. Defaults to all of the
+            columns. Must be supplied as a keyword-argument.
+
+    Returns:
+        `pyarrow.Table`: The table
+
+    Examples:
+        >>> table = read_table('corpus', columns=['temperature', 'ignition_delay'])
+        >>> temperature = table.column('temperature').to_numpy()
+    """
+    import pyarrow.parquet as pq
+
+    return pq.read_table(os.path.join(directory, name + '.parquet'), columns=columns)
+
+
+def read_parquet(directory, *, skip_validation=False):
+    """Read datasets from the Parquet files written by `write_parquet`.
+
+    Arguments:
+        directory (`str`): The directory of the files
+        skip_validation (`bool`, optional): Whether to skip the validation of the datasets. Must
+            be supplied as a keyword-argument.
+
+    Returns:
+        `list`: The `~pyked.chemked.ChemKED` instances
+
+    Examples:
+        >>> chemkeds = read_parquet('corpus')
+    """
+    tables = {name: read_table(directory, name) for name in table_names}
+    return from_tables(tables, skip_validation=skip_validation)
@@ -0,0 +1,181 @@
+"""
+Module for computing the compressed conditions of rapid compression machine experiments
+"""
+from collections import namedtuple
+
+import numpy as np
+
+# Local imports
+from .validation import Q_
+from .composition import get_composition_array, normalize_composition
+from .thermo import NASA7
+
+IsentropicCompression = namedtuple('IsentropicCompression', ['time', 'temperature', 'pressure'])
+IsentropicCompression.__doc__ = 'Temperature and pressure histories of isentropic compression'
+IsentropicCompression.time.__doc__ = """\
+(`~pint.Quantity`) Array of the times of the volume histories, with one row per datapoint padded
+with ``nan`` at the end"""
+IsentropicCompression.temperature.__doc__ = """\
+(`~pint.Quantity`) Array of the temperatures at each time, with the same shape as ``time``"""
+IsentropicCompression.pressure.__doc__ = """\
+(`~pint.Quantity`) Array of the pressures at each time, with the same shape as ``time``"""
+
+
+def get_volume_history(datapoint):
+    """Get the volume history of a datapoint in SI units.
+
+    Both the ``time-histories`` and the deprecated ``volume-history`` forms are supported.
+
+    Arguments:
+        datapoint (`~pyked.chemked.DataPoint`): The datapoint with the volume history
+
+    Returns:
+        `tuple`: The `~numpy.ndarray` of times in seconds and the `~numpy.ndarray` of volumes in
+            cubic meters, or `None` if the datapoint has no volume history
+    """
+    history = datapoint.volume_history
+    if history is None:
+        return None
+    volume = getattr(history, 'quantity', None)
+    if volume is None:
+        volume = history.volume
+    return history.time.to('s').magnitude, volume.to('m**3').magnitude
+
+
+def isentropic_temperature(T_initial, volume_ratio, mole_fractions, thermo, *, rtol=1.0e-10,
+                           max_iterations=50):
+    """Compute the temperature after isentropic compression of ideal gas mixtures.
+
+    The isentropic relation ``s(T)/R - ln(T) = s(T_initial)/R - ln(T_initial) - ln(V/V_initial)``
+    is solved with Newton iterations done simultaneously for every element of the inputs, so
+    many mixtures and many volumes can be handled in a single call.
+
+    Arguments:
+        T_initial (`~numpy.ndarray`): The initial temperatures in Kelvin
+        volume_ratio (`~numpy.ndarray`): The ratio of the volume to the initial volume,
+            broadcastable with ``T_initial``
+        mole_fractions (`~numpy.ndarray`): The mole fractions of the species in ``thermo``, with
+            the species along the last axis, and the other axes broadcastable with ``T_initial``
+        thermo (`~pyked.thermo.NASA7`): Thermodynamic data of the species
+        rtol (`float`, optional): Relative tolerance of the temperature. Must be supplied as a
+            keyword-argument.
+        max_iterations (`int`, optional): Maximum number of Newton iterations. Must be supplied
+            as a keyword-argument.
+
+    Returns:
+        `~numpy.ndarray`: The temperatures in Kelvin after compression, where ``nan`` inputs
+            give ``nan`` temperatures
+    """
+    T_initial = np.asarray(T_initial, dtype=float)
+    volume_ratio = np.asarray(volume_ratio, dtype=float)
+    target = (thermo.mixture_s_R(T_initial, mole_fractions) - np.log(T_initial))
+    target = target - np.log(volume_ratio)
+
+    # Initial guess from the isentropic relation with constant specific heat
+    cv_R = thermo.mixture_cp_R(T_initial, mole_fractions) - 1.0
+    T = T_initial*volume_ratio**(-1.0/cv_R)
+    for _ in range(max_iterations):
+        residual = thermo.mixture_s_R(T, mole_fractions) - np.log(T) - target
+        delta = residual*T/(thermo.mixture_cp_R(T, mole_fractions) - 1.0)
+        T = T - delta
+        with np.errstate(invalid='ignore'):
+            if not np.any(np.abs(delta) > rtol*T):
+                break
+
+    return T
+
+
+def _get_thermo_and_mole_fractions(datapoints, thermo):
+    """Get the thermo data of all the species in the datapoints and their mole fractions.
+    """
+    species_names = get_composition_array(datapoints)[0]
+    if thermo is None:
+        thermo = NASA7.from_datapoints(datapoints, species_names)
+    else:
+        missing = [s for s in species_names if s not in thermo.species_names]
+        if missing:
+            raise ValueError('No thermo data given for species: {}'.format(', '.join(missing)))
+
+    mole_fractions = normalize_composition(datapoints, 'mole fraction', thermo.species_names)[1]
+    return thermo, mole_fractions
+
+
+def isentropic_compression(datapoints, thermo=None):
+    """Compute the isentropic-core temperature and pressure histories of RCM experiments.
+
+    The volume histories of all of the datapoints are padded into a single array so that the
+    whole set is integrated at once. The initial conditions are the ``temperature`` and
+    ``pressure`` of each datapoint.
+
+    Arguments:
+        datapoints (`list`): List of `~pyked.chemked.DataPoint` instances with volume histories
+        thermo (`~pyked.thermo.NASA7`, optional): Thermodynamic data for all of the species in
+            the datapoints. By default, the ``thermo`` field of the species in the datapoints is
+            used.
+
+    Returns:
+        `IsentropicCompression`: The time, temperature, and pressure histories, with one row per
+            datapoint. The rows of datapoints without a volume history are all ``nan``.
+
+    Raises:
+        `ValueError`: If thermo data is not available for one of the species
+    """
+    thermo, mole_fractions = _get_thermo_and_mole_fractions(datapoints, thermo)
+    histories = [get_volume_history(dp) for dp in datapoints]
+    n_times = max([len(h[0]) for h in histories if h is not None] + [0])
+
+    time = np.full((len(datapoints), n_times), np.nan)
+    volume_ratio = np.full((len(datapoints), n_times), np.nan)
+    for row, history in enumerate(histories):
+        if history is not None:
+            time[row, :len(history[0])] = history[0]
+            volume_ratio[row, :len(history[1])] = history[1]/history[1][0]
+
+    T_initial = np.array([dp.temperature.to('K').magnitude for dp in datapoints])
+    P_initial = np.array([dp.pressure.to('Pa').magnitude for dp in datapoints])
+    temperature = isentropic_temperature(T_initial[:, np.newaxis], volume_ratio,
+                                         mole_fractions[:, np.newaxis, :], thermo)
+    pressure = P_initial[:, np.newaxis]*temperature/T_initial[:, np.newaxis]/volume_ratio
+
+    return IsentropicCompression(time=Q_(time, 's'), temperature=Q_(temperature, 'K'),
+                                 pressure=Q_(pressure, 'Pa'))
+
+
+def compressed_conditions(datapoints, thermo=None):
+    """Compute the compressed temperature and pressure of RCM experiments.
+
+    The compressed conditions are found by isentropic compression from the initial
+    ``temperature`` and ``pressure`` of each datapoint to the minimum volume of its volume
+    history. Since the isentropic state depends only on the volume ratio, only the minimum
+    volume is evaluated, which makes this much cheaper than `isentropic_compression`.
+
+    Arguments:
+        datapoints (`list`): List of `~pyked.chemked.DataPoint` instances with volume histories
+        thermo (`~pyked.thermo.NASA7`, optional): Thermodynamic data for all of the species in
+            the datapoints. By default, the ``thermo`` field of the species in the datapoints is
+            used.
+
+    Returns:
+        `tuple`: The compressed temperatures and pressures as `~pint.Quantity` arrays, with
+            ``nan`` for datapoints without a volume history
+
+    Raises:
+        `ValueError`: If thermo data is not available for one of the species
+
+    Example:
+        >>> dataset = ChemKED(yaml_file)
+        >>> T_c, P_c = compressed_conditions(dataset.datapoints)
+    """
+    thermo, mole_fractions = _get_thermo_and_mole_fractions(datapoints, thermo)
+    volume_ratio = np.full(len(datapoints), np.nan)
+    for row, dp in enumerate(datapoints):
+        history = get_volume_history(dp)
+        if history is not None:
+            volume_ratio[row] = history[1].min()/history[1][0]
+
+    T_initial = np.array([dp.temperature.to('K').magnitude for dp in datapoints])
+    P_initial = np.array([dp.pressure.to('Pa').magnitude for dp in datapoints])
+    temperature = isentropic_temperature(T_initial, volume_ratio, mole_fractions, thermo)
+    pressure = P_initial*temperature/T_initial/volume_ratio
+
+    return Q_(temperature, 'K'), Q_(pressure, 'Pa')
@@ -0,0 +1,153 @@
+"""
+Module for sharing ChemKED records with worker processes through shared memory
+"""
+# Standard libraries
+import os
+from collections import namedtuple
+
+import numpy as np
+
+from .chemked import _unpickle_chemked
+
+SharedArray = namedtuple('SharedArray', ['offset', 'dtype', 'shape'])
+SharedArray.__doc__ = 'Location of an array in the shared memory block of a `SharedChemKED`'
+SharedArray.offset.__doc__ = '(`int`): The offset of the array in bytes'
+SharedArray.dtype.__doc__ = '(`str`): The data type of the array'
+SharedArray.shape.__doc__ = '(`tuple`): The shape of the array'
+
+alignment = 64
+"""`int`: The alignment in bytes of the arrays in the shared memory block"""
+
+
+def _map_arrays(value, function):
+    """Apply a function to each array or `SharedArray` in nested dictionaries, lists, and tuples.
+    """
+    if isinstance(value, (np.ndarray, SharedArray)):
+        return function(value)
+    elif isinstance(value, dict):
+        return {k: _map_arrays(v, function) for k, v in value.items()}
+    elif isinstance(value, list):
+        return [_map_arrays(v, function) for v in value]
+    elif isinstance(value, tuple):
+        items = [_map_arrays(v, function) for v in value]
+        return type(value)(*items) if hasattr(value, '_fields') else tuple(items)
+    return value
+
+
+class SharedChemKED(object):
+    """ChemKED records with their arrays in a block of shared memory.
+
+    The time histories and the columns of the datapoint fields of the records are copied once
+    into a `multiprocessing.shared_memory.SharedMemory` block. Pickling an instance only sends
+    the name of the block and the small remaining state, so it can be passed to the workers of
+    a `multiprocessing.Pool` cheaply, and `attach` builds `~pyked.chemked.ChemKED` instances
+    whose time histories are read-only views of the shared memory rather than copies.
+
+    The process that creates the instance owns the block, and must `unlink` it when the workers
+    are done, such as by using the instance as a context manager. Python 3.8 or later is needed.
+
+    Arguments:
+        chemkeds (`list`): List of `~pyked.chemked.ChemKED` instances, or a single instance
+
+    Examples:
+        >>> with SharedChemKED(chemkeds) as shared:
+        ...     results = pool.map(work, [shared]*n_workers)
+
+        where ``work`` calls ``shared.attach()`` to get the records.
+    """
+    def __init__(self, chemkeds):
+        from multiprocessing import shared_memory
+
+        if not isinstance(chemkeds, (list, tuple)):
+            chemkeds = [chemkeds]
+        states = [chemked.__reduce__()[1][0] for chemked in chemkeds]
+
+        arrays = []
+        size = 0
+
+        def place(array):
+            nonlocal size
+            array = np.ascontiguousarray(array)
+            if array.dtype.hasobject:
+                return array
+            offset = -(-size//alignment)*alignment
+            size = offset + array.nbytes
+            arrays.append((offset, array))
+            return SharedArray(offset=offset, dtype=array.dtype.str, shape=array.shape)
+
+        self._states = _map_arrays(states, place)
+        self._shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        for offset, array in arrays:
+            self._shm.buf[offset:offset + array.nbytes] = array.tobytes()
+        self.name = self._shm.name
+        self.size = size
+        self._owner = os.getpid()
+
+    def __getstate__(self):
+        return {'name': self.name, 'size': self.size, '_states': self._states,
+                '_owner': self._owner}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.unlink()
+
+    def __len__(self):
+        return len(self._states)
+
+    def _attach_memory(self):
+        """Open the shared memory block in this process, if it is not open yet.
+        """
+        import multiprocessing
+        from multiprocessing import shared_memory
+
+        if self._shm is not None:
+            return self._shm
+        try:
+            self._shm = shared_memory.SharedMemory(name=self.name, track=False)
+        except TypeError:
+            self._shm = shared_memory.SharedMemory(name=self.name)
+            # Before Python 3.13, attaching registers the block with the resource tracker. The
+            # workers of multiprocessing share the tracker of the process that created the
+            # block, but any other process has its own tracker, which would unlink the block
+            # when that process exits
+            if multiprocessing.parent_process() is None and os.getpid() != self._owner:
+                from multiprocessing import resource_tracker
+
+                resource_tracker.unregister(self._shm._name, 'shared_memory')
+        return self._shm
+
+    def attach(self):
+        """Build the records, with their time histories as views of the shared memory.
+
+        The values of the time histories in the ``_properties`` of the records are views of the
+        shared memory too, and are only converted to lists when the records are written.
+
+        Returns:
+            `list`: The `~pyked.chemked.ChemKED` instances
+        """
+        buffer = self._attach_memory().buf
+
+        def view(location):
+            if not isinstance(location, SharedArray):
+                return location
+            array = np.ndarray(location.shape, dtype=np.dtype(location.dtype), buffer=buffer,
+                               offset=location.offset)
+            array.flags.writeable = False
+            return array
+
+        return [_unpickle_chemked(state, history_lists=False)
+                for state in _map_arrays(self._states, view)]
+
+    def unlink(self):
+        """Free the shared memory block. Only the process that created the block may do this.
+        """
+        if os.getpid() != self._owner:
+            raise RuntimeError('Only the process that created the shared memory may unlink it')
+        self._shm.close()
+        self._shm.unlink()
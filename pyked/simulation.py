@@ -0,0 +1,381 @@
+"""
+Module for turning ChemKED datasets into simulation tasks and running them in parallel
+"""
+# Standard libraries
+import json
+import os
+from collections import namedtuple
+from functools import partial
+from multiprocessing import Pool
+
+import numpy as np
+
+# Local imports
+from .cache import task_key
+from .catalog import file_hash
+from .rcm import get_volume_history
+
+SimulationTask = namedtuple('SimulationTask',
+                            ['key', 'dataset', 'index', 'experiment_type', 'apparatus',
+                             'temperature', 'pressure', 'composition', 'composition_type',
+                             'ignition_target', 'ignition_type', 'volume_history', 'end_time'])
+SimulationTask.__doc__ = 'Independent reactor simulation of a single datapoint'
+SimulationTask.key.__doc__ = '(`str`) Unique key of the task, ``"dataset:index"``'
+SimulationTask.dataset.__doc__ = '(`int`) The index of the dataset in the input list'
+SimulationTask.index.__doc__ = '(`int`) The index of the datapoint in the dataset'
+SimulationTask.experiment_type.__doc__ = '(`str`) The type of experiment'
+SimulationTask.apparatus.__doc__ = '(`str`) The kind of experimental apparatus'
+SimulationTask.temperature.__doc__ = '(`float`) The initial temperature in Kelvin'
+SimulationTask.pressure.__doc__ = '(`float`) The initial pressure in pascal'
+SimulationTask.composition.__doc__ = ('(`str`) The composition in the ``SPEC:AMT, SPEC:AMT`` '
+                                      'format of Cantera')
+SimulationTask.composition_type.__doc__ = ('(`str`) Either ``"mole"`` or ``"mass"``, the basis '
+                                           'of ``composition``')
+SimulationTask.ignition_target.__doc__ = '(`str`) The target used to detect ignition'
+SimulationTask.ignition_type.__doc__ = '(`str`) The type of ignition detection'
+SimulationTask.volume_history.__doc__ = ('(`tuple`) Arrays of the time in seconds and volume in '
+                                         'cubic meters, or `None`')
+SimulationTask.end_time.__doc__ = ('(`float`) The time in seconds to simulate until, or `None` '
+                                   'if not known')
+
+SimulationResult = namedtuple('SimulationResult', ['key', 'ignition_delay', 'status', 'message'])
+SimulationResult.__doc__ = 'Result of a simulation task'
+SimulationResult.key.__doc__ = '(`str`) The key of the task'
+SimulationResult.ignition_delay.__doc__ = ('(`float`) The simulated ignition delay in seconds, or '
+                                           '``nan`` if there was no ignition')
+SimulationResult.status.__doc__ = '(`str`) Either ``"ok"`` or ``"failed"``'
+SimulationResult.message.__doc__ = '(`str`) The error message of a failed task'
+
+
+def _nominal(quantity, units):
+    """Get the nominal magnitude of a quantity, possibly with uncertainty, in the given units.
+    """
+    magnitude = quantity.to(units).magnitude
+    return float(getattr(magnitude, 'nominal_value', magnitude))
+
+
+def tasks_from_chemked(chemkeds, *, species_conversion=None, end_time_factor=10.0):
+    """Create one simulation task for each datapoint of some datasets.
+
+    The tasks only hold plain Python and NumPy data, so they can be sent to other processes.
+
+    Arguments:
+        chemkeds (`list`): List of `~pyked.chemked.ChemKED` instances, or a single instance
+        species_conversion (`dict`, optional): Mapping of species identifiers to the names in
+            the mechanism, as in `~pyked.chemked.DataPoint.get_cantera_composition_string`.
+            Must be supplied as a keyword-argument.
+        end_time_factor (`float`, optional): The end time of each task is this factor times the
+            experimental ignition delay, or the end of the volume history if that is later.
+            Must be supplied as a keyword-argument.
+
+    Returns:
+        `list`: List of `SimulationTask`
+    """
+    if not isinstance(chemkeds, (list, tuple)):
+        chemkeds = [chemkeds]
+
+    tasks = []
+    for dataset, chemked in enumerate(chemkeds):
+        for index, dp in enumerate(chemked.datapoints):
+            conversion = None if species_conversion is None else dict(species_conversion)
+            composition = dp.get_cantera_composition_string(conversion)
+            ignition_type = dp.ignition_type or {}
+            volume_history = get_volume_history(dp)
+
+            end_time = None
+            if dp.ignition_delay is not None:
+                end_time = end_time_factor*_nominal(dp.ignition_delay, 's')
+            if volume_history is not None:
+                end_time = max(end_time or 0.0, volume_history[0][-1])
+
+            tasks.append(SimulationTask(
+                key='{}:{}'.format(dataset, index),
+                dataset=dataset,
+                index=index,
+                experiment_type=chemked.experiment_type,
+                apparatus=chemked.apparatus.kind,
+                temperature=_nominal(dp.temperature, 'K'),
+                pressure=_nominal(dp.pressure, 'Pa'),
+                composition=composition,
+                composition_type='mass' if dp.composition_type == 'mass fraction' else 'mole',
+                ignition_target=ignition_type.get('target'),
+                ignition_type=ignition_type.get('type'),
+                volume_history=volume_history,
+                end_time=end_time,
+            ))
+    return tasks
+
+
+class Solver(object):
+    """Interface for solvers that simulate `SimulationTask` instances.
+
+    Subclasses implement `solve`, and may override `cost` to improve load balancing. Solvers
+    are sent to worker processes, so they must be picklable; any expensive setup, such as
+    loading a mechanism, should be done lazily in `solve` and cached on the instance. Solvers
+    that use a mechanism file should store its path in a ``mechanism`` attribute, so that
+    cached results are invalidated when the file changes.
+    """
+    def solve(self, task):
+        """Simulate a task.
+
+        Arguments:
+            task (`SimulationTask`): The task to simulate
+
+        Returns:
+            `float`: The simulated ignition delay in seconds, or ``nan`` if there was no
+                ignition
+        """
+        raise NotImplementedError
+
+    def cost(self, task):
+        """Estimate the relative cost of simulating a task.
+
+        By default, tasks with a volume history are taken to cost more in proportion to the
+        length of the history.
+
+        Arguments:
+            task (`SimulationTask`): The task
+
+        Returns:
+            `float`: The estimated cost
+        """
+        if task.volume_history is None:
+            return 1.0
+        return 1.0 + 0.01*len(task.volume_history[0])
+
+    def cache_settings(self):
+        """Get the settings of the solver that affect its results, for keys of cached results.
+
+        By default, these are the name of the class, the public attributes that are numbers,
+        strings, or `None`, and the hash of the contents of the ``mechanism`` file, if any.
+        Subclasses with other settings should extend this method.
+
+        Returns:
+            `dict`: The settings
+        """
+        settings = {'solver': '{}.{}'.format(type(self).__module__, type(self).__name__)}
+        for name, value in vars(self).items():
+            if not name.startswith('_') and isinstance(value, (int, float, str, type(None))):
+                settings[name] = value
+        mechanism = getattr(self, 'mechanism', None)
+        if mechanism is not None:
+            settings['mechanism_hash'] = file_hash(mechanism)
+        return settings
+
+
+class DummySolver(Solver):
+    """Pure NumPy stand-in for a kinetics solver.
+
+    The ignition delay is found from the Livengood-Wu integral of a one-step correlation,
+    ``tau = A*exp(Ea_R/T)*P**n``, along the temperature and pressure of isentropic compression
+    of an ideal gas with a constant ratio of specific heats. Its cost grows with the number of
+    time steps, so it can be used to test and benchmark schedulers without Cantera.
+
+    Arguments:
+        A (`float`, optional): Pre-exponential factor in seconds and pascal
+        Ea_R (`float`, optional): Activation temperature in Kelvin
+        n (`float`, optional): Pressure exponent
+        gamma (`float`, optional): Ratio of specific heats
+        n_steps (`int`, optional): Number of time steps
+    """
+    def __init__(self, A=1.0e-8, Ea_R=15000.0, n=-0.5, gamma=1.4, n_steps=10000):
+        self.A = A
+        self.Ea_R = Ea_R
+        self.n = n
+        self.gamma = gamma
+        self.n_steps = n_steps
+
+    def correlation(self, temperature, pressure):
+        """Evaluate the ignition delay correlation in seconds.
+        """
+        return self.A*np.exp(self.Ea_R/temperature)*pressure**self.n
+
+    def solve(self, task):
+        """Simulate a task with the Livengood-Wu integral.
+        """
+        end_time = task.end_time
+        if end_time is None:
+            end_time = 10.0*self.correlation(task.temperature, task.pressure)
+        time = np.linspace(0.0, end_time, self.n_steps)
+
+        if task.volume_history is None:
+            volume_ratio = np.ones_like(time)
+        else:
+            history_time, volume = task.volume_history
+            volume_ratio = np.interp(time, history_time, volume/volume[0])
+        temperature = task.temperature*volume_ratio**(1.0 - self.gamma)
+        pressure = task.pressure*volume_ratio**(-self.gamma)
+
+        rate = 1.0/self.correlation(temperature, pressure)
+        integral = np.concatenate([[0.0], np.cumsum(0.5*(rate[1:] + rate[:-1])*np.diff(time))])
+        if integral[-1] < 1.0:
+            return np.nan
+        return float(np.interp(1.0, integral, time))
+
+
+def _run_task(solver, task):
+    """Run one task, catching errors so that a single failure does not stop the run.
+    """
+    try:
+        return SimulationResult(task.key, float(solver.solve(task)), 'ok', '')
+    except Exception as e:
+        return SimulationResult(task.key, np.nan, 'failed', '{}: {}'.format(type(e).__name__, e))
+
+
+def _run_chunk(solver, chunk):
+    """Run a chunk of tasks in a worker process.
+    """
+    return [_run_task(solver, task) for task in chunk]
+
+
+def read_checkpoint(filename):
+    """Read the results saved in a checkpoint file.
+
+    Arguments:
+        filename (`str`): Path to the checkpoint file, with one JSON result per line
+
+    Returns:
+        `dict`: Mapping of the content-addressed keys of the tasks, from `~pyked.cache.task_key`
+            with the settings of the solver, to `SimulationResult`. Empty if the file does not
+            exist.
+    """
+    results = {}
+    if not os.path.exists(filename):
+        return results
+    with open(filename, 'r') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+                key = record.pop('task_key')
+                result = SimulationResult(**record)
+            except (ValueError, TypeError, KeyError):
+                # An incomplete last line from an interrupted run, or a line without the key
+                # of its task from an older version
+                continue
+            results[key] = result
+    return results
+
+
+def schedule_tasks(tasks, solver, chunksize):
+    """Order tasks from the most to the least expensive and split them into chunks.
+
+    Running the most expensive chunks first keeps the workers evenly loaded at the end of a run.
+
+    Arguments:
+        tasks (`list`): List of `SimulationTask`
+        solver (`Solver`): The solver that estimates the cost of each task
+        chunksize (`int`): The number of tasks per chunk
+
+    Returns:
+        `list`: List of chunks, each a list of tasks
+    """
+    costs = np.array([solver.cost(task) for task in tasks])
+    order = np.argsort(-costs, kind='stable')
+    ordered = [tasks[i] for i in order]
+    return [ordered[i:i + chunksize] for i in range(0, len(ordered), chunksize)]
+
+
+def run_tasks(tasks, solver, *, processes=None, chunksize=None, checkpoint=None, cache=None):
+    """Run simulation tasks with a solver, in parallel worker processes.
+
+    Tasks are ordered by their estimated cost and sent to the workers in chunks. Each result
+    is appended to the ``checkpoint`` file as soon as it arrives, and tasks that already have a
+    result in that file are not run again, so an interrupted run can be resumed by calling this
+    function again. The results in the file are keyed by the conditions of the tasks and the
+    settings of the solver rather than by their positions, so datasets may be added, removed,
+    or reordered between runs. Successful results are also stored in the
+    ``cache``, keyed by the conditions of each task and the settings of the solver, so that
+    tasks whose conditions did not change since an earlier run are not simulated again.
+
+    Arguments:
+        tasks (`list`): List of `SimulationTask`
+        solver (`Solver`): The solver to run the tasks with
+        processes (`int`, optional): The number of worker processes. Defaults to the number of
+            CPUs. With ``1``, the tasks are run in this process. Must be supplied as a
+            keyword-argument.
+        chunksize (`int`, optional): The number of tasks sent to a worker at a time. Defaults
+            to a quarter of the tasks per worker. Must be supplied as a keyword-argument.
+        checkpoint (`str`, optional): Path to a file to save results to and resume from.
+            Must be supplied as a keyword-argument.
+        cache (`~pyked.cache.LRUCache`, optional): Cache of results from earlier runs.
+            Must be supplied as a keyword-argument.
+
+    Returns:
+        `list`: List of `SimulationResult`, in the order of ``tasks``
+
+    Examples:
+        >>> tasks = tasks_from_chemked([ChemKED(f) for f in yaml_files])
+        >>> results = run_tasks(tasks, DummySolver(), checkpoint='results.jsonl')
+    """
+    task_keys = {}
+    if checkpoint is not None or cache is not None:
+        settings = solver.cache_settings()
+        task_keys = {task.key: task_key(task, settings) for task in tasks}
+
+    results = {}
+    if checkpoint is not None:
+        saved = read_checkpoint(checkpoint)
+        for task in tasks:
+            if task_keys[task.key] in saved:
+                results[task.key] = saved[task_keys[task.key]]._replace(key=task.key)
+    remaining = [task for task in tasks if task.key not in results]
+
+    hits = []
+    if cache is not None:
+        uncached = []
+        for task in remaining:
+            cached = cache.get(task_keys[task.key])
+            if cached is None:
+                uncached.append(task)
+            else:
+                hits.append(SimulationResult(task.key, **cached))
+        remaining = uncached
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if chunksize is None:
+        chunksize = max(1, len(remaining)//(4*processes))
+    chunks = schedule_tasks(remaining, solver, chunksize)
+
+    checkpoint_file = None
+    if checkpoint is not None:
+        incomplete = False
+        if os.path.exists(checkpoint) and os.path.getsize(checkpoint) > 0:
+            with open(checkpoint, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                incomplete = f.read(1) != b'\n'
+        checkpoint_file = open(checkpoint, 'a')
+        # Start a new line after an incomplete line from an interrupted run
+        if incomplete:
+            checkpoint_file.write('\n')
+    try:
+        _collect([hits], results, checkpoint_file, None, task_keys)
+        if processes == 1 or len(chunks) <= 1:
+            finished = map(partial(_run_chunk, solver), chunks)
+            _collect(finished, results, checkpoint_file, cache, task_keys)
+        else:
+            with Pool(processes) as pool:
+                finished = pool.imap_unordered(partial(_run_chunk, solver), chunks)
+                _collect(finished, results, checkpoint_file, cache, task_keys)
+    finally:
+        if checkpoint_file is not None:
+            checkpoint_file.close()
+
+    return [results[task.key] for task in tasks]
+
+
+def _collect(finished, results, checkpoint_file, cache, task_keys):
+    """Store the results of finished chunks, and save them to the checkpoint file and cache.
+    """
+    for chunk in finished:
+        for result in chunk:
+            results[result.key] = result
+            if cache is not None and result.status == 'ok':
+                value = result._asdict()
+                del value['key']
+                cache.set(task_keys[result.key], value)
+            if checkpoint_file is not None:
+                record = dict(result._asdict(), task_key=task_keys[result.key])
+                checkpoint_file.write(json.dumps(record) + '\n')
+        if checkpoint_file is not None:
+            checkpoint_file.flush()
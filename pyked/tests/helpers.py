@@ -0,0 +1,28 @@
+"""
+Records and helpers shared by the tests of the columnar formats
+"""
+# Standard libraries
+import pkg_resources
+import warnings
+
+# Third-party libraries
+import pytest
+
+# Local imports
+from ..chemked import ChemKED
+
+test_files = ['testfile_st.yaml', 'testfile_rcm.yaml', 'testfile_rcm2.yaml',
+              'testfile_uncertainty.yaml', 'testfile_st_thermo.yaml']
+
+
+@pytest.fixture(scope='module')
+def chemkeds():
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        return [ChemKED(pkg_resources.resource_filename(__name__, f)) for f in test_files]
+
+
+def nominal_and_std(quantity, units):
+    magnitude = quantity.to(units).magnitude
+    return (getattr(magnitude, 'nominal_value', magnitude),
+            getattr(magnitude, 'std_dev', 0.0))
@@ -0,0 +1,109 @@
+"""
+Test module for aio.py
+"""
+# Standard libraries
+import asyncio
+
+# Third-party libraries
+import pytest
+
+# Local imports
+from ..aio import AsyncLookup
+from ..cache import MemoryCache
+from ..chemked import ChemKED
+from ..client import LookupClient, OfflineClient
+from ..validation import yaml, ValidationProfile
+from .test_client import server, add_file  # noqa: F401
+
+pytest.importorskip('aiohttp')
+
+
+def run(server, function, **kwargs):
+    """Run a coroutine function with a lookup client for the stub server.
+    """
+    async def main():
+        client = LookupClient(crossref_url=server.url + 'works/', orcid_url=server.url,
+                              backoff=0.01, **kwargs)
+        async with AsyncLookup(client) as lookup:
+            return await function(lookup)
+    return asyncio.run(main())
+
+
+class TestAsyncValidation(object):
+    """
+    """
+    def test_avalidate_many(self, server):
+        filenames = [add_file(server, name) for name in ['testfile_st.yaml', 'testfile_rcm.yaml']]
+        chemkeds = run(server, lambda lookup: ChemKED.avalidate_many(
+            filenames, lookup=lookup, compact=True))
+        for chemked, filename in zip(chemkeds, filenames):
+            expected = ChemKED(filename, skip_validation=True)
+            assert len(chemked.datapoints) == len(expected.datapoints)
+            assert chemked.reference == expected.reference
+            assert chemked.datapoints[0].temperature == expected.datapoints[0].temperature
+        # The ORCID shared by the files is only looked up once
+        assert len(server.requests) == len(set(server.requests)) == 4
+
+    def test_validation_options(self, server):
+        filename = add_file(server, 'testfile_st.yaml')
+        cache = MemoryCache()
+        profile = ValidationProfile()
+        chemkeds = run(server, lambda lookup: ChemKED.avalidate_many(
+            [filename, filename], lookup=lookup, validation_cache=cache,
+            validation_profile=profile, compact=True))
+        assert len(chemkeds[1].datapoints) == 5
+        assert len(cache) == 8
+        assert profile.report()['documents'] >= 1
+
+    def test_retry(self, server):
+        filename = add_file(server, 'testfile_st.yaml')
+        path = '/works/10.1016/j.ijhydene.2007.04.008'
+        server.responses[path] = [(429, {}), (503, {})] + server.responses[path]
+        chemked = run(server, lambda lookup: ChemKED.avalidate(filename, lookup=lookup))
+        assert chemked.reference.year == 2007
+        assert server.requests.count(path) == 3
+
+    def test_not_found(self, server):
+        filename = add_file(server, 'testfile_st.yaml', doi_responses=[(404, {})])
+        with pytest.raises(ValueError) as excinfo:
+            run(server, lambda lookup: ChemKED.avalidate(filename, lookup=lookup))
+        assert 'DOI not found' in str(excinfo.value)
+
+        results = run(server, lambda lookup: ChemKED.avalidate_many(
+            [filename], lookup=lookup, return_exceptions=True))
+        assert isinstance(results[0], ValueError)
+
+    def test_transient_failure(self, server):
+        filename = add_file(server, 'testfile_st.yaml', doi_responses=[(503, {})])
+        with pytest.warns(UserWarning) as record:
+            chemked = run(server, lambda lookup: ChemKED.avalidate(filename, lookup=lookup),
+                          retries=2)
+        assert str(record.pop(UserWarning).message) == (
+            'network not available, DOI not validated.')
+        assert len(chemked.datapoints) == 5
+        assert server.requests.count('/works/10.1016/j.ijhydene.2007.04.008') == 3
+
+    def test_invalid_file(self, server):
+        filename = add_file(server, 'testfile_st.yaml')
+        with open(filename, 'r') as f:
+            properties = yaml.safe_load(f)
+        properties['reference']['year'] = 2010
+        with pytest.raises(ValueError) as excinfo:
+            run(server, lambda lookup: ChemKED.avalidate(dict_input=properties, lookup=lookup))
+        assert 'year should be 2007' in str(excinfo.value)
+
+    def test_offline(self, server):
+        filename = add_file(server, 'testfile_st.yaml')
+        snapshot = {'doi': {'10.1016/j.ijhydene.2007.04.008': {'message': server.responses[
+            '/works/10.1016/j.ijhydene.2007.04.008'][0][1]['message']}}}
+
+        async def validate():
+            async with AsyncLookup(OfflineClient(snapshot)) as lookup:
+                return await ChemKED.avalidate(filename, lookup=lookup)
+
+        with pytest.warns(UserWarning) as record:
+            chemked = asyncio.run(validate())
+        assert str(record.pop(UserWarning).message) == (
+            'network not available, ORCID not validated.')
+        assert chemked.reference.year == 2007
+        assert server.requests == []
@@ -0,0 +1,62 @@
+"""
+Test module for bundle.py
+"""
+# Standard libraries
+import os
+import pkg_resources
+import warnings
+from tempfile import TemporaryDirectory
+
+# Third-party libraries
+import pytest
+
+# Local imports
+from ..bundle import Bundle, build_index, index_filename, iter_bundle, read_index, write_bundle
+from ..chemked import ChemKED
+
+test_files = ['testfile_st.yaml', 'testfile_rcm.yaml', 'testfile_st2.yaml']
+
+
+@pytest.fixture(scope='module')
+def chemkeds():
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        return [ChemKED(pkg_resources.resource_filename(__name__, f)) for f in test_files]
+
+
+class TestBundle(object):
+    """
+    """
+    def test_iter_bundle(self, chemkeds):
+        with TemporaryDirectory() as temp_dir:
+            filename = os.path.join(temp_dir, 'bundle.yaml')
+            write_bundle(chemkeds, filename)
+            loaded = list(iter_bundle(filename, skip_validation=True))
+        assert [c._properties for c in loaded] == [c._properties for c in chemkeds]
+
+    def test_random_access(self, chemkeds):
+        with TemporaryDirectory() as temp_dir:
+            filename = os.path.join(temp_dir, 'bundle.yaml')
+            offsets = write_bundle(chemkeds[:2], filename)
+            assert offsets[0] == 0
+            assert write_bundle(chemkeds[2], filename, mode='a')[:2] == offsets
+
+            bundle = Bundle(filename, skip_validation=True)
+            assert len(bundle) == 3
+            assert bundle[1]._properties == chemkeds[1]._properties
+            assert bundle[-1]._properties == chemkeds[2]._properties
+            with pytest.raises(IndexError):
+                bundle[3]
+
+    def test_index_rebuild(self, chemkeds):
+        with TemporaryDirectory() as temp_dir:
+            filename = os.path.join(temp_dir, 'bundle.yaml')
+            offsets = write_bundle(chemkeds, filename)
+            os.remove(index_filename(filename))
+            assert read_index(filename) == offsets
+            assert os.path.exists(index_filename(filename))
+
+            # A bundle written by hand, where the first document has no marker
+            with open(filename, 'w') as f:
+                f.write('# comment\na: 1\n---\nb: 2\n--- \nc: 3\n')
+            assert read_index(filename) == build_index(filename) == [0, 15, 24]
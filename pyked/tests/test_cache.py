@@ -0,0 +1,138 @@
+"""
+Test module for cache.py
+"""
+# Standard libraries
+import os
+from tempfile import TemporaryDirectory
+
+# Third-party libraries
+import numpy as np
+import pytest
+
+# Local imports
+from ..cache import DiskCache, MemoryCache, task_key
+from ..simulation import DummySolver, run_tasks
+from .test_simulation import CountingSolver, chemkeds, tasks  # noqa: F401
+
+
+class TestTaskKey(object):
+    """
+    """
+    def test_position_independent(self, tasks):
+        moved = tasks[0]._replace(key='5:3', dataset=5, index=3)
+        assert task_key(moved) == task_key(tasks[0])
+
+    def test_conditions(self, tasks):
+        keys = {task_key(t) for t in tasks}
+        assert len(keys) == len(tasks)
+        changed = tasks[0]._replace(temperature=tasks[0].temperature + 1.0e-9)
+        assert task_key(changed) != task_key(tasks[0])
+
+        time, volume = tasks[5].volume_history
+        changed = tasks[5]._replace(volume_history=(time, volume*(1.0 + 1.0e-12)))
+        assert task_key(changed) != task_key(tasks[5])
+        same = tasks[5]._replace(volume_history=(time.copy(), volume.copy()))
+        assert task_key(same) == task_key(tasks[5])
+
+    def test_settings(self, tasks):
+        assert task_key(tasks[0], {'A': 1.0}) != task_key(tasks[0], {'A': 2.0})
+        assert (task_key(tasks[0], DummySolver().cache_settings()) !=
+                task_key(tasks[0], DummySolver(n_steps=10).cache_settings()))
+
+
+class TestCaches(object):
+    """
+    """
+    def test_memory_lru(self):
+        cache = MemoryCache(max_entries=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        assert cache.get('a') == 1
+        cache.set('c', 3)
+        assert 'b' not in cache
+        assert cache.get('b', 'missing') == 'missing'
+        assert len(cache) == 2
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_memory_size(self):
+        cache = MemoryCache(max_bytes=10)
+        cache.set('a', 'abc')
+        assert cache.size == len('"abc"')
+        cache.set('b', 'defg')
+        assert 'a' not in cache
+        assert cache.size == len('"defg"')
+        cache.set('c', 'hi')
+        assert len(cache) == 2
+        # Replacing a value replaces its size
+        cache.set('c', 'h')
+        assert cache.size == len('"defg"') + len('"h"')
+        cache.clear()
+        assert cache.size == 0
+
+    def test_disk_persistence(self):
+        with TemporaryDirectory() as temp_dir:
+            cache = DiskCache(temp_dir)
+            cache.set('aa11', {'ignition_delay': np.nan, 'status': 'ok'})
+            cache.set('bb22', {'ignition_delay': 1.0e-3, 'status': 'ok'})
+            os.utime(cache._path('aa11'), (1.0, 1.0))
+            os.utime(cache._path('bb22'), (2.0, 2.0))
+
+            cache = DiskCache(temp_dir, max_entries=1)
+            assert len(cache) == 1
+            assert cache.size == os.path.getsize(cache._path('bb22'))
+            assert 'aa11' not in cache
+            assert not os.path.exists(cache._path('aa11'))
+            assert cache.get('bb22') == {'ignition_delay': 1.0e-3, 'status': 'ok'}
+
+            cache.clear()
+            assert len(DiskCache(temp_dir)) == 0
+
+
+class TestCachedRuns(object):
+    """
+    """
+    def test_incremental_run(self, tasks):
+        cache = MemoryCache()
+        solver = CountingSolver()
+        first = run_tasks(tasks, solver, processes=1, cache=cache)
+        assert len(solver.solved) == len(tasks)
+        assert len(cache) == len(tasks)
+
+        changed = list(tasks)
+        changed[2] = changed[2]._replace(temperature=1300.0)
+        solver = CountingSolver()
+        second = run_tasks(changed, solver, processes=1, cache=cache)
+        assert solver.solved == ['0:2']
+        assert second[:2] == first[:2]
+        assert second[2] != first[2]
+
+    def test_cache_hits_checkpointed(self, tasks):
+        cache = MemoryCache()
+        run_tasks(tasks, CountingSolver(), processes=1, cache=cache)
+        with TemporaryDirectory() as temp_dir:
+            checkpoint = os.path.join(temp_dir, 'results.jsonl')
+            solver = CountingSolver()
+            first = run_tasks(tasks, solver, processes=1, cache=cache, checkpoint=checkpoint)
+            assert solver.solved == []
+
+            solver = CountingSolver()
+            assert run_tasks(tasks, solver, processes=1, checkpoint=checkpoint) == first
+            assert solver.solved == []
+
+    def test_mechanism_change(self, tasks):
+        with TemporaryDirectory() as temp_dir:
+            mechanism = os.path.join(temp_dir, 'mech.yaml')
+            with open(mechanism, 'w') as f:
+                f.write('reactions: []\n')
+            cache = DiskCache(os.path.join(temp_dir, 'cache'))
+            run_tasks(tasks, CountingSolver(mechanism), processes=1, cache=cache)
+
+            solver = CountingSolver(mechanism)
+            run_tasks(tasks, solver, processes=1, cache=DiskCache(cache.directory))
+            assert solver.solved == []
+
+            with open(mechanism, 'w') as f:
+                f.write('reactions: [changed]\n')
+            solver = CountingSolver(mechanism)
+            run_tasks(tasks, solver, processes=1, cache=cache)
+            assert len(solver.solved) == len(tasks)
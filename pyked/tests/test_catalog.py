@@ -0,0 +1,162 @@
+"""
+Test module for catalog.py
+"""
+# Standard libraries
+import os
+import shutil
+import pkg_resources
+from tempfile import TemporaryDirectory
+
+# Third-party libraries
+import pytest
+
+# Local imports
+from ..catalog import Catalog, PointHandle, file_hash, species_identity
+from ..chemked import Composition
+from ..validation import Q_
+
+test_files = ['testfile_st.yaml', 'testfile_st2.yaml', 'testfile_rcm.yaml', 'testfile_rcm2.yaml']
+
+
+@pytest.fixture
+def corpus():
+    with TemporaryDirectory() as temp_dir:
+        os.mkdir(os.path.join(temp_dir, 'rcm'))
+        for name in test_files:
+            subdir = 'rcm' if 'rcm' in name else ''
+            shutil.copy(pkg_resources.resource_filename(__name__, name),
+                        os.path.join(temp_dir, subdir, name))
+        yield temp_dir
+
+
+class TestCatalog(object):
+    """
+    """
+    def test_file_hash(self, corpus):
+        filename = os.path.join(corpus, 'testfile_st.yaml')
+        assert file_hash(filename) == file_hash(filename)
+        assert file_hash(filename) != file_hash(os.path.join(corpus, 'testfile_st2.yaml'))
+
+    def test_update(self, corpus):
+        catalog = Catalog()
+        changes = catalog.update(corpus)
+        assert len(changes['added']) == 4
+        assert len(catalog) == 8
+        assert len(catalog.files) == 4
+
+    def test_incremental_update(self, corpus):
+        catalog = Catalog()
+        catalog.update(corpus)
+        changes = catalog.update(corpus)
+        assert changes == {'added': [], 'updated': [], 'removed': [], 'failed': []}
+
+        filename = os.path.join(corpus, 'testfile_st2.yaml')
+        with open(filename, 'r') as f:
+            contents = f.read()
+        with open(filename, 'w') as f:
+            f.write(contents.replace('1264.2 kelvin', '1300.0 kelvin'))
+        os.remove(os.path.join(corpus, 'rcm', 'testfile_rcm.yaml'))
+
+        changes = catalog.update(corpus)
+        assert changes['updated'] == [filename]
+        assert len(changes['removed']) == 1
+        assert len(catalog) == 7
+        assert catalog.query(temperature=(1299.0, 1301.0)) == [PointHandle(filename, 0)]
+
+    def test_bad_file(self, corpus):
+        catalog = Catalog()
+        catalog.update(corpus)
+        filename = os.path.join(corpus, 'testfile_st2.yaml')
+        with open(filename, 'w') as f:
+            f.write('datapoints: [\n')
+        with open(os.path.join(corpus, 'new.yaml'), 'w') as f:
+            f.write('datapoints: [\n')
+
+        with pytest.warns(UserWarning) as record:
+            changes = catalog.update(corpus)
+        assert str(record[1].message).startswith(filename + ' skipped: ')
+        assert changes['failed'] == [os.path.join(corpus, 'new.yaml'), filename]
+        assert len(catalog.files) == 3
+        assert len(catalog) == 7
+
+    def test_query_ranges(self, corpus):
+        catalog = Catalog()
+        catalog.update(corpus)
+        handles = catalog.query(temperature=(900, 1200), pressure=('200 kPa', '250 kPa'))
+        assert handles == [PointHandle(os.path.join(corpus, 'testfile_st.yaml'), 0),
+                           PointHandle(os.path.join(corpus, 'testfile_st.yaml'), 1)]
+        handles = catalog.query(temperature=(Q_(1250, 'K'), None))
+        assert len(handles) == 4
+        handles = catalog.query(ignition_delay=(None, '100 us'))
+        assert handles == [PointHandle(os.path.join(corpus, 'testfile_st.yaml'), 4)]
+
+    def test_query_metadata(self, corpus):
+        catalog = Catalog()
+        catalog.update(corpus)
+        assert len(catalog.query(apparatus='rapid compression machine')) == 2
+        assert len(catalog.query(apparatus='shock tube', species=['H2', 'O2', 'Ar'])) == 6
+        assert len(catalog.query(species=['N2'])) == 2
+        assert catalog.query(species=['CH4']) == []
+        assert len(catalog.query(compressed_temperature=(700, 800))) == 1
+        assert len(catalog.query(ignition_target='pressure', doi='10.1002/kin.20180')) == 2
+
+    def test_query_unknown_property(self):
+        with pytest.raises(ValueError):
+            Catalog().query(volume=(0, 1))
+
+    def test_persistence_and_load(self, corpus):
+        db_file = os.path.join(corpus, 'catalog.sqlite')
+        with Catalog(db_file) as catalog:
+            catalog.update(corpus)
+
+        with Catalog(db_file) as catalog:
+            handles = catalog.query(temperature=(1500, 1600))
+            assert len(handles) == 1
+            datapoint = catalog.load(handles)[0]
+            assert datapoint.temperature == Q_(1519.18, 'K')
+
+
+class TestSpeciesIndex(object):
+    """
+    """
+    @pytest.fixture
+    def catalog(self, corpus):
+        filename = os.path.join(corpus, 'testfile_st2.yaml')
+        with open(filename, 'r') as f:
+            contents = f.read()
+        with open(filename, 'w') as f:
+            f.write(contents.replace('species-name: H2', 'species-name: hydrogen'))
+
+        catalog = Catalog()
+        catalog.update(corpus)
+        return catalog
+
+    @pytest.mark.parametrize('species, identity', [
+        ('H2', 'h2'),
+        (' n-Heptane', 'n-heptane'),
+        ('1S/H2/h1H', 'InChI=1S/H2/h1H'),
+        ('InChI=1S/H2/h1H', 'InChI=1S/H2/h1H'),
+        (Composition(species_name='H2', InChI='1S/H2/h1H', SMILES=None,
+                     atomic_composition=None, amount=None), 'InChI=1S/H2/h1H'),
+    ])
+    def test_species_identity(self, species, identity):
+        assert species_identity(species) == identity
+
+    def test_query_by_identity(self, catalog):
+        by_name = catalog.query(species=['H2'])
+        assert len(by_name) == 8
+        assert catalog.query(species=['hydrogen']) == by_name
+        assert catalog.query(species=['1S/H2/h1H']) == by_name
+
+    def test_query_mole_fraction(self, catalog):
+        assert len(catalog.query(species={'H2': (0.1, None)})) == 2
+        assert len(catalog.query(species={'H2': (None, 0.1), 'Ar': (0.9, 1.0)})) == 6
+        assert len(catalog.query(species={'H2': None, 'N2': None})) == 2
+        assert len(catalog.query(species={'O2': (0.05, None)}, apparatus='shock tube')) == 0
+
+    def test_species_summary(self, catalog):
+        summary = catalog.species()
+        assert summary['InChI=1S/H2/h1H']['names'] == ['H2', 'hydrogen']
+        assert summary['InChI=1S/H2/h1H']['datapoints'] == 8
+        low, high = summary['InChI=1S/Ar']['mole_fraction']
+        assert low < high <= 0.99
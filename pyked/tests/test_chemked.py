@@ -3,6 +3,7 @@ Test module for chemked.py
 """
 # Standard libraries
 import os
+import pickle
 import pkg_resources
 import warnings
 from tempfile import TemporaryDirectory
@@ -14,8 +15,8 @@ import numpy as np
 import pytest
 
 # Local imports
-from ..validation import schema, OurValidator, yaml, Q_
-from ..chemked import ChemKED, DataPoint, Composition
+from ..validation import schema, OurValidator, yaml, Q_, property_units
+from ..chemked import ChemKED, DataPoint, CompactDataPoint, Composition
 from ..converters import get_datapoints, get_common_properties
 from .._version import __version__
 
@@ -96,6 +97,87 @@ class TestChemKED(object):
         with pytest.raises(ValueError):
             ChemKED(dict_input=properties)
 
+    @pytest.mark.parametrize('test_file', [
+        'testfile_st.yaml', 'testfile_rcm.yaml', 'testfile_rcm2.yaml',
+        'testfile_uncertainty.yaml',
+    ])
+    @pytest.mark.parametrize('compact', [False, True])
+    def test_si_units(self, test_file, compact):
+        filename = pkg_resources.resource_filename(__name__, test_file)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            c = ChemKED(filename)
+            c_si = ChemKED(filename, compact=compact, si_units=True)
+        assert c.original_units is None
+        for d, d_si, original in zip(c.datapoints, c_si.datapoints, c_si.original_units):
+            values = [(prop, prop.replace('-', '_'), getattr(d, prop.replace('-', '_')),
+                       getattr(d_si, prop.replace('-', '_')))
+                      for prop in DataPoint.value_unit_props]
+            if d.rcm_data is not None:
+                values += [(prop, 'rcm_data.' + prop.replace('-', '_'),
+                            getattr(d.rcm_data, prop.replace('-', '_')),
+                            getattr(d_si.rcm_data, prop.replace('-', '_')))
+                           for prop in DataPoint.rcm_data_props]
+            for prop, attribute, value, value_si in values:
+                if value is None:
+                    assert value_si is None
+                    continue
+                assert value_si.units == Q_(1, property_units[prop]).units
+                magnitude = value_si.to(value.units).magnitude
+                assert np.isclose(getattr(magnitude, 'nominal_value', magnitude),
+                                  getattr(value.magnitude, 'nominal_value', value.magnitude))
+                if hasattr(value.magnitude, 'std_dev'):
+                    assert np.isclose(magnitude.std_dev, value.magnitude.std_dev)
+                assert original[attribute] == str(value.units)
+
+            for h in DataPoint.history_types:
+                name = '{}_history'.format(h)
+                history, history_si = getattr(d, name), getattr(d_si, name)
+                if history is None:
+                    assert history_si is None
+                    continue
+                assert str(history_si[0].units) == 'second'
+                assert np.allclose(history_si[0].to(history[0].units), history[0])
+                assert np.allclose(history_si[1].to(history[1].units), history[1])
+                assert original[name] == (str(history[0].units), str(history[1].units))
+
+    def test_si_units_write_file(self):
+        filename = pkg_resources.resource_filename(__name__, 'testfile_rcm.yaml')
+        c = ChemKED(filename, si_units=True)
+        with TemporaryDirectory() as temp_dir:
+            c.write_file(os.path.join(temp_dir, 'testfile.yaml'))
+            with open(os.path.join(temp_dir, 'testfile.yaml'), 'r') as f:
+                properties = yaml.safe_load(f)
+        with open(filename, 'r') as f:
+            assert properties == yaml.safe_load(f)
+
+    @pytest.mark.parametrize('test_file', [
+        'testfile_st.yaml', 'testfile_rcm.yaml', 'testfile_uncertainty.yaml',
+        'testfile_required.yaml',
+    ])
+    @pytest.mark.parametrize('compact', [False, True])
+    def test_pickle(self, test_file, compact):
+        filename = pkg_resources.resource_filename(__name__, test_file)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            c = ChemKED(filename, compact=compact)
+        c_pickled = pickle.loads(pickle.dumps(c))
+        assert c_pickled._properties == c._properties
+        for d, d_pickled in zip(c.datapoints, c_pickled.datapoints):
+            assert type(d_pickled) is type(d)
+            for prop in DataPoint.value_unit_props:
+                attribute = prop.replace('-', '_')
+                assert repr(getattr(d_pickled, attribute)) == repr(getattr(d, attribute))
+            assert repr(d_pickled.composition) == repr(d.composition)
+            assert d_pickled.ignition_type == d.ignition_type
+            if d.volume_history is not None:
+                assert np.array_equal(d_pickled.volume_history.quantity.magnitude,
+                                      d.volume_history.quantity.magnitude)
+                assert d_pickled.volume_history.time.units == d.volume_history.time.units
+
+        d_pickled = pickle.loads(pickle.dumps(c.datapoints[0]))
+        assert repr(d_pickled.temperature) == repr(c.datapoints[0].temperature)
+
 
 class TestDataFrameOutput(object):
     """
@@ -238,6 +320,67 @@ class TestWriteFile(object):
 
         assert properties == c._properties
 
+    @pytest.mark.parametrize('float_format', [None, '.6e'])
+    def test_write_compact(self, float_format):
+        filename = pkg_resources.resource_filename(__name__, 'testfile_rcm.yaml')
+        c = ChemKED(filename)
+        with TemporaryDirectory() as temp_dir:
+            newfile_path = os.path.join(temp_dir, 'testfile.yaml')
+            c.write_file(newfile_path, compact=True, float_format=float_format)
+            with open(newfile_path, 'r') as f:
+                text = f.read()
+            c_compact = ChemKED(newfile_path)
+
+        values = c._properties['datapoints'][0]['time-histories'][0]['values']
+        properties = yaml.safe_load(text)
+        compact_values = properties['datapoints'][0]['time-histories'][0]['values']
+        if float_format is None:
+            assert '- [{!r}, {!r}]\n'.format(*values[0]) in text
+            assert properties == c._properties
+        else:
+            assert '- [{:.6e}, {:.6e}]\n'.format(*values[0]) in text
+            assert np.allclose(compact_values, values, rtol=1.0e-6, atol=0.0)
+        np.testing.assert_allclose(c_compact.datapoints[0].volume_history.quantity,
+                                   c.datapoints[0].volume_history.quantity, rtol=1.0e-6)
+
+    @pytest.mark.parametrize('sidecar_format', ['csv', 'npy'])
+    def test_write_sidecars(self, sidecar_format):
+        filename = pkg_resources.resource_filename(__name__, 'testfile_rcm.yaml')
+        c = ChemKED(filename)
+        with TemporaryDirectory() as temp_dir:
+            newfile_path = os.path.join(temp_dir, 'testfile.yaml')
+            c.write_file(newfile_path, sidecar_threshold=10, sidecar_format=sidecar_format)
+            sidecar = 'testfile.0.volume.{}'.format(sidecar_format)
+            assert os.path.exists(os.path.join(temp_dir, sidecar))
+            with open(newfile_path, 'r') as f:
+                properties = yaml.safe_load(f)
+            assert properties['datapoints'][0]['time-histories'][0]['values'] == {
+                'filename': sidecar}
+
+            c_sidecar = ChemKED(newfile_path)
+            np.testing.assert_allclose(c_sidecar.datapoints[0].volume_history.quantity,
+                                       c.datapoints[0].volume_history.quantity)
+            np.testing.assert_allclose(c_sidecar.datapoints[0].volume_history.time,
+                                       c.datapoints[0].volume_history.time)
+
+            c.write_file(newfile_path, overwrite=True, sidecar_threshold=1000)
+            with open(newfile_path, 'r') as f:
+                assert yaml.safe_load(f) == c._properties
+
+
+    @pytest.mark.parametrize('compact', [False, True])
+    def test_sidecar_columns(self, compact):
+        filename = pkg_resources.resource_filename(__name__, 'testfile_rcm.yaml')
+        c = ChemKED(filename)
+        with TemporaryDirectory() as temp_dir:
+            newfile_path = os.path.join(temp_dir, 'testfile.yaml')
+            c.write_file(newfile_path, sidecar_threshold=10)
+            sidecar = os.path.join(temp_dir, 'testfile.0.volume.csv')
+            values = np.loadtxt(sidecar, delimiter=',')
+            np.savetxt(sidecar, np.column_stack([values, values[:, 0]]), delimiter=',')
+            with pytest.raises(ValueError) as excinfo:
+                ChemKED(newfile_path, compact=compact)
+            assert 'has 3 columns, but 2 are expected' in str(excinfo.value)
 
 class TestConvertToReSpecTh(object):
     """Tests for conversion of ChemKED to ReSpecTh
@@ -1159,3 +1302,65 @@ class TestDataPoint(object):
         assert datapoints[0].ignition_type['target'] == 'temperature'
         for d in datapoints[1:]:
             assert d.ignition_type['target'] == 'pressure'
+
+
+class TestCompactDataPoint(object):
+    """
+    """
+    def load_properties(self, test_file):
+        filename = pkg_resources.resource_filename(__name__, os.path.join(test_file))
+        with open(filename, 'r') as f:
+            properties = yaml.safe_load(f)
+        return properties['datapoints']
+
+    @pytest.mark.parametrize('test_file', [
+        'testfile_st.yaml', 'testfile_st2.yaml', 'testfile_rcm.yaml', 'testfile_required.yaml',
+        'testfile_uncertainty.yaml', 'testfile_st_thermo.yaml',
+    ])
+    def test_same_attributes(self, test_file):
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            for properties in self.load_properties(test_file):
+                d = DataPoint(properties)
+                c = CompactDataPoint(properties)
+                attributes = [p.replace('-', '_') for p in DataPoint.value_unit_props]
+                attributes += ['{}_history'.format(h) for h in DataPoint.history_types]
+                attributes += ['composition', 'rcm_data', 'composition_type',
+                               'equivalence_ratio', 'ignition_type']
+                for attribute in attributes:
+                    assert repr(getattr(c, attribute)) == repr(getattr(d, attribute))
+                assert c.get_cantera_composition_string() == d.get_cantera_composition_string()
+
+    def test_slots(self):
+        c = CompactDataPoint(self.load_properties('testfile_rcm.yaml')[0])
+        assert not hasattr(c, '__dict__')
+        assert c._histories.keys() == {'volume_history'}
+        with pytest.raises(AttributeError):
+            c.not_an_attribute = 1
+
+    def test_set_histories(self):
+        c = CompactDataPoint(self.load_properties('testfile_rcm.yaml')[0])
+        c.pressure_history = c.volume_history
+        assert c._histories.keys() == {'volume_history', 'pressure_history'}
+        c.volume_history = None
+        assert c.volume_history is None
+        assert c._histories.keys() == {'pressure_history'}
+
+    def test_shared_units(self):
+        datapoints = [CompactDataPoint(p) for p in self.load_properties('testfile_st.yaml')]
+        assert datapoints[0]._values[2][2] is datapoints[1]._values[2][2]
+
+    def test_set_attributes(self):
+        c = CompactDataPoint(self.load_properties('testfile_st.yaml')[0])
+        c.temperature = Q_(1000.0, 'K').plus_minus(5.0)
+        assert c.temperature.value == Q_(1000.0, 'K')
+        assert c.temperature.error == Q_(5.0, 'K')
+        c.composition_type = 'unknown type'
+        with pytest.raises(ValueError):
+            c.get_cantera_composition_string()
+
+    def test_compact_chemked(self):
+        filename = pkg_resources.resource_filename(__name__, 'testfile_st.yaml')
+        c = ChemKED(filename, compact=True)
+        assert all(isinstance(d, CompactDataPoint) for d in c.datapoints)
+        assert c.datapoints[0].temperature == Q_(1164.48, 'K')
@@ -0,0 +1,305 @@
+"""
+Test module for client.py
+"""
+# Standard libraries
+import asyncio
+import json
+import os
+import pkg_resources
+import socket
+import threading
+import time
+import warnings
+import xml.etree.ElementTree as etree
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Third-party libraries
+import pytest
+
+# Local imports
+from .. import client
+from ..client import (LookupClient, LookupRejectedError, NotFoundError, TokenBucket,
+                      TransientLookupError)
+from ..converters import get_reference
+from ..orcid import search_orcid
+from ..validation import OurValidator, schema, yaml
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Stand-in for the Crossref and ORCID APIs.
+
+    The responses for each path are taken in turn from ``server.responses``, repeating the last
+    one, and paths without responses are not found.
+    """
+    def do_GET(self):
+        path = self.path.split('?')[0]
+        self.server.requests.append(path)
+        responses = self.server.responses.get(path, [(404, {})])
+        status, body = responses.pop(0) if len(responses) > 1 else responses[0]
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        if status == 429:
+            self.send_header('Retry-After', '0')
+        self.end_headers()
+        self.wfile.write(json.dumps(body).encode('utf-8'))
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope='function')
+def server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    server.responses = {}
+    server.requests = []
+    server.url = 'http://127.0.0.1:{}/'.format(server.server_port)
+    thread = threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.05},
+                              daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def file_records(properties):
+    """Build the Crossref and ORCID responses that match the properties of a test file.
+    """
+    reference = properties['reference']
+    authors = [dict(zip(['given', 'family'], a['name'].rsplit(' ', 1)))
+               for a in reference['authors']]
+    message = {'container-title': [reference['journal']], 'volume': str(reference['volume']),
+               'published-print': {'date-parts': [[reference['year']]]},
+               'page': reference['pages'], 'author': authors}
+    records = {'doi': {reference['doi']: {'message': message}}, 'orcid': {}}
+    for author in properties['file-authors'] + reference['authors']:
+        if 'ORCID' in author:
+            given, family = author['name'].rsplit(' ', 1)
+            records['orcid'][author['ORCID']] = {'name': {'given-names': {'value': given},
+                                                          'family-name': {'value': family}}}
+    return records
+
+
+def add_file(server, name, doi_responses=None):
+    """Add the responses for the DOI and ORCIDs of a test file, and return the filename.
+    """
+    filename = pkg_resources.resource_filename(__name__, name)
+    with open(filename, 'r') as f:
+        records = file_records(yaml.safe_load(f))
+    for doi, response in records['doi'].items():
+        if doi_responses is None:
+            server.responses['/works/' + doi] = [(200, response)]
+        else:
+            server.responses['/works/' + doi] = doi_responses
+    for orcid, response in records['orcid'].items():
+        server.responses['/{}/person'.format(orcid)] = [(200, response)]
+    return filename
+
+
+def stub_client(server, **kwargs):
+    return LookupClient(crossref_url=server.url + 'works/', orcid_url=server.url, backoff=0.01,
+                        **kwargs)
+
+
+class TestTokenBucket(object):
+    """
+    """
+    def test_rate(self):
+        bucket = TokenBucket(50.0, capacity=2)
+        start = time.monotonic()
+        for _ in range(7):
+            bucket.acquire()
+        assert time.monotonic() - start >= 5/50.0*0.9
+
+    def test_rate_async(self):
+        bucket = TokenBucket(50.0, capacity=2)
+
+        async def acquire():
+            for _ in range(7):
+                await bucket.aacquire()
+
+        start = time.monotonic()
+        asyncio.run(acquire())
+        assert time.monotonic() - start >= 5/50.0*0.9
+
+
+class TestLookupClient(object):
+    """
+    """
+    doi = '10.1016/j.ijhydene.2007.04.008'
+
+    def test_works(self, server):
+        add_file(server, 'testfile_st.yaml')
+        ref = stub_client(server).works(self.doi)['message']
+        assert ref['container-title'] == ['International Journal of Hydrogen Energy']
+        assert server.requests == ['/works/' + self.doi]
+
+    def test_retry(self, server):
+        add_file(server, 'testfile_st.yaml')
+        path = '/works/' + self.doi
+        server.responses[path] = [(429, {}), (500, {})] + server.responses[path]
+        assert stub_client(server).works(self.doi)['message']['volume'] == '32'
+        assert server.requests.count(path) == 3
+
+    def test_not_found(self, server):
+        with pytest.raises(NotFoundError):
+            stub_client(server).works('10.1000/invalid.doi')
+        with pytest.raises(NotFoundError):
+            stub_client(server).person('0000-0000-0000-0000')
+        assert len(server.requests) == 2
+
+    def test_rejected(self, server):
+        server.responses['/works/10.1000/gone.doi'] = [(410, {})]
+        with pytest.raises(NotFoundError):
+            stub_client(server).works('10.1000/gone.doi')
+        for status in [400, 401, 403]:
+            server.responses['/works/' + self.doi] = [(status, {})]
+            with pytest.raises(LookupRejectedError) as excinfo:
+                stub_client(server).works(self.doi)
+            assert not isinstance(excinfo.value, NotFoundError)
+        assert len(server.requests) == 4
+
+    def test_transient(self, server):
+        add_file(server, 'testfile_st.yaml', doi_responses=[(503, {})])
+        with pytest.raises(TransientLookupError) as excinfo:
+            stub_client(server, retries=2).works(self.doi)
+        assert 'failed after 3 attempts: 503' in str(excinfo.value)
+        assert len(server.requests) == 3
+
+    def test_connection_refused(self):
+        with socket.socket() as s:
+            s.bind(('127.0.0.1', 0))
+            port = s.getsockname()[1]
+        lookup_client = LookupClient(crossref_url='http://127.0.0.1:{}/'.format(port),
+                                     backoff=0.01)
+        with pytest.raises(TransientLookupError) as excinfo:
+            lookup_client.works(self.doi)
+        assert 'failed after 1 attempts' in str(excinfo.value)
+
+        lookup_client = LookupClient(crossref_url='http://127.0.0.1:{}/'.format(port),
+                                     backoff=0.01, connection_retries=2)
+        with pytest.raises(TransientLookupError) as excinfo:
+            lookup_client.works(self.doi)
+        assert 'failed after 3 attempts' in str(excinfo.value)
+
+
+class TestLookups(object):
+    """
+    """
+    @pytest.fixture(scope='function')
+    def default_client(self, server, monkeypatch):
+        monkeypatch.setattr(client, 'default_client', stub_client(server))
+
+    def test_validation(self, server):
+        filename = add_file(server, 'testfile_st.yaml')
+        path = '/works/10.1016/j.ijhydene.2007.04.008'
+        server.responses[path] = [(429, {})] + server.responses[path]
+        with open(filename, 'r') as f:
+            properties = yaml.safe_load(f)
+        validator = OurValidator(schema, client=stub_client(server))
+        assert validator.validate(properties)
+        assert server.requests.count(path) == 2
+
+    def test_validation_throttled(self, server):
+        filename = add_file(server, 'testfile_st.yaml', doi_responses=[(429, {})])
+        with open(filename, 'r') as f:
+            properties = yaml.safe_load(f)
+        validator = OurValidator(schema, client=stub_client(server, retries=1))
+        with pytest.warns(UserWarning) as record:
+            assert validator.validate(properties)
+        assert str(record.pop(UserWarning).message) == (
+            'network not available, DOI not validated.')
+
+    def test_validation_rejected(self, server):
+        filename = add_file(server, 'testfile_st.yaml', doi_responses=[(403, {})])
+        with open(filename, 'r') as f:
+            properties = yaml.safe_load(f)
+        validator = OurValidator(schema, client=stub_client(server))
+        with pytest.warns(UserWarning) as record:
+            assert validator.validate(properties)
+        assert str(record.pop(UserWarning).message).startswith(
+            'DOI lookup rejected, DOI not validated: 403')
+
+    def test_reference_transient(self, server, default_client):
+        add_file(server, 'testfile_st.yaml', doi_responses=[(503, {})])
+        client.default_client.retries = 0
+        root = etree.Element('experiment')
+        ref = etree.SubElement(root, 'bibliographyLink')
+        ref.set('doi', '10.1016/j.ijhydene.2007.04.008')
+        with pytest.raises(TransientLookupError):
+            get_reference(root)
+
+        ref.set('preferredKey', 'Chaumeix et al., 2007')
+        with pytest.warns(UserWarning) as record:
+            reference = get_reference(root)
+        assert str(record.pop(UserWarning).message).startswith('DOI could not be looked up')
+        assert reference['detail'] == 'Chaumeix et al., 2007.'
+
+    def test_default_client(self, server, default_client):
+        add_file(server, 'testfile_st.yaml')
+        root = etree.Element('experiment')
+        ref = etree.SubElement(root, 'bibliographyLink')
+        ref.set('doi', '10.1016/j.ijhydene.2007.04.008')
+        reference = get_reference(root)
+        assert reference['journal'] == 'International Journal of Hydrogen Energy'
+        assert search_orcid('0000-0003-4425-7097')['name']['family-name']['value'] == 'Niemeyer'
+
+
+class TestOffline(object):
+    """
+    """
+    @pytest.fixture(scope='function')
+    def properties(self):
+        filename = pkg_resources.resource_filename(__name__, 'testfile_st.yaml')
+        with open(filename, 'r') as f:
+            return yaml.safe_load(f)
+
+    def test_no_snapshot(self, properties, monkeypatch):
+        def guard(*args, **kwargs):
+            raise AssertionError('The network was used')
+
+        monkeypatch.setattr(socket, 'socket', guard)
+        validator = OurValidator(schema, client=client.OfflineClient())
+        with pytest.warns(UserWarning) as record:
+            assert validator.validate(properties)
+        messages = [str(w.message) for w in record]
+        assert 'network not available, DOI not validated.' in messages
+        assert 'network not available, ORCID not validated.' in messages
+
+    def test_snapshot(self, server, properties, tmp_path):
+        filenames = [add_file(server, 'testfile_st.yaml'),
+                     pkg_resources.resource_filename(__name__, 'testfile_rcm.yaml')]
+        snapshot_file = str(tmp_path / 'snapshot.json')
+        snapshot = client.write_snapshot(filenames, snapshot_file, client=stub_client(server))
+        assert snapshot['doi'] == {
+            '10.1016/j.ijhydene.2007.04.008': {'message': server.responses[
+                '/works/10.1016/j.ijhydene.2007.04.008'][0][1]['message']},
+            '10.1002/kin.20180': None,
+        }
+        assert len(snapshot['orcid']) == 2
+        n_requests = len(server.requests)
+
+        offline = client.OfflineClient(snapshot_file)
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            assert OurValidator(schema, client=offline).validate(properties)
+
+        with open(filenames[1], 'r') as f:
+            rcm_properties = yaml.safe_load(f)
+        validator = OurValidator(schema, client=offline)
+        assert not validator.validate(rcm_properties)
+        assert validator.errors['reference'][0] == 'DOI not found'
+        assert len(server.requests) == n_requests
+
+    def test_set_offline(self, server, monkeypatch):
+        monkeypatch.setattr(client, 'default_client', client.default_client)
+        add_file(server, 'testfile_st.yaml')
+        snapshot = client.write_snapshot(
+            [pkg_resources.resource_filename(__name__, 'testfile_st.yaml')],
+            os.devnull, client=stub_client(server))
+        assert isinstance(client.set_offline(snapshot), client.OfflineClient)
+
+        root = etree.Element('experiment')
+        ref = etree.SubElement(root, 'bibliographyLink')
+        ref.set('doi', '10.1016/J.IJHYDENE.2007.04.008')
+        reference = get_reference(root)
+        assert reference['journal'] == 'International Journal of Hydrogen Energy'
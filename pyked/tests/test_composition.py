@@ -0,0 +1,120 @@
+"""
+Test module for composition.py
+"""
+# Standard libraries
+import os
+import pkg_resources
+
+# Third-party libraries
+import numpy as np
+import pytest
+
+# Local imports
+from ..chemked import ChemKED, Composition
+from ..composition import (parse_inchi_formula, get_molecular_weight, get_composition_array,
+                           get_molecular_weights, convert_composition, normalize_composition)
+from .._version import __version__
+from ..validation import schema
+
+schema['chemked-version']['allowed'].append(__version__)
+
+
+def make_species(name, InChI=None, atomic_composition=None):
+    return Composition(species_name=name, InChI=InChI, SMILES=None,
+                       atomic_composition=atomic_composition, amount=None)
+
+
+class TestMolecularWeight(object):
+    """
+    """
+    @pytest.mark.parametrize('InChI, atoms', [
+        ('1S/H2/h1H', {'H': 2}),
+        ('1S/Ar', {'Ar': 1}),
+        ('InChI=1S/O2/c1-2', {'O': 2}),
+        ('1S/C7H16/c1-3-5-7-6-4-2/h3-7H2,1-2H3', {'C': 7, 'H': 16}),
+        ('1S/2H2O/h2*1H2', {'H': 4, 'O': 2}),
+        ('1S/CH4.H2O/h1H4;1H2', {'C': 1, 'H': 6, 'O': 1}),
+    ])
+    def test_parse_inchi(self, InChI, atoms):
+        assert parse_inchi_formula(InChI) == atoms
+
+    def test_parse_inchi_no_formula(self):
+        with pytest.raises(ValueError):
+            parse_inchi_formula('1S')
+
+    def test_weight_from_inchi(self):
+        assert np.isclose(get_molecular_weight(make_species('O2', InChI='1S/O2/c1-2')), 31.998)
+
+    def test_weight_from_atomic_composition(self):
+        species = make_species('nC7H16', atomic_composition=[{'element': 'C', 'amount': 7},
+                                                              {'element': 'H', 'amount': 16}])
+        assert np.isclose(get_molecular_weight(species), 100.205)
+
+    def test_weight_unknown_element(self):
+        species = make_species('X', atomic_composition=[{'element': 'Xx', 'amount': 1}])
+        with pytest.raises(ValueError):
+            get_molecular_weight(species)
+
+    def test_weight_no_information(self):
+        with pytest.raises(ValueError):
+            get_molecular_weight(make_species('H2'))
+
+
+class TestConvertComposition(object):
+    """
+    """
+    def load_datapoints(self):
+        filename = pkg_resources.resource_filename(__name__, os.path.join('testfile_required.yaml'))
+        return ChemKED(filename).datapoints
+
+    def test_composition_array(self):
+        datapoints = self.load_datapoints()
+        species, amounts, kinds = get_composition_array(datapoints)
+        assert species == ['H2', 'O2', 'Ar']
+        assert amounts.shape == (len(datapoints), 3)
+        assert list(kinds[:3]) == ['mole fraction', 'mass fraction', 'mole percent']
+
+    def test_composition_array_species_order(self):
+        datapoints = self.load_datapoints()
+        species, amounts, kinds = get_composition_array(datapoints, ['Ar', 'N2'])
+        assert species == ['Ar', 'N2']
+        assert np.isclose(amounts[0, 0], 0.99)
+        assert np.all(amounts[:, 1] == 0.0)
+
+    def test_normalize_mole_fraction(self):
+        datapoints = self.load_datapoints()[:3]
+        species, amounts = normalize_composition(datapoints)
+        for row in amounts:
+            assert np.allclose(row, [0.00444, 0.00556, 0.99], rtol=1e-4)
+
+    def test_normalize_mass_fraction(self):
+        datapoints = self.load_datapoints()[:3]
+        species, amounts = normalize_composition(datapoints, 'mass fraction')
+        for row in amounts:
+            assert np.allclose(row, [2.25252818E-4, 4.47745336E-3, 9.95297294E-1], rtol=1e-4)
+
+    def test_normalize_mole_percent(self):
+        datapoints = self.load_datapoints()[:3]
+        species, amounts = normalize_composition(datapoints, 'mole percent')
+        assert np.allclose(amounts.sum(axis=1), 100.0)
+
+    def test_molecular_weights(self):
+        datapoints = self.load_datapoints()
+        assert np.allclose(get_molecular_weights(datapoints, ['H2', 'Ar']), [2.016, 39.948])
+
+    def test_missing_molecular_weights(self):
+        with pytest.raises(ValueError):
+            convert_composition([[0.5, 0.5]], 'mole fraction', 'mass fraction')
+
+    def test_unknown_kind(self):
+        with pytest.raises(ValueError):
+            convert_composition([[0.5, 0.5]], 'mole fraction', 'volume fraction')
+
+    def test_round_trip(self):
+        weights = np.array([2.016, 31.998, 28.014])
+        mole_fractions = np.array([[0.1, 0.2, 0.7], [0.3, 0.3, 0.4]])
+        mass_fractions = convert_composition(mole_fractions, 'mole fraction', 'mass fraction',
+                                             weights)
+        assert np.allclose(mass_fractions.sum(axis=1), 1.0)
+        assert np.allclose(convert_composition(mass_fractions, 'mass fraction', 'mole fraction',
+                                               weights), mole_fractions)
@@ -17,6 +17,7 @@ from numpy.testing import assert_allclose
 
 
 # Local imports
+from .. import client
 from ..converters import (ParseError, KeywordError, MissingElementError,
                           MissingAttributeError
                           )
@@ -128,6 +129,13 @@ class TestGetReference(object):
         yield
         socket.socket = old_socket
 
+    @pytest.fixture(scope='function')
+    def invalid_doi(self, monkeypatch):
+        """Looks up DOIs offline, with the invalid DOI recorded as not found.
+        """
+        monkeypatch.setattr(client, 'default_client',
+                            client.OfflineClient({'doi': {'10.1000/invalid.doi': None}}))
+
     def test_valid_reference(self):
         """Ensure valid reference reads properly.
         """
@@ -231,7 +239,7 @@ class TestGetReference(object):
         assert {'name': 'F LAFOSSE'} in ref['authors']
         assert {'name': 'C PAILLARD'} in ref['authors']
 
-    def test_incorrect_doi(self, capfd):
+    def test_incorrect_doi(self, capfd, invalid_doi):
         """Ensure can handle invalid DOI.
         """
         root = etree.Element('experiment')
@@ -255,7 +263,7 @@ class TestGetReference(object):
                 'Fig. 12., right, open diamond.'
                 )
 
-    def test_incorrect_doi_period_at_end(self, capfd):
+    def test_incorrect_doi_period_at_end(self, capfd, invalid_doi):
         """Ensure can handle invalid DOI with period at end of reference.
         """
         root = etree.Element('experiment')
@@ -293,15 +301,16 @@ class TestGetReference(object):
         with pytest.warns(UserWarning) as record:
             ref = get_reference(root)
         m = str(record.pop(UserWarning).message)
-        assert m == ('Missing doi attribute in bibliographyLink or lookup failed. Setting "detail" '
-                     'key as a fallback; please update to the appropriate fields.')
+        assert m.startswith('DOI could not be looked up (')
+        assert m.endswith('). Setting "detail" key as a fallback; please update to the '
+                          'appropriate fields.')
 
         assert ref['detail'] == ('Chaumeix, N., Pichon, S., Lafosse, F., Paillard, C.-E., '
                                  'International Journal of Hydrogen Energy, 2007, (32) 2216-2226, '
                                  'Fig. 12., right, open diamond.'
                                  )
 
-    def test_missing_doi_preferredkey(self):
+    def test_missing_doi_preferredkey(self, invalid_doi):
         """Ensure error if missing both DOI and ``preferredKey``.
         """
         root = etree.Element('experiment')
@@ -0,0 +1,126 @@
+"""
+Test module for fitting.py
+"""
+# Standard libraries
+import os
+import pkg_resources
+from copy import deepcopy
+
+# Third-party libraries
+import numpy as np
+import pytest
+
+# Local imports
+from ..chemked import ChemKED
+from ..fitting import evaluate_fit, fit_ignition_delay, get_activation_energy, get_fit_arrays
+from .._version import __version__
+from ..validation import schema, yaml
+
+schema['chemked-version']['allowed'].append(__version__)
+
+
+@pytest.fixture(scope='module')
+def st_properties():
+    filename = pkg_resources.resource_filename(__name__, os.path.join('testfile_st.yaml'))
+    with open(filename, 'r') as f:
+        return yaml.safe_load(f)
+
+
+def make_chemked(properties, ln_A, Ea_R, n, m=0.0, temperatures=None, pressures=None,
+                 uncertainties=None, apparatus=None):
+    """Build a ChemKED with ignition delays that follow a correlation exactly.
+    """
+    properties = deepcopy(properties)
+    if apparatus is not None:
+        properties['apparatus']['kind'] = apparatus
+    for i, dp in enumerate(properties['datapoints']):
+        T = temperatures[i] if temperatures is not None else float(dp['temperature'][0].split()[0])
+        P = pressures[i] if pressures is not None else 220.0e3
+        tau = np.exp(ln_A + Ea_R/T + n*np.log(P) + m*np.log(dp['equivalence-ratio']))
+        dp['temperature'] = ['{} K'.format(T)]
+        dp['pressure'] = ['{} Pa'.format(P)]
+        dp['ignition-delay'] = ['{} s'.format(tau)]
+        if uncertainties is not None:
+            dp['ignition-delay'].append({'uncertainty-type': 'relative',
+                                         'uncertainty': uncertainties[i]})
+    return ChemKED(dict_input=properties)
+
+
+class TestFitIgnitionDelay(object):
+    """
+    """
+    def test_fit_arrays(self, st_properties):
+        c = ChemKED(dict_input=st_properties)
+        ln_tau, sigma, conditions = get_fit_arrays(c.datapoints)
+        assert np.isclose(ln_tau[0], np.log(471.54e-6))
+        assert np.all(np.isnan(sigma))
+        assert np.allclose(conditions[0], [1164.48, 220.0e3, 0.4])
+
+    def test_recover_parameters(self, st_properties):
+        temperatures = [1000.0, 1100.0, 1200.0, 1300.0, 1400.0]
+        pressures = [1.0e5, 3.0e5, 2.0e5, 5.0e5, 1.0e6]
+        c = make_chemked(st_properties, -20.0, 9000.0, -0.8, temperatures=temperatures,
+                         pressures=pressures)
+        fit = fit_ignition_delay(c)
+        assert fit.groups == [c]
+        assert fit.n_points[0] == 5
+        assert np.allclose(fit.coefficients[0, :3], [-20.0, 9000.0, -0.8])
+        # The equivalence ratio is constant, so its exponent cannot be determined
+        assert np.isnan(fit.coefficients[0, 3])
+        assert np.isclose(get_activation_energy(fit)[0].magnitude, 9000.0*8.3144598e-3)
+        tau = evaluate_fit(fit, [[1150.0, 4.0e5, 0.4]], groups=[0])
+        assert np.isclose(tau[0].magnitude, np.exp(-20.0 + 9000.0/1150.0 - 0.8*np.log(4.0e5)))
+
+    def test_batched_groups(self, st_properties):
+        first = make_chemked(st_properties, -20.0, 9000.0, 0.0, apparatus='shock tube')
+        second = make_chemked(st_properties, -18.0, 7000.0, 0.0, apparatus='shock tube')
+        fit = fit_ignition_delay([first, second], terms=['temperature'])
+        assert fit.groups == [first, second]
+        assert np.allclose(fit.coefficients, [[-20.0, 9000.0], [-18.0, 7000.0]])
+        assert np.allclose(fit.chi_squared, 0.0)
+
+        fit = fit_ignition_delay([first, second], by='apparatus', terms=['temperature'])
+        assert len(fit.groups) == 1
+        assert fit.n_points[0] == 10
+
+        fit = fit_ignition_delay([first, second], by=lambda c, dp: dp.temperature.magnitude > 1300,
+                                 terms=['temperature'])
+        assert fit.groups == [False, True]
+        assert list(fit.n_points) == [6, 4]
+
+    def test_weights(self, st_properties):
+        c = make_chemked(st_properties, -20.0, 9000.0, 0.0,
+                         uncertainties=[0.01, 0.01, 0.01, 0.01, 0.5])
+        properties = deepcopy(c._properties)
+        properties['datapoints'][4]['ignition-delay'][0] = '1 s'
+        c = ChemKED(dict_input=properties)
+        weighted = fit_ignition_delay(c, terms=['temperature'])
+        unweighted = fit_ignition_delay(c, terms=['temperature'], weighted=False)
+        weighted_error = abs(weighted.coefficients[0, 1] - 9000.0)
+        unweighted_error = abs(unweighted.coefficients[0, 1] - 9000.0)
+        assert weighted_error < unweighted_error
+        assert np.all(np.isfinite(weighted.covariance[0]))
+        assert np.all(np.linalg.eigvalsh(weighted.covariance[0]) > 0.0)
+
+    def test_too_few_points(self, st_properties):
+        properties = deepcopy(st_properties)
+        properties['datapoints'] = properties['datapoints'][:1]
+        fit = fit_ignition_delay(ChemKED(dict_input=properties), terms=['temperature'])
+        assert np.isclose(fit.coefficients[0, 0], np.log(471.54e-6))
+        assert np.isnan(fit.coefficients[0, 1])
+        assert np.all(np.isnan(fit.covariance))
+        # The temperature does not vary, so the prediction is the one ignition delay
+        tau = evaluate_fit(fit, [[1000.0]])
+        assert np.isclose(tau[0, 0].magnitude, 471.54e-6)
+
+        # Two points cannot determine three coefficients
+        properties['datapoints'] = st_properties['datapoints'][:2]
+        c = make_chemked(properties, -20.0, 9000.0, -0.8, temperatures=[1000.0, 1100.0],
+                         pressures=[1.0e5, 3.0e5])
+        fit = fit_ignition_delay(c, terms=['temperature', 'pressure'])
+        assert np.all(np.isnan(fit.coefficients))
+        assert np.isnan(evaluate_fit(fit, [[1000.0, 2.0e5]], groups=[0])[0].magnitude)
+
+    def test_unknown_term(self, st_properties):
+        with pytest.raises(ValueError):
+            fit_ignition_delay(ChemKED(dict_input=st_properties), terms=['volume'])
@@ -0,0 +1,105 @@
+"""
+Test module for hdf5.py
+"""
+# Standard libraries
+import os
+import warnings
+from tempfile import TemporaryDirectory
+
+# Third-party libraries
+import numpy as np
+import pytest
+
+# Local imports
+from ..chemked import ChemKED, TimeHistory
+from ..hdf5 import HDF5Container, read_hdf5, write_hdf5
+from .helpers import chemkeds, nominal_and_std, test_files  # noqa: F401
+
+h5py = pytest.importorskip('h5py')
+
+
+class TestHDF5(object):
+    """
+    """
+    def test_round_trip(self, chemkeds):
+        with TemporaryDirectory() as temp_dir:
+            filename = os.path.join(temp_dir, 'corpus.h5')
+            write_hdf5(chemkeds, filename, names=test_files)
+            loaded = read_hdf5(filename)
+
+        assert len(loaded) == len(chemkeds)
+        for original, copy in zip(chemkeds, loaded):
+            assert copy.reference == original.reference
+            assert copy.apparatus == original.apparatus
+            for d, d_copy in zip(original.datapoints, copy.datapoints):
+                for attribute in ['temperature', 'pressure', 'ignition_delay', 'pressure_rise']:
+                    value = getattr(d, attribute)
+                    if value is None:
+                        assert getattr(d_copy, attribute) is None
+                        continue
+                    assert np.allclose(nominal_and_std(getattr(d_copy, attribute), value.units),
+                                       nominal_and_std(value, value.units))
+                assert d_copy.get_cantera_composition_string() == \
+                    d.get_cantera_composition_string()
+                if d.rcm_data is not None:
+                    assert np.isclose(d_copy.rcm_data.compression_time,
+                                      d.rcm_data.compression_time)
+                if d.volume_history is not None:
+                    assert isinstance(d_copy.volume_history, TimeHistory)
+                    assert np.allclose(d_copy.volume_history.quantity,
+                                       d.volume_history[1].to('m**3'))
+
+    def test_lazy_loading(self, chemkeds):
+        with TemporaryDirectory() as temp_dir:
+            filename = os.path.join(temp_dir, 'corpus.h5')
+            write_hdf5(chemkeds[:2], filename)
+            write_hdf5(chemkeds[2:3], filename)
+            with pytest.raises(ValueError):
+                write_hdf5(chemkeds[0], filename, names=['0'])
+
+            with HDF5Container(filename) as container:
+                assert container.names == ['0', '1', '2']
+                assert 'rcm' not in container
+                rcm = container.load('1', histories=False)
+                assert rcm.datapoints[0].volume_history is None
+                rcm = container.load('1', histories=['volume'])
+                assert rcm.datapoints[0].volume_history is not None
+                datapoints = container.read_datapoints('0')
+                assert np.allclose(datapoints['temperature'],
+                                   [1164.48, 1164.97, 1264.2, 1332.57, 1519.18])
+
+            with h5py.File(filename, 'r') as f:
+                history = f['records/1/histories/0/volume']
+                assert history.chunks is not None
+                assert history.compression == 'gzip'
+
+    def test_path_names(self, chemkeds):
+        names = ['corpus/testfile_st.yaml', 'corpus%2Frcm.yaml']
+        with TemporaryDirectory() as temp_dir:
+            filename = os.path.join(temp_dir, 'corpus.h5')
+            write_hdf5(chemkeds[:2], filename, names=names)
+            with pytest.raises(ValueError):
+                write_hdf5(chemkeds[0], filename, names=names[:1])
+            with HDF5Container(filename) as container:
+                assert container.names == names
+                assert names[0] in container
+                assert len(container.read_datapoints(names[0])) == 5
+            loaded = read_hdf5(filename, names[1:])
+        assert loaded[0].datapoints[0].volume_history is not None
+
+    def test_write_loaded(self, chemkeds):
+        with TemporaryDirectory() as temp_dir:
+            filename = os.path.join(temp_dir, 'corpus.h5')
+            write_hdf5(chemkeds[1], filename)
+            rcm = read_hdf5(filename)[0]
+            assert isinstance(rcm._properties['datapoints'][0]['time-histories'][0]['values'],
+                              list)
+
+            yaml_file = os.path.join(temp_dir, 'rcm.yaml')
+            rcm.write_file(yaml_file)
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore')
+                copy = ChemKED(yaml_file)
+                ChemKED(dict_input=rcm._properties)
+        assert np.allclose(copy.datapoints[0].volume_history.quantity,
+                           chemkeds[1].datapoints[0].volume_history.quantity.to('m**3'))
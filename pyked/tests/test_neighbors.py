@@ -0,0 +1,86 @@
+"""
+Test module for neighbors.py
+"""
+# Standard libraries
+import os
+import pkg_resources
+
+# Third-party libraries
+import numpy as np
+import pytest
+
+# Local imports
+from ..chemked import ChemKED
+from ..neighbors import ConditionIndex, transform_conditions, datapoint_conditions
+from ..validation import Q_
+
+
+@pytest.fixture(scope='module')
+def datapoints():
+    datapoints = []
+    for name in ['testfile_st.yaml', 'testfile_st_p5.yaml', 'testfile_rcm.yaml']:
+        filename = pkg_resources.resource_filename(__name__, os.path.join(name))
+        datapoints.extend(ChemKED(filename).datapoints)
+    return datapoints
+
+
+class TestConditionIndex(object):
+    """
+    """
+    @pytest.fixture(autouse=True)
+    def scipy(self):
+        return pytest.importorskip('scipy')
+
+    def test_transform_conditions(self):
+        coordinates = transform_conditions({'temperature': Q_([1000.0, 500.0], 'K'),
+                                            'pressure': [1.0, np.e],
+                                            'equivalence_ratio': 1.0},
+                                           ['temperature', 'pressure', 'equivalence_ratio'])
+        assert np.allclose(coordinates, [[1.0, 0.0, 1.0], [2.0, 1.0, 1.0]])
+        assert np.allclose(transform_conditions([2000.0, 1.0], ['temperature', 'pressure']),
+                           [[0.5, 0.0]])
+
+    def test_datapoint_conditions(self, datapoints):
+        conditions = datapoint_conditions(datapoints[:1], ['temperature', 'pressure'])
+        assert np.allclose(conditions, [[1164.48, 220000.0]])
+        assert np.isnan(datapoint_conditions(datapoints[-1:], ['equivalence_ratio'])[0, 0])
+
+    def test_missing_conditions(self, datapoints):
+        index = ConditionIndex(datapoints)
+        assert len(index) == 9
+        assert 9 not in index.indices
+        index = ConditionIndex(datapoints, fields=['temperature', 'pressure'])
+        assert len(index) == 10
+
+    def test_unknown_field(self, datapoints):
+        with pytest.raises(ValueError):
+            ConditionIndex(datapoints, fields=['temperature', 'volume'])
+
+    def test_query(self, datapoints):
+        index = ConditionIndex(datapoints)
+        conditions = datapoint_conditions([datapoints[2], datapoints[6]], index.fields)
+        distances, indices = index.query(conditions, k=2)
+        assert distances.shape == (2, 2)
+        assert np.allclose(distances[:, 0], 0.0)
+        assert index.datapoints[indices[0, 0]] is datapoints[2]
+        assert index.datapoints[indices[1, 0]] is datapoints[6]
+
+    def test_query_brute_force(self, datapoints):
+        index = ConditionIndex(datapoints, fields=['temperature', 'pressure'], scale=[1.0, 1.0])
+        rng = np.random.RandomState(0)
+        conditions = np.column_stack([rng.uniform(300.0, 1600.0, 100),
+                                      rng.uniform(1.0e5, 3.0e6, 100)])
+        distances, indices = index.query(conditions, k=3)
+        data = transform_conditions(datapoint_conditions(index.datapoints, index.fields),
+                                    index.fields)
+        points = transform_conditions(conditions, index.fields)
+        brute = np.linalg.norm(points[:, np.newaxis, :] - data[np.newaxis, :, :], axis=-1)
+        assert np.allclose(distances, np.sort(brute, axis=1)[:, :3])
+
+    def test_query_radius(self, datapoints):
+        index = ConditionIndex(datapoints, fields=['temperature', 'pressure'], scale=[1.0, 1.0])
+        neighbors = index.query_radius({'temperature': [1164.48, 300.0],
+                                        'pressure': [220000.0, 220000.0]}, 0.01)
+        assert len(neighbors) == 2
+        assert [index.datapoints[i] for i in neighbors[0]] == datapoints[:2]
+        assert len(neighbors[1]) == 0
@@ -0,0 +1,116 @@
+"""
+Test module for objective.py
+"""
+# Standard libraries
+import os
+import pkg_resources
+import warnings
+
+# Third-party libraries
+import numpy as np
+import pytest
+
+# Local imports
+from ..chemked import ChemKED
+from ..objective import ObjectiveFunction
+from ..validation import Q_, yaml
+
+
+@pytest.fixture(scope='module')
+def chemkeds():
+    chemkeds = []
+    for name in ['testfile_st.yaml', 'testfile_uncertainty.yaml', 'testfile_rcm.yaml']:
+        filename = pkg_resources.resource_filename(__name__, os.path.join(name))
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            chemkeds.append(ChemKED(filename))
+    return chemkeds
+
+
+class TestObjectiveFunction(object):
+    """
+    """
+    def test_targets(self, chemkeds):
+        objective = ObjectiveFunction(chemkeds)
+        assert len(objective) == 10
+        assert objective.groups == chemkeds
+        assert list(objective.n_points) == [5, 4, 1]
+        assert np.isclose(objective.target[0], np.log(471.54e-6))
+        # Without an uncertainty, the default of 10% is used
+        assert np.isclose(objective.upper[0], np.log(1.1))
+        # Asymmetric relative uncertainty in testfile_uncertainty.yaml
+        assert np.isclose(objective.upper[8], np.log(1.1))
+        assert np.isclose(objective.lower[8], -np.log(0.95))
+
+    def test_exact_simulation(self, chemkeds):
+        objective = ObjectiveFunction(chemkeds)
+        simulated = np.exp(objective.target)
+        assert objective(simulated) == 0.0
+        total, per_group = objective.evaluate(Q_(simulated*1.0e3, 'ms'))
+        assert total == 0.0
+        assert np.all(per_group == 0.0)
+
+    def test_objective(self, chemkeds):
+        objective = ObjectiveFunction(chemkeds, default_uncertainty=0.5)
+        simulated = np.exp(objective.target + objective.upper)
+        assert np.isclose(objective(simulated), 1.0)
+        simulated = np.exp(objective.target - 2.0*objective.lower)
+        assert np.allclose(objective.residuals(simulated), -2.0)
+        total, per_group = objective.evaluate(simulated)
+        assert np.isclose(total, 4.0)
+        assert np.allclose(per_group, 4.0)
+
+        simulated = np.exp(objective.target)
+        simulated[-1] *= np.exp(objective.upper[-1])
+        total, per_group = objective.evaluate(simulated)
+        assert np.allclose(per_group, [0.0, 0.0, 1.0])
+        assert np.isclose(total, 1.0/3.0)
+        assert np.isclose(objective(simulated), total)
+
+    def test_batch(self, chemkeds):
+        objective = ObjectiveFunction(chemkeds, by='apparatus')
+        rng = np.random.RandomState(0)
+        simulated = np.exp(objective.target + rng.normal(scale=0.2, size=(20, len(objective))))
+        totals = objective(simulated)
+        assert totals.shape == (20,)
+        for row, total in zip(simulated, totals):
+            assert np.isclose(objective(row), total)
+            assert np.isclose(objective.evaluate(row)[0], total)
+        assert objective.group_objectives(simulated).shape == (20, len(objective.groups))
+
+    def test_failed_simulation(self, chemkeds):
+        objective = ObjectiveFunction(chemkeds)
+        simulated = np.exp(objective.target)
+        simulated[3] = np.nan
+        assert np.isnan(objective(simulated))
+
+    def test_nonpositive_lower_bound(self):
+        filename = pkg_resources.resource_filename(__name__, 'testfile_st.yaml')
+        with open(filename, 'r') as f:
+            properties = yaml.safe_load(f)
+        datapoints = properties['datapoints']
+        datapoints[0]['ignition-delay'] = ['471.54 us', {'uncertainty-type': 'relative',
+                                                         'uncertainty': 1.0}]
+        datapoints[1]['ignition-delay'] = ['100 us', {'uncertainty-type': 'absolute',
+                                                      'upper-uncertainty': '50 us',
+                                                      'lower-uncertainty': '150 us'}]
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            objective = ObjectiveFunction(ChemKED(dict_input=properties))
+
+        assert np.all(np.isinf(objective.lower[:2]))
+        assert np.isclose(objective.upper[0], np.log(2.0))
+        assert np.isclose(objective.upper[1], np.log(1.5))
+        # Shorter simulated ignition delays are within the uncertainty
+        simulated = np.exp(objective.target)
+        simulated[:2] *= 0.01
+        assert objective(simulated) == 0.0
+        simulated[:2] = np.exp(objective.target[:2] + objective.upper[:2])
+        assert np.allclose(objective.residuals(simulated)[:2], 1.0)
+
+    def test_no_ignition_delays(self):
+        filename = pkg_resources.resource_filename(__name__, os.path.join('testfile_rcm.yaml'))
+        properties = ChemKED(filename)
+        properties._properties['datapoints'][0].pop('ignition-delay')
+        with pytest.raises(ValueError):
+            ObjectiveFunction(properties)
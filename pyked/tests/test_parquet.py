@@ -0,0 +1,69 @@
+"""
+Test module for parquet.py
+"""
+# Standard libraries
+import warnings
+from tempfile import TemporaryDirectory
+
+# Third-party libraries
+import numpy as np
+import pytest
+
+# Local imports
+from ..parquet import read_parquet, read_table, to_tables, write_parquet
+from .helpers import chemkeds, nominal_and_std, test_files  # noqa: F401
+
+pa = pytest.importorskip('pyarrow')
+
+
+class TestParquet(object):
+    """
+    """
+    def test_tables(self, chemkeds):
+        tables = to_tables(chemkeds)
+        datapoints = tables['datapoints']
+        assert datapoints.num_rows == sum(len(c.datapoints) for c in chemkeds)
+        temperature = datapoints.column('temperature').to_numpy()
+        assert np.isclose(temperature[0], 1164.48)
+        assert np.isclose(datapoints.column('pressure').to_numpy()[0], 220000.0)
+        assert np.isnan(datapoints.column('compression_time').to_numpy()[0])
+
+        histories = tables['histories']
+        assert histories.column('type').to_pylist().count('volume') == 2
+        species = tables['species']
+        assert species.num_rows == sum(len(d.composition) for c in chemkeds
+                                       for d in c.datapoints)
+
+    def test_round_trip(self, chemkeds):
+        with TemporaryDirectory() as temp_dir:
+            write_parquet(chemkeds, temp_dir)
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore')
+                loaded = read_parquet(temp_dir)
+
+        assert len(loaded) == len(chemkeds)
+        for original, copy in zip(chemkeds, loaded):
+            assert copy.reference == original.reference
+            assert copy.apparatus == original.apparatus
+            assert copy.file_authors == original.file_authors
+            for d, d_copy in zip(original.datapoints, copy.datapoints):
+                for attribute in ['temperature', 'pressure', 'ignition_delay', 'pressure_rise']:
+                    value = getattr(d, attribute)
+                    if value is None:
+                        assert getattr(d_copy, attribute) is None
+                        continue
+                    assert np.allclose(nominal_and_std(getattr(d_copy, attribute), value.units),
+                                       nominal_and_std(value, value.units))
+                assert d_copy.get_cantera_composition_string() == \
+                    d.get_cantera_composition_string()
+                assert d_copy.ignition_type == d.ignition_type
+                if d.volume_history is not None:
+                    assert np.allclose(d_copy.volume_history.quantity,
+                                       d.volume_history[1].to('m**3'))
+
+    def test_column_pruning(self, chemkeds):
+        with TemporaryDirectory() as temp_dir:
+            write_parquet(chemkeds, temp_dir)
+            table = read_table(temp_dir, columns=['temperature', 'ignition_delay'])
+        assert table.column_names == ['temperature', 'ignition_delay']
+        assert table.column('temperature').to_numpy().dtype == np.float64
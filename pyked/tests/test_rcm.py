@@ -0,0 +1,99 @@
+"""
+Test module for rcm.py
+"""
+# Standard libraries
+import os
+import pkg_resources
+
+# Third-party libraries
+import numpy as np
+import pytest
+
+# Local imports
+from ..chemked import ChemKED
+from ..rcm import (compressed_conditions, isentropic_compression, isentropic_temperature,
+                   get_volume_history)
+from ..thermo import NASA7
+from .._version import __version__
+from ..validation import schema, yaml
+
+schema['chemked-version']['allowed'].append(__version__)
+
+# Constant cp/R of 3.5, like an ideal diatomic gas
+constant_cp_thermo = {
+    'T_ranges': [200.0, 1000.0, 5000.0],
+    'data': [3.5, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 3.5, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0],
+}
+
+
+@pytest.fixture(scope='module')
+def rcm_chemked():
+    filename = pkg_resources.resource_filename(__name__, os.path.join('testfile_rcm.yaml'))
+    with open(filename, 'r') as f:
+        properties = yaml.safe_load(f)
+
+    for dp in properties['datapoints']:
+        for species in dp['composition']['species']:
+            species['thermo'] = constant_cp_thermo
+
+    return ChemKED(dict_input=properties)
+
+
+class TestIsentropicCompression(object):
+    """
+    """
+    def test_isentropic_temperature_constant_cp(self):
+        thermo = NASA7(['N2'], [[200.0, 1000.0, 5000.0]], [constant_cp_thermo['data']])
+        T_initial = np.array([300.0, 350.0, 400.0])
+        volume_ratio = np.array([[1.0, 0.5, 0.1], [1.0, 0.2, 0.05], [1.0, 0.1, np.nan]])
+        T = isentropic_temperature(T_initial[:, np.newaxis], volume_ratio, [[[1.0]]], thermo)
+        assert np.allclose(T, T_initial[:, np.newaxis]*volume_ratio**(-1.0/2.5), equal_nan=True)
+
+    def test_isentropic_temperature_variable_cp(self):
+        # The entropy at the computed temperature must match the entropy change of compression
+        N2_data = [2.92664000E+00, 1.48797680E-03, -5.68476000E-07, 1.00970380E-10,
+                   -6.75335100E-15, -9.22797700E+02, 5.98052800E+00, 3.29867700E+00,
+                   1.40824040E-03, -3.96322200E-06, 5.64151500E-09, -2.44485400E-12,
+                   -1.02089990E+03, 3.95037200E+00]
+        thermo = NASA7(['N2'], [[300.0, 1000.0, 5000.0]], [N2_data])
+        T = isentropic_temperature(300.0, 0.05, [1.0], thermo)
+        assert T < 300.0*0.05**(-1.0/2.5)
+        assert np.isclose(thermo.mixture_s_R(T, [1.0]) - np.log(T),
+                          thermo.mixture_s_R(300.0, [1.0]) - np.log(300.0) - np.log(0.05))
+
+    def test_volume_history(self, rcm_chemked):
+        time, volume = get_volume_history(rcm_chemked.datapoints[0])
+        assert np.isclose(time[1], 1.0e-3)
+        assert np.isclose(volume[0], 5.47669375e-4)
+
+    def test_compressed_conditions(self, rcm_chemked):
+        dp = rcm_chemked.datapoints[0]
+        time, volume = get_volume_history(dp)
+        compression_ratio = volume[0]/volume.min()
+        T_c, P_c = compressed_conditions(rcm_chemked.datapoints)
+        assert np.isclose(T_c[0].magnitude, 297.4*compression_ratio**(1.0/2.5))
+        assert np.isclose(P_c[0].to('torr').magnitude, 958.0*compression_ratio**1.4)
+
+    def test_histories(self, rcm_chemked):
+        result = isentropic_compression(rcm_chemked.datapoints)
+        time, volume = get_volume_history(rcm_chemked.datapoints[0])
+        assert result.temperature.shape == (1, len(time))
+        assert np.allclose(result.temperature[0].magnitude,
+                           297.4*(volume[0]/volume)**(1.0/2.5))
+        T_c, P_c = compressed_conditions(rcm_chemked.datapoints)
+        assert np.isclose(np.nanmax(result.temperature.magnitude), T_c[0].magnitude)
+
+    def test_missing_thermo(self):
+        filename = pkg_resources.resource_filename(__name__, os.path.join('testfile_rcm.yaml'))
+        c = ChemKED(filename)
+        with pytest.raises(ValueError):
+            compressed_conditions(c.datapoints)
+
+    def test_no_volume_history(self, rcm_chemked):
+        filename = pkg_resources.resource_filename(__name__, os.path.join('testfile_st.yaml'))
+        st = ChemKED(filename)
+        thermo = NASA7(['H2', 'O2', 'Ar', 'N2'], [constant_cp_thermo['T_ranges']]*4,
+                       [constant_cp_thermo['data']]*4)
+        T_c, P_c = compressed_conditions(st.datapoints[:1] + rcm_chemked.datapoints, thermo)
+        assert np.isnan(T_c[0].magnitude)
+        assert np.isfinite(T_c[1].magnitude)
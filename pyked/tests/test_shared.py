@@ -0,0 +1,96 @@
+"""
+Test module for shared.py
+"""
+# Standard libraries
+import multiprocessing
+import os
+import pickle
+import pkg_resources
+import warnings
+
+# Third-party libraries
+import numpy as np
+import pytest
+
+# Local imports
+from ..chemked import ChemKED, DataPoint, _history_values_lists
+
+shared = pytest.importorskip('pyked.shared')
+
+
+def _volumes(shared_chemked):
+    chemkeds = shared_chemked.attach()
+    volume = chemkeds[1].datapoints[0].volume_history.quantity.magnitude
+    return (os.getpid(), volume.flags.owndata, float(volume.sum()),
+            [len(c.datapoints) for c in chemkeds])
+
+
+@pytest.fixture(scope='module')
+def chemkeds():
+    chemkeds = []
+    for name in ['testfile_st.yaml', 'testfile_rcm.yaml', 'testfile_uncertainty.yaml']:
+        filename = pkg_resources.resource_filename(__name__, name)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            chemkeds.append(ChemKED(filename))
+    return chemkeds
+
+
+class TestSharedChemKED(object):
+    """
+    """
+    def test_attach(self, chemkeds):
+        with shared.SharedChemKED(chemkeds) as shared_chemked:
+            assert len(shared_chemked) == 3
+            copied = pickle.loads(pickle.dumps(shared_chemked))
+            assert len(pickle.dumps(shared_chemked)) < len(pickle.dumps(chemkeds))
+            attached = copied.attach()
+            for c, c_attached in zip(chemkeds, attached):
+                for d, d_other in zip(c.datapoints, c_attached.datapoints):
+                    for prop in DataPoint.value_unit_props:
+                        attribute = prop.replace('-', '_')
+                        assert repr(getattr(d_other, attribute)) == repr(getattr(d, attribute))
+                assert _history_values_lists(c_attached._properties) == c._properties
+
+            volume = attached[1].datapoints[0].volume_history.quantity.magnitude
+            expected = chemkeds[1].datapoints[0].volume_history.quantity.magnitude
+            assert np.array_equal(volume, expected)
+            assert not volume.flags.owndata
+            assert not volume.flags.writeable
+            with pytest.raises(ValueError):
+                volume[0] = 0.0
+            del attached, volume
+            copied._shm.close()
+
+    def test_attach_properties_views(self, chemkeds, tmpdir):
+        with shared.SharedChemKED(chemkeds) as shared_chemked:
+            attached = shared_chemked.attach()
+            buffer = np.frombuffer(shared_chemked._shm.buf, dtype=np.uint8)
+            values = attached[1]._properties['datapoints'][0]['time-histories'][0]['values']
+            assert isinstance(values, np.ndarray)
+            assert np.shares_memory(values, buffer)
+
+            filename = str(tmpdir.join('attached.yaml'))
+            attached[1].write_file(filename)
+            assert ChemKED(filename, skip_validation=True)._properties == chemkeds[1]._properties
+            copied = pickle.loads(pickle.dumps(attached[1]))
+            assert copied._properties == chemkeds[1]._properties
+            del attached, values, buffer
+
+    def test_workers(self, chemkeds):
+        expected = float(chemkeds[1].datapoints[0].volume_history.quantity.magnitude.sum())
+        with shared.SharedChemKED(chemkeds) as shared_chemked:
+            with multiprocessing.Pool(2) as pool:
+                results = pool.map(_volumes, [shared_chemked]*2)
+        for pid, owndata, volume, n_points in results:
+            assert pid != os.getpid()
+            assert not owndata
+            assert np.isclose(volume, expected)
+            assert n_points == [len(c.datapoints) for c in chemkeds]
+
+    def test_unlink_in_worker(self, chemkeds):
+        with shared.SharedChemKED(chemkeds[0]) as shared_chemked:
+            copied = pickle.loads(pickle.dumps(shared_chemked))
+            copied._owner = -1
+            with pytest.raises(RuntimeError):
+                copied.unlink()
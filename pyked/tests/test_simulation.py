@@ -0,0 +1,161 @@
+"""
+Test module for simulation.py
+"""
+# Standard libraries
+import os
+import pkg_resources
+from tempfile import TemporaryDirectory
+
+# Third-party libraries
+import numpy as np
+import pytest
+
+# Local imports
+from ..chemked import ChemKED
+from ..simulation import (DummySolver, Solver, read_checkpoint, run_tasks, schedule_tasks,
+                          tasks_from_chemked)
+
+
+@pytest.fixture(scope='module')
+def chemkeds():
+    chemkeds = []
+    for name in ['testfile_st.yaml', 'testfile_rcm.yaml']:
+        filename = pkg_resources.resource_filename(__name__, os.path.join(name))
+        chemkeds.append(ChemKED(filename))
+    return chemkeds
+
+
+@pytest.fixture(scope='module')
+def tasks(chemkeds):
+    return tasks_from_chemked(chemkeds)
+
+
+class CountingSolver(DummySolver):
+    """Dummy solver that counts the tasks it solves and fails on one of them.
+    """
+    def __init__(self, mechanism=None, fail_key=None):
+        super(CountingSolver, self).__init__(n_steps=100)
+        self.mechanism = mechanism
+        self.solved = []
+        self.fail_key = fail_key
+
+    def solve(self, task):
+        if task.key == self.fail_key:
+            raise RuntimeError('solver failed')
+        self.solved.append(task.key)
+        return super(CountingSolver, self).solve(task)
+
+
+class TestTasks(object):
+    """
+    """
+    def test_tasks_from_chemked(self, chemkeds):
+        tasks = tasks_from_chemked(chemkeds)
+        assert len(tasks) == 6
+        assert [t.key for t in tasks[4:]] == ['0:4', '1:0']
+        task = tasks[0]
+        assert task.experiment_type == 'ignition delay'
+        assert task.apparatus == 'shock tube'
+        assert np.isclose(task.temperature, 1164.48)
+        assert np.isclose(task.pressure, 220000.0)
+        assert task.composition == 'H2:4.4400e-03, O2:5.5600e-03, Ar:9.9000e-01'
+        assert task.composition_type == 'mole'
+        assert task.ignition_target == 'pressure'
+        assert task.volume_history is None
+        assert np.isclose(task.end_time, 10.0*471.54e-6)
+
+        rcm_task = tasks[5]
+        assert rcm_task.apparatus == 'rapid compression machine'
+        time, volume = rcm_task.volume_history
+        assert len(time) == len(volume)
+        assert rcm_task.end_time >= time[-1]
+
+    def test_species_conversion(self, chemkeds):
+        species_conversion = {'H2': 'h2', '1S/O2/c1-2': 'o2'}
+        tasks = tasks_from_chemked(chemkeds[0], species_conversion=species_conversion)
+        assert tasks[0].composition == 'h2:4.4400e-03, o2:5.5600e-03, Ar:9.9000e-01'
+        assert len(species_conversion) == 2
+
+    def test_schedule(self, chemkeds):
+        tasks = tasks_from_chemked(chemkeds)
+        chunks = schedule_tasks(tasks, Solver(), 4)
+        assert [len(c) for c in chunks] == [4, 2]
+        assert chunks[0][0].key == '1:0'
+
+
+class TestDummySolver(object):
+    """
+    """
+    def test_constant_conditions(self, chemkeds):
+        solver = DummySolver()
+        task = tasks_from_chemked(chemkeds[0])[0]._replace(end_time=None)
+        expected = solver.correlation(task.temperature, task.pressure)
+        assert np.isclose(solver.solve(task), expected, rtol=1.0e-3)
+
+    def test_compression(self, chemkeds):
+        task = tasks_from_chemked(chemkeds[1])[0]
+        solver = DummySolver(A=1.0e-10, Ea_R=10000.0, n=0.0)
+        # Compression raises the temperature, so ignition happens sooner than at the initial
+        # conditions
+        ignition_delay = solver.solve(task._replace(end_time=1.0))
+        assert ignition_delay < solver.correlation(task.temperature, task.pressure)
+
+    def test_no_ignition(self, chemkeds):
+        task = tasks_from_chemked(chemkeds[0])[0]._replace(end_time=1.0e-9)
+        assert np.isnan(DummySolver().solve(task))
+
+
+class TestRunTasks(object):
+    """
+    """
+    def test_serial_and_parallel(self, chemkeds):
+        tasks = tasks_from_chemked(chemkeds)
+        serial = run_tasks(tasks, DummySolver(n_steps=1000), processes=1)
+        parallel = run_tasks(tasks, DummySolver(n_steps=1000), processes=2, chunksize=1)
+        assert [r.key for r in serial] == [t.key for t in tasks]
+        assert serial == parallel
+        assert all(r.status == 'ok' for r in serial)
+
+    def test_failed_task(self, chemkeds):
+        tasks = tasks_from_chemked(chemkeds)
+        results = run_tasks(tasks, CountingSolver(fail_key='0:2'), processes=1)
+        assert results[2].status == 'failed'
+        assert 'solver failed' in results[2].message
+        assert np.isnan(results[2].ignition_delay)
+        assert results[3].status == 'ok'
+
+    def test_checkpoint_resume(self, chemkeds):
+        tasks = tasks_from_chemked(chemkeds)
+        with TemporaryDirectory() as temp_dir:
+            checkpoint = os.path.join(temp_dir, 'results.jsonl')
+            first = run_tasks(tasks[:3], CountingSolver(), processes=1, checkpoint=checkpoint)
+            with open(checkpoint, 'a') as f:
+                f.write('{"key": "0:3", "ignit')
+
+            solver = CountingSolver()
+            results = run_tasks(tasks, solver, processes=1, checkpoint=checkpoint)
+            assert sorted(solver.solved) == ['0:3', '0:4', '1:0']
+            assert results[:3] == first
+            assert len(read_checkpoint(checkpoint)) == 6
+
+            solver = CountingSolver()
+            assert run_tasks(tasks, solver, processes=1, checkpoint=checkpoint) == results
+            assert solver.solved == []
+
+    def test_checkpoint_reordered(self, chemkeds):
+        tasks = tasks_from_chemked(chemkeds)
+        with TemporaryDirectory() as temp_dir:
+            checkpoint = os.path.join(temp_dir, 'results.jsonl')
+            first = run_tasks(tasks, CountingSolver(), processes=1, checkpoint=checkpoint)
+
+            solver = CountingSolver()
+            reordered = tasks_from_chemked(chemkeds[::-1])
+            results = run_tasks(reordered, solver, processes=1, checkpoint=checkpoint)
+            assert solver.solved == []
+            assert [r.key for r in results] == [t.key for t in reordered]
+            assert [r.ignition_delay for r in results] == \
+                [r.ignition_delay for r in first[5:] + first[:5]]
+
+            # Other settings of the solver do not reuse the results
+            run_tasks(reordered, DummySolver(n_steps=10), processes=1, checkpoint=checkpoint)
+            assert len(read_checkpoint(checkpoint)) == 12
@@ -0,0 +1,88 @@
+"""
+Test module for thermo.py
+"""
+# Standard libraries
+import os
+import pkg_resources
+
+# Third-party libraries
+import numpy as np
+import pytest
+
+# Local imports
+from ..chemked import ChemKED
+from ..thermo import NASA7, get_t_ranges
+from .._version import __version__
+from ..validation import schema
+
+schema['chemked-version']['allowed'].append(__version__)
+
+# GRI-Mech 3.0 data for N2 and Ar
+N2_data = [2.92664000E+00, 1.48797680E-03, -5.68476000E-07, 1.00970380E-10, -6.75335100E-15,
+           -9.22797700E+02, 5.98052800E+00, 3.29867700E+00, 1.40824040E-03, -3.96322200E-06,
+           5.64151500E-09, -2.44485400E-12, -1.02089990E+03, 3.95037200E+00]
+Ar_data = [2.5, 0.0, 0.0, 0.0, 0.0, -7.45375000E+02, 4.36600000E+00,
+           2.5, 0.0, 0.0, 0.0, 0.0, -7.45375000E+02, 4.36600000E+00]
+
+
+@pytest.fixture(scope='module')
+def thermo():
+    return NASA7(['N2', 'Ar'], [[300.0, 1000.0, 5000.0], [300.0, 1000.0, 5000.0]],
+                 [N2_data, Ar_data])
+
+
+class TestNASA7(object):
+    """
+    """
+    def test_t_ranges(self):
+        assert get_t_ranges([200, '1000 K', 5000.0]) == [200.0, 1000.0, 5000.0]
+        assert np.allclose(get_t_ranges(['200 K', '1 kK', '5000 K']), [200.0, 1000.0, 5000.0])
+
+    def test_mismatched_inputs(self):
+        with pytest.raises(ValueError):
+            NASA7(['N2', 'Ar'], [[300.0, 1000.0, 5000.0]], [N2_data, Ar_data])
+
+    def test_shapes(self, thermo):
+        T = np.linspace(300.0, 3000.0, 12).reshape(3, 4)
+        assert thermo.cp_R(T).shape == (3, 4, 2)
+        assert thermo.h_RT(T).shape == (3, 4, 2)
+        assert thermo.s_R(T).shape == (3, 4, 2)
+        assert thermo.cp_R(1000.0).shape == (2,)
+
+    def test_properties(self, thermo):
+        cp = thermo.cp_R([298.15, 1000.0, 2000.0])
+        assert np.allclose(cp[:, 1], 2.5)
+        assert np.allclose(cp[:, 0]*8.3144598, [29.12, 32.70, 36.0], rtol=5e-3)
+        assert np.allclose(thermo.s_R(298.15)*8.3144598, [191.6, 154.8], rtol=1e-3)
+        assert np.allclose(thermo.h_RT(298.15), 0.0, atol=1e-3)
+
+    def test_continuity(self, thermo):
+        T = np.array([1000.0 - 1e-6, 1000.0 + 1e-6])
+        assert np.allclose(thermo.cp_R(T)[0], thermo.cp_R(T)[1], rtol=1e-4)
+        assert np.allclose(thermo.h_RT(T)[0], thermo.h_RT(T)[1], rtol=1e-4)
+        assert np.allclose(thermo.s_R(T)[0], thermo.s_R(T)[1], rtol=1e-4)
+
+    def test_mixture(self, thermo):
+        T = np.array([300.0, 1500.0])
+        X = np.array([[0.5, 0.5], [0.79, 0.21]])
+        cp = thermo.mixture_cp_R(T, X)
+        assert cp.shape == (2,)
+        assert np.allclose(cp, np.sum(thermo.cp_R(T)*X, axis=1))
+
+    def test_from_datapoints(self):
+        filename = pkg_resources.resource_filename(__name__,
+                                                   os.path.join('testfile_st_thermo.yaml'))
+        c = ChemKED(filename)
+        thermo = NASA7.from_datapoints(c.datapoints)
+        assert thermo.species_names == ['H2', 'O2', 'Ar']
+        assert np.allclose(thermo.T_ranges, [[200.0, 1000.0, 5000.0]]*3)
+        T = 300.0
+        low = np.array([8.0, 9.0, 10.0, 11.0, 12.0])
+        assert np.allclose(thermo.cp_R(T), np.sum(low*T**np.arange(5)))
+
+    def test_from_datapoints_missing(self):
+        filename = pkg_resources.resource_filename(__name__,
+                                                   os.path.join('testfile_st_thermo.yaml'))
+        c = ChemKED(filename)
+        with pytest.raises(ValueError):
+            NASA7.from_datapoints(c.datapoints, ['H2', 'N2'])
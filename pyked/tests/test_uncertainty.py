@@ -0,0 +1,128 @@
+"""
+Test module for uncertainty.py
+"""
+# Standard libraries
+import os
+import pkg_resources
+import warnings
+
+# Third-party libraries
+import numpy as np
+import pytest
+from uncertainties import unumpy
+
+# Local imports
+from ..chemked import ChemKED
+from ..uncertainty import UncertainArray, parse_quantities
+from ..validation import Q_
+
+
+@pytest.fixture(scope='module')
+def chemked():
+    filename = pkg_resources.resource_filename(__name__, os.path.join('testfile_uncertainty.yaml'))
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        return ChemKED(filename)
+
+
+class TestUncertainArray(object):
+    """
+    """
+    @pytest.mark.parametrize('field, units', [
+        ('temperature', 'kelvin'),
+        ('ignition_delay', 'microsecond'),
+        ('pressure', 'atm'),
+    ])
+    def test_matches_datapoints(self, chemked, field, units):
+        array = UncertainArray.from_chemked(chemked, field, units)
+        expected = UncertainArray.from_quantities([getattr(dp, field) for dp in chemked.datapoints],
+                                                  units)
+        assert np.allclose(array.nominal, expected.nominal)
+        assert np.allclose(array.std, expected.std)
+        assert array.units == Q_(1.0, units).units
+
+    def test_parse_quantities(self):
+        values = [['300 K', {'uncertainty-type': 'absolute', 'uncertainty': '2 K'}],
+                  ['26.85 degC', {'uncertainty-type': 'relative', 'uncertainty': 0.1}],
+                  None,
+                  ['1/2 kK']]
+        nominal, std, lower, upper = parse_quantities(values, 'kelvin')
+        assert np.allclose(nominal[[0, 1, 3]], [300.0, 300.0, 500.0])
+        assert np.isnan(nominal[2])
+        assert np.allclose(std[[0, 1, 3]], [2.0, 2.685, 0.0])
+        assert np.allclose(lower[[0, 1, 3]], std[[0, 1, 3]])
+        assert np.allclose(upper[[0, 1, 3]], std[[0, 1, 3]])
+
+    def test_parse_errors(self):
+        with pytest.raises(ValueError):
+            parse_quantities([['300 K', {'uncertainty-type': 'relative'}]], 'kelvin')
+        with pytest.raises(ValueError):
+            parse_quantities([['300 K', {'uncertainty-type': 'bad', 'uncertainty': 0.1}]],
+                             'kelvin')
+
+    def test_missing_field(self, chemked):
+        array = UncertainArray.from_chemked(chemked, 'compressed-temperature')
+        assert array.units == Q_(1.0, 'kelvin').units
+        assert np.all(np.isnan(array.nominal))
+
+    def test_rcm_field(self):
+        filename = pkg_resources.resource_filename(__name__, os.path.join('testfile_rcm.yaml'))
+        array = UncertainArray.from_chemked([ChemKED(filename)], 'compression_time', 'ms')
+        assert np.allclose(array.nominal, [38.0])
+
+    def test_propagation(self):
+        array = UncertainArray([1000.0, 1250.0, 1500.0], [10.0, 0.0, 30.0], 'kelvin')
+        expected = 1000.0/unumpy.uarray(array.nominal, array.std)
+        inverse = array.reciprocal(1000.0)
+        assert np.allclose(inverse.nominal, unumpy.nominal_values(expected))
+        assert np.allclose(inverse.std, unumpy.std_devs(expected))
+        assert inverse.units == Q_(1.0, '1/K').units
+
+        expected = unumpy.log(unumpy.uarray(array.nominal, array.std))
+        assert np.allclose(array.log().nominal, unumpy.nominal_values(expected))
+        assert np.allclose(array.log().std, unumpy.std_devs(expected))
+
+    def test_unit_conversion(self):
+        array = UncertainArray([300.0, 400.0], [1.0, 2.0], 'kelvin')
+        celsius = array.to('degC')
+        assert np.allclose(celsius.nominal, [26.85, 126.85])
+        assert np.allclose(celsius.std, [1.0, 2.0])
+        millis = UncertainArray([1.0e-3], [1.0e-4], 'second').to('ms')
+        assert np.allclose(millis.nominal, 1.0)
+        assert np.allclose(millis.std, 0.1)
+
+    def test_to_quantities(self):
+        array = UncertainArray([300.0, np.nan, 400.0], [1.0, np.nan, 0.0], 'kelvin')
+        quantities = array.to_quantities()
+        assert quantities[0].value == Q_(300.0, 'K')
+        assert quantities[0].error == Q_(1.0, 'K')
+        assert quantities[1] is None
+        assert quantities[2] == Q_(400.0, 'K')
+        assert len(array[[0, 2]]) == 2
+
+    def test_asymmetric_bounds(self, chemked):
+        temperature = UncertainArray.from_chemked(chemked, 'temperature')
+        assert np.allclose(temperature.lower, [10.0, 0.0, 5.0, 116.448])
+        assert np.allclose(temperature.upper, [10.0, 0.0, 10.0, 58.224])
+        assert np.allclose(temperature.std, [10.0, 0.0, 10.0, 116.448])
+        assert list(temperature.is_asymmetric) == [False, False, True, True]
+
+        tau = UncertainArray.from_chemked(chemked, 'ignition_delay', 'us')
+        assert np.allclose(tau.lower_bound[2:], [461.54, 471.54*0.95])
+        assert np.allclose(tau.upper_bound[2:], [474.54, 471.54*1.1])
+        assert np.allclose(tau[2:].to('ms').upper_bound, [0.47454, 0.471540*1.1])
+
+    def test_asymmetric_propagation(self):
+        array = UncertainArray([1000.0], [10.0], 'kelvin', lower=[10.0], upper=[20.0])
+        inverse = array.reciprocal(1000.0)
+        assert np.allclose(inverse.lower_bound, 1000.0/1020.0)
+        assert np.allclose(inverse.upper_bound, 1000.0/990.0)
+        log = array.log()
+        assert np.allclose(log.lower_bound, np.log(990.0))
+        assert np.allclose(log.upper_bound, np.log(1020.0))
+
+    def test_normalized_residuals(self):
+        array = UncertainArray([1.0, 1.0, 1.0, 1.0], [0.2, 0.2, 0.0, 0.0], 'second',
+                               lower=[0.1, 0.1, 0.0, 0.0], upper=[0.2, 0.2, 0.0, 0.0])
+        residuals = array.normalized_residuals(Q_([1200.0, 800.0, 1000.0, 1100.0], 'ms'))
+        assert np.allclose(residuals, [1.0, -2.0, 0.0, np.inf])
@@ -3,16 +3,26 @@ Tests for the utils
 """
 
 # Standard libraries
+import json
 import os
 import pkg_resources
 from requests.exceptions import ConnectionError
 import socket
+import subprocess
+import sys
 
+import numpy as np
 import pytest
 import yaml
 
-from ..validation import schema, OurValidator, compare_name, property_units
+from .. import client as lookup_client
+from ..cache import MemoryCache
+from ..chemked import ChemKED
+from ..client import OfflineClient
+from ..validation import (schema, OurValidator, compare_name, property_units, validate_cached,
+                          check_compositions, ValidationProfile, main)
 from .._version import __version__
+from .test_client import file_records
 
 
 def no_internet(host='8.8.8.8', port=53, timeout=1):
@@ -848,3 +858,219 @@ class TestValidator(object):
         thermo['T_ranges'] = [200.0, '1000 K', 5000.0]
         properties['datapoints'][0]['composition']['species'][0]['thermo'] = thermo
         assert not v.validate(properties)
+
+
+class CountingClient(OfflineClient):
+    """Offline client that records each lookup.
+    """
+    def __init__(self, snapshot=None):
+        super(CountingClient, self).__init__(snapshot)
+        self.lookups = []
+
+    def _get(self, kind, key):
+        self.lookups.append(key)
+        return super(CountingClient, self)._get(kind, key)
+
+
+class TestValidateCached(object):
+    """
+    """
+    @pytest.fixture(scope='function')
+    def properties(self):
+        filename = pkg_resources.resource_filename(__name__, 'testfile_st.yaml')
+        with open(filename, 'r') as f:
+            return yaml.safe_load(f)
+
+    def test_unchanged(self, properties):
+        cache = MemoryCache()
+        client = CountingClient(file_records(properties))
+        assert validate_cached(properties, cache, client=client) == {}
+        assert len(client.lookups) == 2
+        # The rest of the fields, the reference, the file authors, and 5 datapoints
+        assert len(cache) == 8
+
+        assert validate_cached(properties, cache, client=client) == {}
+        assert len(client.lookups) == 2
+        assert len(cache) == 8
+
+    def test_changed_sections(self, properties):
+        cache = MemoryCache()
+        client = CountingClient(file_records(properties))
+        validate_cached(properties, cache, client=client)
+
+        properties['datapoints'][2]['temperature'] = ['1200 K']
+        assert validate_cached(properties, cache, client=client) == {}
+        assert len(client.lookups) == 2
+        assert len(cache) == 9
+
+        properties['reference']['year'] = 2010
+        errors = validate_cached(properties, cache, client=client)
+        assert 'year should be 2007' in errors['reference'][0]
+        assert client.lookups[2:] == ['10.1016/j.ijhydene.2007.04.008']
+        assert len(cache) == 9
+
+        # The invalid reference was not cached
+        errors = validate_cached(properties, cache, client=client)
+        assert 'year should be 2007' in errors['reference'][0]
+        assert len(client.lookups) == 4
+
+    def test_new_process(self, properties, tmpdir):
+        """The keys do not change when Cerberus first expands the schema in a process.
+        """
+        script = tmpdir.join('validate.py')
+        script.write(
+            'import json, sys, warnings\n'
+            'from pyked.cache import MemoryCache\n'
+            'from pyked.client import OfflineClient\n'
+            'from pyked.validation import validate_cached\n'
+            'properties, records = json.load(sys.stdin)\n'
+            'cache = MemoryCache()\n'
+            'client = OfflineClient(records)\n'
+            'validate_cached(properties, cache, client=client)\n'
+            'size = len(cache)\n'
+            'validate_cached(properties, cache, client=client)\n'
+            'print(size, len(cache))\n')
+        root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        output = subprocess.run(
+            [sys.executable, str(script)], check=True, stdout=subprocess.PIPE,
+            input=json.dumps([properties, file_records(properties)]).encode('utf-8'),
+            env=dict(os.environ, PYTHONPATH=root)).stdout
+        assert output.split() == [b'8', b'8']
+
+    def test_skipped_lookups(self, properties):
+        cache = MemoryCache()
+        client = CountingClient()
+        with pytest.warns(UserWarning):
+            assert validate_cached(properties, cache, client=client) == {}
+        assert len(cache) == 6
+
+        with pytest.warns(UserWarning):
+            validate_cached(properties, cache, client=client)
+        assert len(client.lookups) == 4
+
+    def test_chemked(self, properties, monkeypatch):
+        cache = MemoryCache()
+        client = CountingClient(file_records(properties))
+        monkeypatch.setattr(lookup_client, 'default_client', client)
+        ChemKED(dict_input=properties, validation_cache=cache)
+        ChemKED(dict_input=properties, validation_cache=cache)
+        assert len(client.lookups) == 2
+        assert len(cache) == 8
+
+
+class TestCheckCompositions(object):
+    """
+    """
+    def test_check_compositions(self):
+        compositions = [
+            {'kind': 'mole fraction', 'species': [{'amount': [0.25]}, {'amount': [0.75]}]},
+            {'kind': 'mole percent', 'species': [{'amount': [40.0]}, {'amount': [60]}]},
+            {'kind': 'mass fraction', 'species': [{'amount': [1.2]}, {'amount': [-0.2]}]},
+            {'kind': 'mole fraction', 'species': [{'amount': [0.5]}, {'amount': [0.4]}]},
+            {'kind': 'bad value', 'species': [{'amount': [1.0]}]},
+            {'kind': 'mole fraction', 'species': [{'amount': ['1.0']}]},
+            {'kind': 'mole fraction', 'species': []},
+        ]
+        valid, invalid = check_compositions(compositions)
+        assert valid.tolist() == [True, True, False, False, False, False, False]
+        assert invalid.tolist() == [2, 3]
+
+        valid, invalid = check_compositions([])
+        assert len(valid) == len(invalid) == 0
+
+    def test_same_as_rule(self):
+        """The compositions found valid or invalid are the same as with the validator.
+        """
+        random = np.random.RandomState(1)
+        compositions = []
+        for _ in range(50):
+            amounts = random.dirichlet(np.ones(random.randint(1, 6)))
+            amounts += random.choice([0.0, 0.0, 0.05, -0.5], size=amounts.size)
+            compositions.append({'kind': 'mole fraction', 'species': [
+                {'species-name': 'A{}'.format(i), 'InChI': '1S/Ar', 'amount': [float(a)]}
+                for i, a in enumerate(amounts)]})
+        valid, invalid = check_compositions(compositions)
+        assert len(invalid) > 0 and valid.sum() + len(invalid) == 50
+
+        validator = OurValidator(schema)
+        for composition, is_valid in zip(compositions, valid):
+            assert validator.validate({'datapoints': [{'composition': composition}]},
+                                      update=True) == is_valid
+
+    def test_fallback(self):
+        """Compositions are checked again for each document, however the validator is called.
+        """
+        validator = OurValidator(schema)
+        good = {'kind': 'mole fraction', 'species': [
+            {'species-name': 'Ar', 'InChI': '1S/Ar', 'amount': [1.0]}]}
+        bad = {'kind': 'mole fraction', 'species': [
+            {'species-name': 'Ar', 'InChI': '1S/Ar', 'amount': [0.5]}]}
+        assert validator({'datapoints': [{'composition': good}]}, update=True)
+        assert not validator({'datapoints': [{'composition': bad}]}, update=True)
+
+
+class TestValidationProfile(object):
+    """
+    """
+    def test_profile(self):
+        filename = pkg_resources.resource_filename(__name__, 'testfile_st.yaml')
+        with open(filename, 'r') as f:
+            properties = yaml.safe_load(f)
+        profile = ValidationProfile()
+        validator = OurValidator(schema, client=OfflineClient(file_records(properties)),
+                                 profile=profile)
+        assert validator.validate(properties)
+        assert validator.validate(properties)
+
+        report = profile.report()
+        assert report['documents'] == 2
+        assert report['rules']['isvalid_reference']['calls'] == 2
+        assert report['rules']['check_compositions']['calls'] == 2
+        assert report['fields']['datapoints']['calls'] == 2
+        assert set(report['fields']) == set(properties)
+        assert report['time'] >= sum(t['time'] for t in report['fields'].values())
+        times = [t['time'] for t in report['rules'].values()]
+        assert times == sorted(times, reverse=True)
+
+    def test_chemked(self):
+        filename = pkg_resources.resource_filename(__name__, 'testfile_st.yaml')
+        profile = ValidationProfile()
+        with pytest.warns(UserWarning):
+            ChemKED(filename, validation_profile=profile)
+        assert profile.report()['rules']['isvalid_quantity']['calls'] > 0
+
+    def test_main(self, tmpdir, capsys):
+        filename = pkg_resources.resource_filename(__name__, 'testfile_st.yaml')
+        with open(filename, 'r') as f:
+            properties = yaml.safe_load(f)
+        properties['chemked-version'] = 'bad'
+        invalid = str(tmpdir.join('invalid.yaml'))
+        with open(invalid, 'w') as f:
+            yaml.safe_dump(properties, f)
+        report = str(tmpdir.join('report.json'))
+
+        with pytest.warns(UserWarning):
+            assert main(['--offline', filename, '-p', report]) == 0
+        with open(report, 'r') as f:
+            assert json.load(f)['documents'] == 1
+        assert capsys.readouterr().out == '{}: valid\n'.format(filename)
+
+        broken = str(tmpdir.join('broken.yaml'))
+        with open(broken, 'w') as f:
+            f.write('datapoints: [\n')
+        properties['chemked-version'] = __version__
+        properties['datapoints'][0]['temperature'] = ['1000 furlongs']
+        bad_units = str(tmpdir.join('bad_units.yaml'))
+        with open(bad_units, 'w') as f:
+            yaml.safe_dump(properties, f)
+
+        with pytest.warns(UserWarning):
+            assert main(['--offline', '--profile', '--', broken, bad_units, filename,
+                         invalid]) == 1
+        out = capsys.readouterr().out
+        assert 'broken.yaml: ParserError: ' in out
+        assert 'bad_units.yaml: ' in out
+        assert '{}: valid'.format(filename) in out
+        assert "invalid.yaml: {'chemked-version'" in out
+        # The broken file is not counted, since it was not parsed
+        assert json.loads(out[out.index('{\n'):])['documents'] == 3
@@ -0,0 +1,184 @@
+"""
+Module for evaluating species thermodynamic data given in ChemKED compositions
+"""
+import numpy as np
+
+# Local imports
+from .validation import Q_
+
+gas_constant = 8.3144598
+"""`float`: The universal gas constant in J/(mol K)"""
+
+
+def get_t_ranges(T_ranges):
+    """Convert the ``T_ranges`` of a ``thermo`` block to temperatures in Kelvin.
+
+    Arguments:
+        T_ranges (`list`): The low, middle, and high temperatures, either all numbers (assumed to
+            be in Kelvin) or all strings with units
+
+    Returns:
+        `list`: The low, middle, and high temperatures in Kelvin
+    """
+    return [float(T) if isinstance(T, (int, float)) else Q_(T).to('K').magnitude
+            for T in T_ranges]
+
+
+class NASA7(object):
+    """Thermodynamic properties from NASA 7-coefficient polynomials for a set of species.
+
+    The coefficients of all of the species are packed into arrays once, so that properties of
+    every species can be evaluated at arrays of temperatures with a single set of array
+    operations. The ``data`` of each ``thermo`` block is in the usual NASA/CHEMKIN order, with
+    the seven coefficients of the high temperature range followed by the seven coefficients of
+    the low temperature range.
+
+    Arguments:
+        species_names (`list`): The names of the species
+        T_ranges (`~numpy.ndarray`): Array with one row per species of the low, middle, and high
+            temperatures of the polynomials in Kelvin
+        coefficients (`~numpy.ndarray`): Array with one row per species of the 14 coefficients
+
+    Attributes:
+        species_names (`list`): The names of the species, in the order of the last axis of the
+            evaluated properties
+        T_ranges (`~numpy.ndarray`): The temperature ranges of each species, in Kelvin
+        coefficients (`~numpy.ndarray`): Array of shape ``(n_species, 2, 7)`` with the
+            coefficients of the low and high temperature ranges, respectively
+    """
+    def __init__(self, species_names, T_ranges, coefficients):
+        self.species_names = list(species_names)
+        self.T_ranges = np.asarray(T_ranges, dtype=float).reshape(-1, 3)
+        coefficients = np.asarray(coefficients, dtype=float).reshape(-1, 2, 7)
+        if not len(self.species_names) == self.T_ranges.shape[0] == coefficients.shape[0]:
+            raise ValueError('The number of species, temperature ranges, and coefficients '
+                             'must be the same')
+        self.coefficients = coefficients[:, ::-1, :].copy()
+        self._T_mid = self.T_ranges[:, 1]
+
+    @classmethod
+    def from_datapoints(cls, datapoints, species_names=None):
+        """Construct an instance from the ``thermo`` blocks of the species in some datapoints.
+
+        The thermo data for each species is taken from the first datapoint where it is given.
+
+        Arguments:
+            datapoints (`list`): List of `~pyked.chemked.DataPoint` instances
+            species_names (`list`, optional): The species to include. By default, every species
+                with thermo data in any of the ``datapoints`` is included.
+
+        Returns:
+            `NASA7`: Instance containing the thermo data of the species
+
+        Raises:
+            `ValueError`: If one of the requested ``species_names`` does not have thermo data
+        """
+        thermo = {}
+        for dp in datapoints:
+            for species_name, species in dp.composition.items():
+                if species.thermo is not None and species_name not in thermo:
+                    thermo[species_name] = species.thermo
+
+        if species_names is None:
+            species_names = list(thermo.keys())
+        missing = [s for s in species_names if s not in thermo]
+        if missing:
+            raise ValueError('No thermo data given for species: {}'.format(', '.join(missing)))
+
+        T_ranges = [get_t_ranges(thermo[s]['T_ranges']) for s in species_names]
+        coefficients = [thermo[s]['data'] for s in species_names]
+        return cls(species_names, T_ranges, coefficients)
+
+    def _coefficients_at(self, T):
+        """Select the coefficients for each temperature and species.
+
+        Returns an array of shape ``T.shape + (n_species, 7)``.
+        """
+        high = (T[..., np.newaxis] > self._T_mid).astype(int)
+        return self.coefficients[np.arange(len(self.species_names)), high]
+
+    def cp_R(self, T):
+        """Evaluate the dimensionless heat capacity at constant pressure, cp/R.
+
+        Arguments:
+            T (`~numpy.ndarray`): Temperatures in Kelvin, of any shape
+
+        Returns:
+            `~numpy.ndarray`: Array of shape ``T.shape + (n_species,)``
+        """
+        T = np.asarray(T, dtype=float)
+        a = self._coefficients_at(T)
+        T = T[..., np.newaxis]
+        return a[..., 0] + T*(a[..., 1] + T*(a[..., 2] + T*(a[..., 3] + T*a[..., 4])))
+
+    def h_RT(self, T):
+        """Evaluate the dimensionless enthalpy, h/(RT).
+
+        Arguments:
+            T (`~numpy.ndarray`): Temperatures in Kelvin, of any shape
+
+        Returns:
+            `~numpy.ndarray`: Array of shape ``T.shape + (n_species,)``
+        """
+        T = np.asarray(T, dtype=float)
+        a = self._coefficients_at(T)
+        T = T[..., np.newaxis]
+        return (a[..., 0] + T*(a[..., 1]/2 + T*(a[..., 2]/3 + T*(a[..., 3]/4 + T*a[..., 4]/5))) +
+                a[..., 5]/T)
+
+    def s_R(self, T):
+        """Evaluate the dimensionless standard-state entropy, s/R.
+
+        Arguments:
+            T (`~numpy.ndarray`): Temperatures in Kelvin, of any shape
+
+        Returns:
+            `~numpy.ndarray`: Array of shape ``T.shape + (n_species,)``
+        """
+        T = np.asarray(T, dtype=float)
+        a = self._coefficients_at(T)
+        T = T[..., np.newaxis]
+        return (a[..., 0]*np.log(T) +
+                T*(a[..., 1] + T*(a[..., 2]/2 + T*(a[..., 3]/3 + T*a[..., 4]/4))) + a[..., 6])
+
+    def mixture_cp_R(self, T, mole_fractions):
+        """Evaluate the mole-weighted dimensionless heat capacity of mixtures.
+
+        Arguments:
+            T (`~numpy.ndarray`): Temperatures in Kelvin
+            mole_fractions (`~numpy.ndarray`): Mole fractions of the species, with the species
+                along the last axis and the other axes broadcastable with ``T``
+
+        Returns:
+            `~numpy.ndarray`: The cp/R of the mixtures
+        """
+        return np.sum(self.cp_R(T)*mole_fractions, axis=-1)
+
+    def mixture_h_RT(self, T, mole_fractions):
+        """Evaluate the mole-weighted dimensionless enthalpy of mixtures.
+
+        Arguments:
+            T (`~numpy.ndarray`): Temperatures in Kelvin
+            mole_fractions (`~numpy.ndarray`): Mole fractions of the species, with the species
+                along the last axis and the other axes broadcastable with ``T``
+
+        Returns:
+            `~numpy.ndarray`: The h/(RT) of the mixtures
+        """
+        return np.sum(self.h_RT(T)*mole_fractions, axis=-1)
+
+    def mixture_s_R(self, T, mole_fractions):
+        """Evaluate the mole-weighted dimensionless standard-state entropy of mixtures.
+
+        The entropy of mixing is not included, since it does not change for a mixture of fixed
+        composition.
+
+        Arguments:
+            T (`~numpy.ndarray`): Temperatures in Kelvin
+            mole_fractions (`~numpy.ndarray`): Mole fractions of the species, with the species
+                along the last axis and the other axes broadcastable with ``T``
+
+        Returns:
+            `~numpy.ndarray`: The s/R of the mixtures
+        """
+        return np.sum(self.s_R(T)*mole_fractions, axis=-1)
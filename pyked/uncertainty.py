@@ -0,0 +1,366 @@
+"""
+Module for arrays of quantities with uncertainties over whole datasets
+"""
+# Standard libraries
+from collections import defaultdict
+
+import numpy as np
+
+from .validation import Q_, units, property_units
+
+rcm_fields = ['compressed-pressure', 'compressed-temperature', 'compression-time', 'stroke',
+              'clearance', 'compression-ratio']
+"""`list`: Fields that are stored in the ``rcm-data`` of a datapoint"""
+
+
+def _field_name(field):
+    """Convert an attribute name like ``ignition_delay`` to a ChemKED field name.
+    """
+    return field.replace('_', '-')
+
+
+def _split_quantities(strings):
+    """Parse strings like ``'1164.48 kelvin'`` to magnitudes, grouped by their units.
+
+    Strings that are not a single number followed by units are parsed by pint one at a time.
+
+    Returns:
+        `dict`: Mapping of each units string to a tuple of the positions of its values in
+            ``strings`` and an array of their magnitudes
+    """
+    groups = defaultdict(lambda: ([], []))
+    for position, string in enumerate(strings):
+        if string is None:
+            continue
+        number, _, unit = str(string).strip().partition(' ')
+        try:
+            magnitude = float(number)
+        except ValueError:
+            quantity = Q_(string)
+            magnitude, unit = quantity.magnitude, str(quantity.units)
+        positions, magnitudes = groups[unit.strip()]
+        positions.append(position)
+        magnitudes.append(magnitude)
+    return {unit: (np.array(p, dtype=int), np.array(m, dtype=float))
+            for unit, (p, m) in groups.items()}
+
+
+def convert_units(magnitudes, from_units, to_units):
+    """Convert an array of magnitudes between units, including offset units like degC.
+    """
+    if not from_units:
+        from_units = 'dimensionless'
+    if units.Unit(from_units) == units.Unit(to_units):
+        return magnitudes
+    return Q_(magnitudes, from_units).to(to_units).magnitude
+
+
+def convert_std(nominal, std, from_units, to_units):
+    """Convert standard deviations between units, around the nominal values.
+
+    Offset units are handled by converting the ends of the interval rather than scaling.
+    """
+    return np.abs(convert_units(nominal + std, from_units, to_units) -
+                  convert_units(nominal, from_units, to_units))
+
+
+def _group_positions(positions, original_units):
+    """Group the indices of some positions by the original units of their values.
+    """
+    groups = defaultdict(list)
+    for index, position in enumerate(positions):
+        groups[original_units[position]].append(index)
+    return {unit: np.array(indices, dtype=int) for unit, indices in groups.items()}
+
+
+def parse_quantities(values, to_units):
+    """Parse a list of ChemKED quantities with uncertainties to arrays in the given units.
+
+    The values are grouped by their units, so that each group is converted with a single array
+    operation. The uncertainty is interpreted as in `~pyked.chemked.DataPoint.process_quantity`,
+    relative to the value in its original units, except that no `~uncertainties.ufloat` objects
+    are created. When asymmetric uncertainties are given, the lower and upper deviations are
+    kept separately, and the larger one is used as the standard deviation.
+
+    Arguments:
+        values (`list`): List of ChemKED quantities, each a list with a value string like
+            ``'1164.48 kelvin'`` and an optional uncertainty dictionary, or `None` if missing
+        to_units (`str`): The units of the returned arrays
+
+    Returns:
+        `tuple`: Arrays of the nominal values, the standard deviations, and the lower and upper
+            deviations from the nominal values. Missing values are ``nan``, and values without
+            an uncertainty have deviations of zero.
+    """
+    n_values = len(values)
+    nominal = np.full(n_values, np.nan)
+    std = np.full(n_values, np.nan)
+    lower = np.full(n_values, np.nan)
+    upper = np.full(n_values, np.nan)
+    original = np.full(n_values, np.nan)
+    original_lower = np.zeros(n_values)
+    original_upper = np.zeros(n_values)
+    original_units = [None]*n_values
+
+    value_groups = _split_quantities([None if v is None else v[0] for v in values])
+    for unit, (positions, magnitudes) in value_groups.items():
+        original[positions] = magnitudes
+        for position in positions:
+            original_units[position] = unit
+
+    absolute_lower = [None]*n_values
+    absolute_upper = [None]*n_values
+    for position, value in enumerate(values):
+        if value is None or len(value) < 2:
+            continue
+        unc = value[1]
+        uncertainty = unc.get('uncertainty', False)
+        upper_uncertainty = unc.get('upper-uncertainty', False)
+        lower_uncertainty = unc.get('lower-uncertainty', False)
+        uncertainty_type = unc.get('uncertainty-type')
+        if uncertainty_type not in ['relative', 'absolute']:
+            raise ValueError('uncertainty-type must be one of "absolute" or "relative"')
+        if uncertainty:
+            lower_uncertainty = upper_uncertainty = uncertainty
+        elif not (upper_uncertainty and lower_uncertainty):
+            raise ValueError('Either "uncertainty" or "upper-uncertainty" and '
+                             '"lower-uncertainty" need to be specified.')
+        if uncertainty_type == 'relative':
+            original_lower[position] = float(lower_uncertainty)*abs(original[position])
+            original_upper[position] = float(upper_uncertainty)*abs(original[position])
+        else:
+            absolute_lower[position] = lower_uncertainty
+            absolute_upper[position] = upper_uncertainty
+
+    for absolute, original_deviation in [(absolute_lower, original_lower),
+                                         (absolute_upper, original_upper)]:
+        for unit, (positions, magnitudes) in _split_quantities(absolute).items():
+            for value_units, indices in _group_positions(positions, original_units).items():
+                original_deviation[positions[indices]] = convert_units(
+                    magnitudes[indices], unit, value_units)
+
+    for unit, (positions, _) in value_groups.items():
+        magnitudes = original[positions]
+        below = original_lower[positions]
+        above = original_upper[positions]
+        nominal[positions] = convert_units(magnitudes, unit, to_units)
+        lower[positions] = nominal[positions] - convert_units(magnitudes - below, unit, to_units)
+        upper[positions] = convert_units(magnitudes + above, unit, to_units) - nominal[positions]
+        std[positions] = convert_std(magnitudes, np.maximum(below, above), unit, to_units)
+
+    return nominal, std, lower, upper
+
+
+class UncertainArray(object):
+    """Array of values with standard deviations and units.
+
+    The nominal values and standard deviations are stored as separate float arrays, and
+    uncertainties are propagated to first order with vectorized operations, which is much
+    faster than arithmetic on arrays of `~uncertainties.ufloat` objects. Uncertainties are
+    assumed to be uncorrelated. Asymmetric uncertainties are kept as separate arrays of the
+    lower and upper deviations from the nominal values, which are transformed exactly by the
+    monotonic operations of this class.
+
+    Arguments:
+        nominal (`~numpy.ndarray`): The nominal values
+        std (`~numpy.ndarray`): The standard deviations of the values
+        units (`str` or `~pint.Unit`): The units of the values
+        lower (`~numpy.ndarray`, optional): The deviations of the lower bounds below the nominal
+            values. Defaults to ``std``.
+        upper (`~numpy.ndarray`, optional): The deviations of the upper bounds above the nominal
+            values. Defaults to ``std``.
+
+    Attributes:
+        nominal (`~numpy.ndarray`): The nominal values
+        std (`~numpy.ndarray`): The standard deviations of the values
+        units (`~pint.Unit`): The units of the values
+        lower (`~numpy.ndarray`): The deviations of the lower bounds below the nominal values
+        upper (`~numpy.ndarray`): The deviations of the upper bounds above the nominal values
+
+    Examples:
+        >>> tau = UncertainArray.from_chemked([ChemKED(f) for f in yaml_files], 'ignition_delay')
+        >>> ln_tau = tau.to('ms').log()
+        >>> inverse_T = UncertainArray.from_chemked(chemkeds, 'temperature').reciprocal(1000.0)
+    """
+    def __init__(self, nominal, std, units, lower=None, upper=None):
+        self.nominal = np.asarray(nominal, dtype=float)
+        self.std = np.broadcast_to(np.asarray(std, dtype=float), self.nominal.shape).copy()
+        self.units = Q_(1.0, units).units
+        self.lower = self.std.copy() if lower is None else np.broadcast_to(
+            np.asarray(lower, dtype=float), self.nominal.shape).copy()
+        self.upper = self.std.copy() if upper is None else np.broadcast_to(
+            np.asarray(upper, dtype=float), self.nominal.shape).copy()
+
+    @classmethod
+    def from_chemked(cls, chemkeds, field, units=None):
+        """Get the values of a field over all of the datapoints of some datasets.
+
+        The values are parsed from the ChemKED properties of each dataset rather than from the
+        `~pyked.chemked.DataPoint` attributes, so that no per-value objects are created.
+
+        Arguments:
+            chemkeds (`list`): List of `~pyked.chemked.ChemKED` instances, or a single instance
+            field (`str`): The name of the field, such as ``'ignition_delay'`` or
+                ``'compressed-temperature'``
+            units (`str`, optional): The units of the array. Defaults to the SI units of the
+                field.
+
+        Returns:
+            `UncertainArray`: The values of the field, in the order of the datapoints. Missing
+                values are ``nan``.
+        """
+        if not isinstance(chemkeds, (list, tuple)):
+            chemkeds = [chemkeds]
+        field = _field_name(field)
+        if units is None:
+            units = property_units[field]
+
+        values = []
+        for chemked in chemkeds:
+            for properties in chemked._properties['datapoints']:
+                if field in rcm_fields:
+                    properties = properties.get('rcm-data', {})
+                values.append(properties.get(field))
+        nominal, std, lower, upper = parse_quantities(values, units)
+        return cls(nominal, std, units, lower, upper)
+
+    @classmethod
+    def from_quantities(cls, quantities, units):
+        """Build an array from a list of quantities, possibly with uncertainties.
+
+        Arguments:
+            quantities (`list`): List of `~pint.Quantity` or `~pint.Measurement` instances, or
+                `None` for missing values
+            units (`str`): The units of the array
+
+        Returns:
+            `UncertainArray`: The values of the quantities
+        """
+        nominal = np.full(len(quantities), np.nan)
+        std = np.full(len(quantities), np.nan)
+        for position, quantity in enumerate(quantities):
+            if quantity is None:
+                continue
+            magnitude = quantity.to(units).magnitude
+            nominal[position] = getattr(magnitude, 'nominal_value', magnitude)
+            std[position] = getattr(magnitude, 'std_dev', 0.0)
+        return cls(nominal, std, units)
+
+    def __len__(self):
+        return len(self.nominal)
+
+    def __getitem__(self, key):
+        return type(self)(self.nominal[key], self.std[key], self.units, self.lower[key],
+                          self.upper[key])
+
+    def __repr__(self):
+        return '<UncertainArray({}, {}, {})>'.format(self.nominal, self.std, self.units)
+
+    @property
+    def quantity(self):
+        """`~pint.Quantity`: The nominal values with units"""
+        return Q_(self.nominal, self.units)
+
+    @property
+    def relative_std(self):
+        """`~numpy.ndarray`: The standard deviations relative to the nominal values"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self.std/np.abs(self.nominal)
+
+    @property
+    def lower_bound(self):
+        """`~numpy.ndarray`: The lower bounds of the values"""
+        return self.nominal - self.lower
+
+    @property
+    def upper_bound(self):
+        """`~numpy.ndarray`: The upper bounds of the values"""
+        return self.nominal + self.upper
+
+    @property
+    def is_asymmetric(self):
+        """`~numpy.ndarray`: Whether the lower and upper deviations of each value differ"""
+        return self.lower != self.upper
+
+    def _transform(self, function, std, units):
+        """Apply a monotonic function to the nominal values and bounds.
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            nominal = function(self.nominal)
+            low = function(self.lower_bound)
+            high = function(self.upper_bound)
+        return type(self)(nominal, std, units, nominal - np.minimum(low, high),
+                          np.maximum(low, high) - nominal)
+
+    def normalized_residuals(self, values):
+        """Compute residuals normalized by the asymmetric uncertainties.
+
+        Values above the nominal values are divided by the upper deviations and values below
+        by the lower deviations, so the residuals of a whole dataset are computed without any
+        Python-level loops.
+
+        Arguments:
+            values (`~numpy.ndarray` or `~pint.Quantity`): The values to compare, such as model
+                predictions. Arrays are taken to be in the units of this array.
+
+        Returns:
+            `~numpy.ndarray`: The normalized residuals. Residuals of values without an
+                uncertainty are ``inf`` unless they equal the nominal value.
+        """
+        if hasattr(values, 'to'):
+            values = values.to(self.units).magnitude
+        residuals = np.asarray(values, dtype=float) - self.nominal
+        deviation = np.where(residuals >= 0.0, self.upper, self.lower)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(residuals == 0.0, 0.0, residuals/deviation)
+
+    def to(self, units):
+        """Convert the array to other units.
+
+        Arguments:
+            units (`str`): The units to convert to
+
+        Returns:
+            `UncertainArray`: The converted array
+        """
+        from_units = str(self.units)
+        return self._transform(lambda x: convert_units(x, from_units, units),
+                               convert_std(self.nominal, self.std, from_units, units), units)
+
+    def reciprocal(self, scale=1.0):
+        """Compute ``scale/x``, such as ``1000/T``, of positive values.
+
+        Arguments:
+            scale (`float`, optional): The numerator
+
+        Returns:
+            `UncertainArray`: The reciprocal, with units of ``1/units``
+        """
+        return self._transform(lambda x: scale/x, np.abs(scale/self.nominal)*self.relative_std,
+                               1/self.units)
+
+    def log(self):
+        """Compute the natural logarithm of the magnitudes in the current units.
+
+        Returns:
+            `UncertainArray`: The dimensionless logarithm
+        """
+        return self._transform(np.log, self.relative_std, 'dimensionless')
+
+    def to_quantities(self):
+        """Create per-value quantities with uncertainties, like those of
+        `~pyked.chemked.DataPoint`.
+
+        Returns:
+            `list`: List of `~pint.Measurement` instances, or `~pint.Quantity` instances for
+                values without an uncertainty, and `None` for missing values
+        """
+        quantities = []
+        for nominal, std in zip(self.nominal, self.std):
+            if np.isnan(nominal):
+                quantities.append(None)
+            elif std > 0.0:
+                quantities.append(Q_(nominal, self.units).plus_minus(std))
+            else:
+                quantities.append(Q_(nominal, self.units))
+        return quantities
@@ -1,17 +1,23 @@
 """Validation class for ChemKED schema.
 """
+from argparse import ArgumentParser
+from functools import wraps
 from warnings import warn
+import hashlib
+import json
 import re
+import sys
+import time
 
 from pkg_resources import resource_filename
 import yaml
 
 import numpy as np
 import pint
-from requests.exceptions import HTTPError, ConnectionError
 from cerberus import Validator, SchemaError
-import habanero
-from .orcid import search_orcid
+from . import client
+from .cache import canonical
+from .client import NotFoundError, LookupRejectedError, TransientLookupError
 
 units = pint.UnitRegistry()
 """Unit registry to contain the units used in PyKED"""
@@ -19,7 +25,8 @@ units = pint.UnitRegistry()
 units.define('cm3 = centimeter**3')
 Q_ = units.Quantity
 
-crossref_api = habanero.Crossref(mailto='prometheus@pr.omethe.us')
+yaml_loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+"""Safe YAML loader, using LibYAML if PyYAML was built with it, which is much faster"""
 
 # Load the ChemKED schema definition file
 schema_file = resource_filename(__name__, 'schemas/chemked_schema.yaml')
@@ -58,6 +65,10 @@ for l_num, l in enumerate(schema_list):
 schema_list[inc_start:inc_end] = inc_list
 schema = yaml.safe_load(''.join(schema_list))
 
+# Hash of the text of the schema, which is part of the keys of validate_cached. It is not
+# computed from the schema itself, which Cerberus expands in place when it first validates.
+_schema_key = hashlib.sha256(''.join(schema_list).encode('utf-8')).hexdigest()
+
 # These top-level keys in the schema serve as references for lower-level keys.
 # They are removed to prevent conflicts due to required variables, etc.
 for key in ['author', 'value-unit-required', 'value-unit-optional',
@@ -166,9 +177,239 @@ def compare_name(given_name, family_name, question_name):
     return given_name == first_name and family_name == family_name_compare
 
 
+composition_totals = {'mass fraction': 1.0, 'mole fraction': 1.0, 'mole percent': 100.0}
+"""`dict`: The total amount of the species of each kind of composition"""
+
+
+def _composition_amounts(composition):
+    """Get the total and the amounts of the species of a composition, or `None` if it is not
+    well-formed enough to be checked.
+    """
+    try:
+        total = composition_totals[composition['kind']]
+        amounts = [species['amount'][0] for species in composition['species']]
+    except (KeyError, IndexError, TypeError):
+        return None
+    if not amounts or not all(isinstance(a, (int, float)) and not isinstance(a, bool)
+                              for a in amounts):
+        return None
+    return total, amounts
+
+
+def check_compositions(compositions):
+    """Check the bounds and the sums of the amounts of the species of many compositions at once.
+
+    The amounts of all of the compositions are gathered in one array, so the checks of
+    ``isvalid_composition`` are done for all of them in a few vectorized operations: each
+    amount must be between zero and the total of the kind of composition, and the amounts of
+    each composition must sum to the total. Compositions that are not well-formed, such as
+    those with an unknown kind or amounts that are not numbers, are neither valid nor invalid
+    here, and are left to the validator.
+
+    Arguments:
+        compositions (`list`): Dictionaries with the ``kind`` and ``species`` of compositions
+
+    Returns:
+        `tuple`: A boolean `numpy.ndarray` that is `True` for the valid compositions, and an
+            integer `numpy.ndarray` with the indices of the invalid compositions
+
+    Examples:
+        >>> compositions = [p['composition'] for p in properties['datapoints']]
+        >>> valid, invalid = check_compositions(compositions)
+    """
+    indices = []
+    totals = []
+    amounts = []
+    counts = []
+    for index, composition in enumerate(compositions):
+        composition_amounts = _composition_amounts(composition)
+        if composition_amounts is not None:
+            indices.append(index)
+            totals.append(composition_amounts[0])
+            amounts.extend(composition_amounts[1])
+            counts.append(len(composition_amounts[1]))
+
+    valid = np.zeros(len(compositions), dtype=bool)
+    indices = np.array(indices, dtype=int)
+    if not len(indices):
+        return valid, indices
+
+    totals = np.array(totals)
+    amounts = np.array(amounts, dtype=float)
+    owners = np.repeat(np.arange(len(indices)), counts)
+    out_of_bounds = (amounts < 0.0) | (amounts > totals[owners])
+    out_of_bounds = np.bincount(owners, weights=out_of_bounds, minlength=len(indices)) > 0
+    sums = np.bincount(owners, weights=amounts, minlength=len(indices))
+    invalid = out_of_bounds | ~np.isclose(totals, sums)
+    valid[indices[~invalid]] = True
+    return valid, indices[invalid]
+
+
+def _valid_composition_paths(document):
+    """Find the document paths of the compositions of a ChemKED file that are valid.
+    """
+    compositions = {}
+    common = document.get('common-properties')
+    if isinstance(common, dict) and 'composition' in common:
+        compositions[('common-properties', 'composition')] = common['composition']
+    datapoints = document.get('datapoints')
+    if isinstance(datapoints, list):
+        for index, datapoint in enumerate(datapoints):
+            if isinstance(datapoint, dict) and 'composition' in datapoint:
+                compositions[('datapoints', index, 'composition')] = datapoint['composition']
+
+    paths = list(compositions)
+    valid, _ = check_compositions([compositions[path] for path in paths])
+    return {path for path, is_valid in zip(paths, valid) if is_valid}
+
+
+class ValidationProfile(object):
+    """Call counts and cumulative wall time of validation, per custom rule and per top-level field.
+
+    A profile is given to `OurValidator` in the ``profile`` keyword argument, and collects the
+    timings of all of the documents validated with it. The time of a top-level field is the time
+    of all of the rules of the field, including the Cerberus rules such as ``schema`` that
+    validate the values nested in it, so it includes the time of the custom rules in it. The
+    time of the DOI and ORCID lookups is in the time of the ``isvalid_reference`` and
+    ``isvalid_orcid`` rules, and the time of `check_compositions` is in ``check_compositions``.
+
+    Examples:
+        >>> profile = ValidationProfile()
+        >>> OurValidator(schema, profile=profile).validate(properties)
+        >>> profile.report()['rules']['isvalid_quantity']
+        {'calls': 40, 'time': 0.0123}
+    """
+    def __init__(self):
+        self.documents = 0
+        self.time = 0.0
+        self.rules = {}
+        self.fields = {}
+
+    def add(self, timings, name, elapsed, calls=1):
+        """Add calls to the timings of a rule or a field.
+
+        Arguments:
+            timings (`dict`): `rules` or `fields`
+            name (`str`): The name of the rule or of the field
+            elapsed (`float`): The wall time of the calls in seconds
+            calls (`int`, optional): The number of calls
+        """
+        total_calls, total = timings.get(name, (0, 0.0))
+        timings[name] = (total_calls + calls, total + elapsed)
+
+    def report(self):
+        """Get the timings as a dictionary, which can be written as JSON.
+
+        Returns:
+            `dict`: The number of ``documents`` validated and their total ``time`` in seconds,
+                and the ``calls`` and ``time`` of each of the ``rules`` and ``fields``, from the
+                slowest to the fastest
+        """
+        def sort(timings):
+            return {name: {'calls': calls, 'time': total} for name, (calls, total) in
+                    sorted(timings.items(), key=lambda item: item[1][1], reverse=True)}
+
+        return {'documents': self.documents, 'time': self.time, 'rules': sort(self.rules),
+                'fields': sort(self.fields)}
+
+
+def _profiled(validator, rule):
+    """Wrap a rule of a validator to record its time in the ``profile`` of the validator.
+
+    The time of the rules of the top-level fields is added to the time of their field, and the
+    time of the custom rules to the time of the rule.
+    """
+    method = getattr(validator, '_validate_' + rule)
+    profile = validator._config['profile']
+    custom = rule not in Validator.validation_rules
+    top_level = not validator.is_child
+
+    @wraps(method)
+    def wrapper(constraint, field, *args):
+        start = time.perf_counter()
+        try:
+            return method(constraint, field, *args)
+        finally:
+            elapsed = time.perf_counter() - start
+            if custom:
+                profile.add(profile.rules, rule, elapsed)
+            if top_level:
+                profile.add(profile.fields, field, elapsed, calls=0)
+    return wrapper
+
+
 class OurValidator(Validator):
     """Custom validator with rules for Quantities and references.
+
+    The DOI and ORCID lookups are done with the `~pyked.client.LookupClient` in the ``client``
+    keyword argument, which defaults to ``pyked.client.default_client``, unless their results
+    are given in the ``lookups`` keyword argument, a dictionary from ``('doi', doi)`` or
+    ``('orcid', orcid)`` to the JSON response or to the exception raised by the lookup.
+
+    The time spent by each custom rule and on each top-level field is recorded in the
+    `ValidationProfile` in the ``profile`` keyword argument, if given.
     """
+    def __init__(self, *args, **kwargs):
+        super(OurValidator, self).__init__(*args, **kwargs)
+        if self._config.get('profile') is not None:
+            # Cerberus looks up the rules on the instance, so only profiled validators are slower
+            for rule in self.validation_rules:
+                setattr(self, '_validate_' + rule, _profiled(self, rule))
+
+    @property
+    def client(self):
+        """`~pyked.client.LookupClient`: The client for DOI and ORCID lookups"""
+        return self._config.get('client') or client.default_client
+
+    def validate(self, document, *args, **kwargs):
+        """Validate a document, checking the compositions of all of its datapoints at once first.
+
+        The compositions found valid by `check_compositions` are not checked again by the
+        ``isvalid_composition`` rule, which still checks the others and reports their errors.
+        The arguments are those of `cerberus.Validator.validate`.
+        """
+        if self.is_child:
+            return super(OurValidator, self).validate(document, *args, **kwargs)
+
+        profile = self._config.get('profile')
+        start = time.perf_counter()
+        if isinstance(document, dict):
+            self._config['valid_compositions'] = _valid_composition_paths(document)
+        else:
+            self._config['valid_compositions'] = set()
+        if profile is not None:
+            profile.add(profile.rules, 'check_compositions', time.perf_counter() - start)
+        try:
+            return super(OurValidator, self).validate(document, *args, **kwargs)
+        finally:
+            if profile is not None:
+                profile.documents += 1
+                profile.time += time.perf_counter() - start
+                for field in self.document or {}:
+                    if field in self.schema:
+                        profile.add(profile.fields, field, 0.0)
+
+    __call__ = validate
+
+    def _lookup(self, kind, key, function):
+        """Get the result of a DOI or ORCID lookup, doing it if it was not done already.
+        """
+        lookups = self._config.get('lookups')
+        if lookups is None or (kind, key) not in lookups:
+            return function(key)
+        result = lookups[(kind, key)]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def _skip_lookup(self, message):
+        """Warn that a lookup was skipped, and record it in the ``skipped_lookups`` list if given.
+        """
+        warn(message)
+        skipped = self._config.get('skipped_lookups')
+        if skipped is not None:
+            skipped.append(message)
+
     def _validate_isvalid_t_range(self, isvalid_t_range, field, values):
         """Checks that the temperature ranges given for thermo data are valid
         Args:
@@ -251,7 +492,10 @@ class OurValidator(Validator):
             self._error(field, 'incompatible units; should be consistent '
                         'with ' + property_units['time'])
 
-        # Check that the values have the right number of columns
+        # Check that the values have the right number of columns. The columns of values in a
+        # file are checked by DataPoint when the file is read.
+        if isinstance(value['values'], dict):
+            return
         n_cols = len(value['values'][0])
         max_cols = max(value['time']['column'],
                        value['quantity']['column'],
@@ -329,12 +573,15 @@ class OurValidator(Validator):
         """
         if 'doi' in value:
             try:
-                ref = crossref_api.works(ids=value['doi'])['message']
-            except (HTTPError, habanero.RequestError):
+                ref = self._lookup('doi', value['doi'], self.client.works)['message']
+            except NotFoundError:
                 self._error(field, 'DOI not found')
                 return
-            except ConnectionError:
-                warn('network not available, DOI not validated.')
+            except TransientLookupError:
+                self._skip_lookup('network not available, DOI not validated.')
+                return
+            except LookupRejectedError as error:
+                self._skip_lookup('DOI lookup rejected, DOI not validated: {}'.format(error))
                 return
 
             # Assume that the reference returned by the DOI lookup always has a container-title
@@ -432,11 +679,14 @@ class OurValidator(Validator):
         """
         if isvalid_orcid and 'ORCID' in value:
             try:
-                res = search_orcid(value['ORCID'])
-            except ConnectionError:
-                warn('network not available, ORCID not validated.')
+                res = self._lookup('orcid', value['ORCID'], self.client.person)
+            except TransientLookupError:
+                self._skip_lookup('network not available, ORCID not validated.')
+                return
+            except LookupRejectedError as error:
+                self._skip_lookup('ORCID lookup rejected, ORCID not validated: {}'.format(error))
                 return
-            except HTTPError:
+            except NotFoundError:
                 self._error(field, 'ORCID incorrect or invalid for ' +
                             value['name']
                             )
@@ -463,6 +713,9 @@ class OurValidator(Validator):
             {'isvalid_composition': {'type': 'bool'}, 'field': {'type': 'str'},
              'value': {'type': 'dict'}}
         """
+        if self.document_path + (field,) in self._config.get('valid_compositions', ()):
+            return
+
         sum_amount = 0.0
         if value['kind'] in ['mass fraction', 'mole fraction']:
             low_lim = 0.0
@@ -498,3 +751,154 @@ class OurValidator(Validator):
                         '{:f}'.format(sum_amount)
                         )
         # TODO: validate InChI, SMILES, or atomic-composition
+
+
+section_names = ['reference', 'file-authors', 'datapoints']
+"""`list`: Top-level fields of ChemKED files validated as separate sections by `validate_cached`,
+where each datapoint is its own section"""
+
+
+def _section_key(name, value):
+    """Compute the key of a section from its content and the schema.
+    """
+    contents = json.dumps({'schema': _schema_key, 'section': name, 'value': canonical(value)},
+                          sort_keys=True, default=str)
+    return hashlib.sha256(contents.encode('utf-8')).hexdigest()
+
+
+def validate_cached(properties, cache, **kwargs):
+    """Validate the properties of a ChemKED file, skipping the sections that were valid before.
+
+    The file is split into the sections in `section_names`, with one section per datapoint,
+    and a section with the rest of the fields. The key of each section is the hash of its
+    content and of the schema, and the sections whose keys are in the cache are not validated
+    again, so that changing one datapoint does not look up the unchanged reference again. The
+    keys of the sections that are valid are added to the cache, except for sections whose DOI
+    or ORCID lookups were skipped, such as when the network is not available.
+
+    Arguments:
+        properties (`dict`): Dictionary created from the parsed YAML file
+        cache: Cache of the keys of the valid sections, such as a `~pyked.cache.MemoryCache` or
+            a `~pyked.cache.DiskCache`, with ``in`` and a ``set`` method
+        kwargs: Keyword arguments of `OurValidator`, such as ``client``
+
+    Returns:
+        `dict`: The errors of the file, which is empty if the file is valid. The errors of the
+            datapoints are numbered by their position in the whole file.
+    """
+    keys = {}
+    document = {}
+    sub_schema = {}
+
+    rest = {k: v for k, v in properties.items() if k not in section_names}
+    key = _section_key('rest', rest)
+    if key not in cache:
+        keys['rest'] = [key]
+        document.update(rest)
+        sub_schema.update({k: v for k, v in schema.items() if k not in section_names})
+
+    for name in ['reference', 'file-authors']:
+        key = _section_key(name, properties.get(name))
+        if key not in cache:
+            keys[name] = [key]
+            sub_schema[name] = schema[name]
+            if name in properties:
+                document[name] = properties[name]
+
+    datapoints = properties.get('datapoints')
+    if isinstance(datapoints, list) and datapoints:
+        changed = [(point, _section_key('datapoint', point)) for point in datapoints]
+        changed = [(point, key) for point, key in changed if key not in cache]
+        if changed:
+            keys['datapoints'] = [key for _, key in changed]
+            sub_schema['datapoints'] = schema['datapoints']
+            document['datapoints'] = [point for point, _ in changed]
+    else:
+        keys['datapoints'] = []
+        sub_schema['datapoints'] = schema['datapoints']
+        if 'datapoints' in properties:
+            document['datapoints'] = datapoints
+
+    if not sub_schema:
+        return {}
+
+    skipped = []
+    validator = OurValidator(sub_schema, skipped_lookups=skipped, **kwargs)
+    if validator.validate(document):
+        errors = {}
+    else:
+        errors = validator.errors
+        if 'datapoints' in errors and document['datapoints'] is not datapoints:
+            # Number the errors of the datapoints by their position in the file
+            points_validator = OurValidator({'datapoints': schema['datapoints']}, **kwargs)
+            points_validator.validate({'datapoints': datapoints})
+            errors = dict(errors, datapoints=points_validator.errors['datapoints'])
+
+    for name, section_keys in keys.items():
+        if name in errors or (skipped and name in ['reference', 'file-authors']):
+            continue
+        for key in section_keys:
+            cache.set(key, True)
+    return errors
+
+
+def main(argv=None):
+    """Validate ChemKED files, optionally writing a report of the time spent by the validation.
+
+    Returns:
+        `int`: The exit status, which is 1 if any file is invalid or could not be read
+    """
+    parser = ArgumentParser(
+        description='Validate ChemKED YAML files, and report the time spent by each rule and '
+                    'on each top-level field of the files.'
+        )
+    parser.add_argument('files',
+                        nargs='+',
+                        help='Input filenames (e.g., "file1.yaml file2.yaml")'
+                        )
+    parser.add_argument('-p', '--profile',
+                        type=str,
+                        required=False,
+                        nargs='?',
+                        const='-',
+                        help='Filename of the JSON report of the time spent by the validation, '
+                             'which is written to the standard output if no filename is given'
+                        )
+    parser.add_argument('--offline',
+                        action='store_true',
+                        help='Do not look up DOIs and ORCIDs, as with the PYKED_OFFLINE '
+                             'environment variable'
+                        )
+
+    args = parser.parse_args(argv)
+
+    lookup_client = client.OfflineClient() if args.offline else None
+    profile = ValidationProfile() if args.profile is not None else None
+    validator = OurValidator(schema, client=lookup_client, profile=profile)
+    invalid = 0
+    for filename in args.files:
+        # A file that cannot be read or validated is reported as invalid, without stopping
+        try:
+            with open(filename, 'r') as f:
+                properties = yaml.load(f, Loader=yaml_loader)
+            if validator.validate(properties):
+                print('{}: valid'.format(filename))
+                continue
+            errors = validator.errors
+        except Exception as error:
+            errors = '{}: {}'.format(type(error).__name__, error)
+        invalid += 1
+        print('{}: {}'.format(filename, errors))
+
+    if profile is not None:
+        report = json.dumps(profile.report(), indent=2)
+        if args.profile == '-':
+            print(report)
+        else:
+            with open(args.profile, 'w') as f:
+                f.write(report + '\n')
+    return 1 if invalid else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -31,7 +31,7 @@ install_requires = [
     'cerberus>=1.0.0,<1.2',
     'pint>=0.7.2,<0.9',
     'numpy>=1.11.0,<2.0',
-    'habanero>=0.6.0',
+    'requests>=2.12.0',
     'uncertainties>=3.0.1,<3.1',
 ]
 
@@ -42,6 +42,10 @@ tests_require = [
 
 extras_require = {
     'dataframes': ['pandas >=0.22.0,<0.23'],
+    'neighbors': ['scipy >=0.17.0'],
+    'parquet': ['pyarrow >=0.17.0'],
+    'hdf5': ['h5py >=2.10.0'],
+    'async': ['aiohttp >=3.6.0'],
 }
 
 needs_pytest = {'pytest', 'test', 'ptr'}.intersection(sys.argv)
@@ -81,6 +85,7 @@ setup(
         'console_scripts': ['convert_ck=pyked.converters:main',
                             'respth2ck=pyked.converters:respth2ck',
                             'ck2respth=pyked.converters:ck2respth',
+                            'validate_ck=pyked.validation:main',
                             ],
     }
 )